@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Compare rule + ML analysis with and without the inference cascade
+"""
+
+import sys
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.batch import SmellBatch
+from src.detectors.smell_detector import SmellDetector
+from src.ml.cascade import InferenceCascade
+from src.ml.localization import predict_localized, merge_predictions
+from src.ml.model import SmellPredictor
+
+
+def analyze(file_paths, predictor, cascade=None) -> SmellBatch:
+    """Run rules and ML over every file, as the analyze command does."""
+    detector = SmellDetector()
+    batch = SmellBatch()
+
+    for file_path in file_paths:
+        start = len(batch)
+        detector.detect_into(file_path, batch)
+        rule_smells = batch.spans(start)
+        if cascade is not None:
+            batch.extend(cascade.predict(file_path, rule_smells))
+        else:
+            batch.extend(merge_predictions(rule_smells, predict_localized(predictor, file_path)))
+
+    return batch
+
+
+def main():
+    """Print wall time, smell counts and cascade skip rate for a source tree."""
+    warnings.filterwarnings('ignore')
+    path = Path(sys.argv[1] if len(sys.argv) > 1 else 'src')
+    model_dir = sys.argv[2] if len(sys.argv) > 2 else 'models'
+    file_paths = [str(f) for f in path.rglob('*.py')]
+
+    predictor = SmellPredictor()
+    predictor.load_model(model_dir)
+    # Warm up lazily loaded models so both runs pay the same
+    analyze(file_paths[:1], predictor)
+
+    start = time.perf_counter()
+    full = analyze(file_paths, predictor)
+    full_seconds = time.perf_counter() - start
+
+    cascade = InferenceCascade(predictor)
+    start = time.perf_counter()
+    cascaded = analyze(file_paths, predictor, cascade)
+    cascade_seconds = time.perf_counter() - start
+
+    print(f"{len(file_paths)} files")
+    print(f"full:    {full_seconds * 1000:.0f} ms, {len(full)} smells")
+    print(f"cascade: {cascade_seconds * 1000:.0f} ms, {len(cascaded)} smells, "
+          f"skip rate {cascade.stats.skip_rate:.0%}")
+    print(f"speed-up {full_seconds / cascade_seconds:.2f}x "
+          f"(estimated in-run {cascade.stats.estimated_speedup(cascade_seconds):.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
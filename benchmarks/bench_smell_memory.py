@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Measure the memory held per CodeSmell for a rule-like mix of smells
+"""
+
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.models import CodeSmell, SmellType, Severity
+
+
+def make_smell(index: int) -> CodeSmell:
+    """Build a smell shaped like the output of the bundled rules."""
+    name = f"function_{index}"
+    file_path = str(Path('src') / f"module_{index % 100}.py")
+
+    if index % 3 == 0:
+        return CodeSmell(
+            smell_type=SmellType.LONG_METHOD,
+            severity=Severity.MEDIUM,
+            line_start=index,
+            line_end=index + 40,
+            column_start=0,
+            column_end=0,
+            message="Method '{}' is too long ({} lines)",
+            message_args=(name, 40),
+            suggestion="Consider breaking this method into smaller functions",
+            confidence=0.33,
+            file_path=file_path,
+            function_name=name,
+            metrics={'method_length': 40}
+        )
+
+    if index % 3 == 1:
+        return CodeSmell(
+            smell_type=SmellType.POOR_NAMING,
+            severity=Severity.MEDIUM,
+            line_start=index,
+            line_end=index,
+            column_start=0,
+            column_end=len(name),
+            message="Poor function name: '{}'",
+            message_args=(name,),
+            suggestion="Use descriptive names that explain what the function does",
+            confidence=0.8,
+            file_path=file_path,
+            function_name=name
+        )
+
+    return CodeSmell(
+        smell_type=SmellType.DEAD_CODE,
+        severity=Severity.MEDIUM,
+        line_start=index,
+        line_end=index + 2,
+        column_start=0,
+        column_end=0,
+        message="Dead code detected - condition is always False",
+        suggestion="Remove this unreachable code",
+        confidence=0.95,
+        file_path=file_path
+    )
+
+
+def main():
+    """Print the traced bytes per smell for a large batch of smells."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    tracemalloc.start()
+    smells = [make_smell(i) for i in range(count)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{count} smells: {current / count:.1f} bytes/smell (peak {peak / count:.1f})")
+    return smells
+
+
+if __name__ == '__main__':
+    main()
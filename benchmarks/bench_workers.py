@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Compare worker memory when models are shared from the parent or loaded per worker
+"""
+
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.models import SmellType
+from src.ml.localization import predict_localized
+from src.ml.model import SmellPredictor
+from src.ml.workers import SharedModelPool
+
+_worker_predictor = None
+
+
+def build_bundle(model_dir: str):
+    """Save a bundle with one large forest, so model memory dominates a worker."""
+    rng = np.random.default_rng(0)
+    predictor = SmellPredictor()
+    X = rng.random((4000, len(predictor.feature_extractor.feature_names)))
+    y = rng.integers(0, 2, len(X))
+
+    predictor.trained_smells = [SmellType.LONG_METHOD]
+    predictor.models[SmellType.LONG_METHOD] = RandomForestClassifier(n_estimators=100, random_state=0).fit(X, y)
+    predictor.save_model(model_dir)
+
+
+def private_kb() -> int:
+    """Memory this process does not share with any other, in KB."""
+    with open('/proc/self/smaps_rollup') as f:
+        fields = dict(line.split(':', 1) for line in f if ':' in line)
+    return sum(int(fields[name].split()[0]) for name in ('Private_Clean', 'Private_Dirty'))
+
+
+def score_shared(file_path: str, predictor: SmellPredictor):
+    predict_localized(predictor, file_path)
+    time.sleep(0.05)
+    return private_kb()
+
+
+def score_loaded(file_path: str, model_dir: str):
+    global _worker_predictor
+
+    if _worker_predictor is None:
+        _worker_predictor = SmellPredictor()
+        _worker_predictor.load_model(model_dir)
+        _worker_predictor.load_all_models()
+    return score_shared(file_path, _worker_predictor)
+
+
+def measure(task, file_paths, workers: int) -> float:
+    """Largest private memory reported by any worker, in MB."""
+    with SharedModelPool(task, workers) as pool:
+        return max(pool.imap(file_paths)) / 1024
+
+
+def main():
+    """Print per-worker private memory for shared and per-worker models."""
+    warnings.filterwarnings('ignore')
+    path = Path(sys.argv[1] if len(sys.argv) > 1 else 'src')
+    file_paths = [str(f) for f in path.rglob('*.py')]
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        build_bundle(model_dir)
+        model_bytes = sum(f.stat().st_size for f in Path(model_dir).iterdir())
+        print(f"Model bundle: {model_bytes / 2 ** 20:.1f} MB, {len(file_paths)} files")
+        print(f"{'workers':>7} {'shared':>10} {'per worker':>12}")
+
+        predictor = SmellPredictor()
+        predictor.load_model(model_dir)
+        predictor.load_all_models()
+
+        for workers in (1, 2, 4):
+            shared = measure(lambda file_path: score_shared(file_path, predictor), file_paths, workers)
+            loaded = measure(lambda file_path: score_loaded(file_path, model_dir), file_paths, workers)
+            print(f"{workers:>7} {shared:>8.1f}MB {loaded:>10.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,19 @@
 #!/usr/bin/env python3
 
 import click
+import functools
 import json
+import time
+from collections import Counter
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Dict, Any, Optional
 from rich.console import Console
-from rich.table import Table
-from rich.progress import Progress
-from rich.panel import Panel
-from rich.syntax import Syntax
 
-from src.detectors.smell_detector import SmellDetector
-from src.ml.model import SmellPredictor, TrainingDataGenerator
-from src.core.models import SmellType, Severity
+from src.core.models import SmellType, Severity, ProjectAnalysis
+
+# NumPy and the detectors and batches built on it, the ML stack (sklearn,
+# scipy, joblib) and the heavier rich widgets are imported inside the
+# commands that use them, so --help and rule-only runs start fast.
 
 
 console = Console()
@@ -28,18 +29,35 @@ def cli():
 @cli.command()
 @click.argument('path', type=click.Path(exists=True))
 @click.option('--output', '-o', type=click.Path(), help='Output file for results')
-@click.option('--format', '-f', type=click.Choice(['json', 'table', 'detailed']), default='table', help='Output format')
+@click.option('--format', '-f', type=click.Choice(['json', 'table', 'detailed', 'report']), default='table', help='Output format')
 @click.option('--severity', '-s', type=click.Choice(['low', 'medium', 'high', 'critical']), help='Filter by severity')
 @click.option('--smell-type', '-t', help='Filter by smell type')
 @click.option('--ml-predict', is_flag=True, help='Use ML model for prediction')
-def analyze(path: str, output: str, format: str, severity: str, smell_type: str, ml_predict: bool):
+@click.option('--page', type=click.IntRange(min=1), default=1, help='Page of detail rows to show in report format')
+@click.option('--page-size', type=click.IntRange(min=1), default=50, help='Detail rows per page in report format')
+@click.option('--n-jobs', type=int, default=None, help='Parallel jobs for ML inference')
+@click.option('--cascade/--no-cascade', default=True, help='Skip ML inference where rule results are decisive')
+@click.option('--workers', type=click.IntRange(min=1), default=1,
+              help='Analyze files in this many worker processes sharing the loaded models')
+@click.option('--cache-dir', type=click.Path(file_okay=False),
+              help='Keep ML scores of seen feature vectors here across runs')
+def analyze(path: str, output: str, format: str, severity: str, smell_type: str, ml_predict: bool,
+            page: int, page_size: int, n_jobs: int, cascade: bool, workers: int, cache_dir: str):
     """Analyze code for smells in a file or directory"""
     
+    from src.detectors.smell_detector import SmellDetector
+    from src.core.aggregation import ProjectAggregator
+    from src.core.batch import SmellBatch
+    
     detector = SmellDetector()
     predictor = None
+    ml_cascade = None
     
     if ml_predict:
-        predictor = SmellPredictor()
+        from src.ml.model import SmellPredictor
+        from src.ml.cascade import InferenceCascade
+
+        predictor = SmellPredictor(n_jobs=n_jobs)
         model_path = Path('models')
         if model_path.exists():
             try:
@@ -48,66 +66,226 @@ def analyze(path: str, output: str, format: str, severity: str, smell_type: str,
             except Exception as e:
                 console.print(f"[yellow]Warning: Could not load ML model: {e}[/yellow]")
                 predictor = None
+        if predictor:
+            _attach_prediction_cache(predictor, cache_dir)
+        if predictor and cascade:
+            ml_cascade = InferenceCascade(predictor)
     
     path_obj = Path(path)
     files_to_analyze = []
     
     if path_obj.is_file():
         files_to_analyze = [str(path_obj)]
+        aggregator = ProjectAggregator(str(path_obj.parent))
     else:
         files_to_analyze = [str(f) for f in path_obj.rglob('*.py')]
+        aggregator = ProjectAggregator(str(path_obj))
     
-    all_results = []
-    
-    with Progress() as progress:
-        task = progress.add_task("[green]Analyzing files...", total=len(files_to_analyze))
+    from rich.progress import Progress
+
+    batch = SmellBatch()
+    # Per-file metrics are only written by the JSON output; other formats keep just the batch
+    file_metrics = {} if format == 'json' else None
+    started = time.perf_counter()
+    
+    use_pool = workers > 1 and len(files_to_analyze) > 1
+    if use_pool:
+        from src.ml.workers import SharedModelPool, fork_available
         
-        for file_path in files_to_analyze:
-            try:
-                analysis = detector.detect_smells(file_path)
-                
-                if predictor:
-                    ml_predictions = predictor.predict(file_path)
-                    for pred in ml_predictions:
-                        # Convert ML prediction to CodeSmell for consistency
-                        pass
-                
-                filtered_smells = analysis.smells
-                
-                if severity:
-                    filtered_smells = [s for s in filtered_smells if s.severity.value == severity]
-                
-                if smell_type:
-                    filtered_smells = [s for s in filtered_smells if s.smell_type.value == smell_type]
-                
-                if filtered_smells:
-                    all_results.append({
-                        'file': file_path,
-                        'smells': filtered_smells,
-                        'metrics': analysis.metrics
-                    })
+        if not fork_available():
+            console.print("[yellow]Warning: worker processes need the fork start method; analyzing sequentially[/yellow]")
+            use_pool = False
+    
+    if use_pool:
+        if predictor:
+            predictor.load_all_models()
+            # Workers send the scores they compute back for the parent's cache
+            predictor.prediction_cache.track_stored = True
+        
+        task = functools.partial(_analyze_in_worker, detector=detector, predictor=predictor, ml_cascade=ml_cascade)
+        chunksize = max(1, len(files_to_analyze) // (workers * 4))
+        
+        with SharedModelPool(task, workers) as pool, Progress() as progress:
+            progress_task = progress.add_task("[green]Analyzing files...", total=len(files_to_analyze))
+            
+            for file_path, (analysis, smells, stats, cached, error) in zip(
+                    files_to_analyze, pool.imap(files_to_analyze, chunksize)):
+                if cached is not None:
+                    predictor.prediction_cache.merge(*cached)
+                if error is not None:
+                    console.print(f"[red]Error analyzing {file_path}: {error}[/red]")
+                else:
+                    batch.extend(smells)
+                    aggregator.add(analysis)
+                    if file_metrics is not None:
+                        file_metrics[file_path] = analysis.metrics
+                    if stats is not None:
+                        ml_cascade.stats.merge(stats)
                 
-                progress.update(task, advance=1)
+                progress.update(progress_task, advance=1)
+    else:
+        with Progress() as progress:
+            progress_task = progress.add_task("[green]Analyzing files...", total=len(files_to_analyze))
+            
+            for file_path in files_to_analyze:
+                start = len(batch)
+                try:
+                    analysis = _analyze_into(file_path, batch, detector, predictor, ml_cascade)
+                    aggregator.add(analysis)
+                    if file_metrics is not None:
+                        file_metrics[file_path] = analysis.metrics
+                    
+                except Exception as e:
+                    batch.truncate(start)
+                    console.print(f"[red]Error analyzing {file_path}: {e}[/red]")
                 
-            except Exception as e:
-                console.print(f"[red]Error analyzing {file_path}: {e}[/red]")
-                progress.update(task, advance=1)
+                progress.update(progress_task, advance=1)
+    
+    if ml_cascade:
+        # Inference time is summed over workers, so compare it with worker-seconds
+        _output_cascade(ml_cascade.stats, (time.perf_counter() - started) * (workers if use_pool else 1))
+    if predictor:
+        _save_prediction_cache(predictor, cache_dir)
+    
+    batch = batch.filter(severity=severity, smell_type=smell_type)
+    aggregator.add_batch(batch)
     
     if format == 'json':
-        _output_json(all_results, output)
+        _output_json(batch, file_metrics, output)
     elif format == 'table':
-        _output_table(all_results)
+        _output_table(batch)
     elif format == 'detailed':
-        _output_detailed(all_results)
+        _output_detailed(batch)
+    elif format == 'report':
+        _output_report(batch, aggregator.to_project_analysis(), page, page_size)
+
+
+def _attach_prediction_cache(predictor, cache_dir: Optional[str]):
+    """Give a predictor a prediction cache, seeded from ``cache_dir`` if set"""
+    from src.ml.prediction_cache import PredictionCache
+    
+    predictor.prediction_cache = PredictionCache()
+    predictor.prediction_cache.bind(predictor.model_key)
+    if cache_dir:
+        predictor.prediction_cache.load(cache_dir)
+
+
+def _save_prediction_cache(predictor, cache_dir: Optional[str]):
+    cache = predictor.prediction_cache
+    if cache_dir:
+        cache.save(cache_dir)
+    if cache.hits + cache.misses:
+        console.print(
+            f"[blue]Prediction cache: reused scores for {cache.hits} of {cache.hits + cache.misses} "
+            f"feature vectors ({cache.hit_rate:.0%}); {len(cache)} cached[/blue]"
+        )
+
+
+def _analyze_into(file_path: str, batch: 'SmellBatch', detector: 'SmellDetector', predictor, ml_cascade):
+    """Append the rule smells and any ML smells of a file to ``batch``"""
+    start = len(batch)
+    analysis = detector.detect_into(file_path, batch)
+    
+    if ml_cascade:
+        batch.extend(ml_cascade.predict(file_path, batch.spans(start)))
+    elif predictor:
+        from src.ml.localization import predict_localized, merge_predictions
+        
+        batch.extend(merge_predictions(batch.spans(start), predict_localized(predictor, file_path)))
+    
+    return analysis
+
+
+def _analyze_in_worker(file_path: str, detector: 'SmellDetector', predictor, ml_cascade):
+    """Analyze one file in a worker process.
+
+    Returns (analysis, smells, cascade stats, cache updates, error); cache
+    updates are the (entries, hits, misses) of the file for ``PredictionCache.merge``.
+    """
+    from src.core.batch import SmellBatch
+    
+    batch = SmellBatch()
+    if ml_cascade:
+        from src.ml.cascade import CascadeStats
+        
+        ml_cascade.stats = CascadeStats()
+    cache = predictor.prediction_cache if predictor else None
+    if cache is not None:
+        cache.hits = cache.misses = 0
+    
+    try:
+        analysis = _analyze_into(file_path, batch, detector, predictor, ml_cascade)
+    except Exception as e:
+        return None, [], None, _cache_updates(cache), str(e)
+    
+    return analysis, batch.to_smells(), ml_cascade.stats if ml_cascade else None, _cache_updates(cache), None
+
+
+def _cache_updates(cache):
+    return (cache.take_stored(), cache.hits, cache.misses) if cache is not None else None
 
 
 @cli.command()
 @click.argument('training_dir', type=click.Path(exists=True))
-@click.option('--model-type', '-m', type=click.Choice(['random_forest', 'gradient_boosting', 'logistic_regression', 'svm']), default='random_forest')
+@click.option('--model-type', '-m', type=click.Choice(['random_forest', 'gradient_boosting', 'logistic_regression', 'svm', 'sgd', 'naive_bayes']), default='random_forest')
 @click.option('--output-dir', '-o', type=click.Path(), default='models')
-def train(training_dir: str, model_type: str, output_dir: str):
+@click.option('--target-precision', type=click.FloatRange(0, 1), help='Pick per-smell thresholds meeting this held-out precision')
+@click.option('--target-recall', type=click.FloatRange(0, 1), help='Pick per-smell thresholds meeting this held-out recall')
+@click.option('--multi-label', is_flag=True, help='Train one multi-label model for all smell types')
+@click.option('--hash-features', type=click.IntRange(min=0), default=0,
+              help='Add this many hashed AST n-gram features (0 disables them)')
+@click.option('--max-feature-loss', type=click.FloatRange(0, 1),
+              help='Train each smell on its cheapest feature subset within this validation accuracy loss')
+@click.option('--n-jobs', type=int, default=None, help='Processes for labelling and feature extraction, and jobs for the models')
+@click.option('--search', is_flag=True, help='Tune each smell\'s hyperparameters by successive halving')
+@click.option('--search-budget', type=click.FloatRange(min=0), default=300, show_default=True,
+              help='Wall-clock seconds for --search, shared by all smell types')
+@click.option('--params-from', type=click.Path(exists=True),
+              help='Reuse the hyperparameters stored in this model directory')
+@click.option('--out-of-core', is_flag=True,
+              help='Stream features to disk and fit chunk by chunk (sgd, naive_bayes or random_forest)')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=10000, show_default=True,
+              help='Files per chunk with --out-of-core')
+@click.option('--work-dir', type=click.Path(exists=True, file_okay=False),
+              help='Where --out-of-core keeps its feature matrix (default: the system temp directory)')
+@click.option('--synthetic', type=click.IntRange(min=0), default=0,
+              help='Add this many generated samples, built without files (needs --out-of-core)')
+@click.option('--synthetic-intensity', type=click.FloatRange(0, 1), default=0.5, show_default=True,
+              help='How far generated smells go past their rule thresholds')
+@click.option('--synthetic-noise', type=click.FloatRange(0, 1), default=0.2, show_default=True,
+              help='Chance of a filler statement after each generated statement')
+@click.option('--label-cache', type=click.Path(file_okay=False),
+              help='Reuse labels of unchanged files from this directory across runs')
+@click.option('--label-report', type=click.Path(dir_okay=False), help='Write files that failed labelling to this JSON file')
+@click.option('--unit-samples', is_flag=True,
+              help='Train on every function and class as a sample of its own, labelled by the smells inside it')
+def train(training_dir: str, model_type: str, output_dir: str, target_precision: float, target_recall: float,
+          multi_label: bool, hash_features: int, max_feature_loss: float, n_jobs: int, search: bool,
+          search_budget: float, params_from: str, out_of_core: bool, chunk_size: int, work_dir: str,
+          synthetic: int, synthetic_intensity: float, synthetic_noise: float, label_cache: str, label_report: str,
+          unit_samples: bool):
     """Train ML model on code samples"""
     
+    if target_precision is not None and target_recall is not None:
+        console.print("[red]Use only one of --target-precision and --target-recall[/red]")
+        return
+    if search and params_from:
+        console.print("[red]Use only one of --search and --params-from[/red]")
+        return
+    if out_of_core and (search or max_feature_loss is not None):
+        console.print("[red]--out-of-core cannot be combined with --search or --max-feature-loss[/red]")
+        return
+    if synthetic and not out_of_core:
+        console.print("[red]--synthetic needs --out-of-core[/red]")
+        return
+    if unit_samples and out_of_core:
+        console.print("[red]--unit-samples cannot be combined with --out-of-core[/red]")
+        return
+    
+    from rich.progress import Progress
+    from rich.table import Table
+    from src.ml.model import SmellPredictor, TrainingDataGenerator
+    
     console.print(f"[blue]Training {model_type} model...[/blue]")
     
     training_files = list(Path(training_dir).rglob('*.py'))
@@ -116,21 +294,57 @@ def train(training_dir: str, model_type: str, output_dir: str):
         console.print("[red]No Python files found in training directory[/red]")
         return
     
-    generator = TrainingDataGenerator()
+    generator = TrainingDataGenerator(n_jobs=n_jobs, cache_dir=label_cache)
     training_data = generator.generate_training_data([str(f) for f in training_files])
+    _output_label_failures(generator.failure_report(), label_report)
     
     if not training_data:
         console.print("[red]No training data generated[/red]")
         return
     
-    predictor = SmellPredictor(model_type=model_type)
+    predictor = SmellPredictor(model_type=model_type, multi_label=multi_label, hash_features=hash_features,
+                               n_jobs=n_jobs)
+    
+    if params_from:
+        from src.ml.bundle import read_manifest
+        
+        manifest = read_manifest(params_from)
+        if manifest['model_type'] != model_type:
+            console.print(f"[red]{params_from} holds {manifest['model_type']} models, not {model_type}[/red]")
+            return
+        predictor.hyperparameters = {
+            SmellType(smell): params for smell, params in manifest.get('hyperparameters', {}).items()
+        }
+    
+    # The multi-label comparison below evaluates on the same features
+    matrix = predictor.prepare_training_matrix(training_data) if multi_label and not (out_of_core or unit_samples) else None
     
     with Progress() as progress:
         task = progress.add_task("[green]Training model...", total=100)
         
-        results = predictor.train(training_data)
+        try:
+            if out_of_core:
+                from src.ml.synthetic import SyntheticGenerator
+                
+                generator = SyntheticGenerator(intensity=synthetic_intensity, noise=synthetic_noise)
+                results = predictor.train_out_of_core(training_data, chunk_size=chunk_size, work_dir=work_dir,
+                                                      target_precision=target_precision,
+                                                      target_recall=target_recall,
+                                                      synthetic=generator, synthetic_samples=synthetic)
+            else:
+                results = predictor.train(training_data, target_precision=target_precision,
+                                          target_recall=target_recall, max_feature_loss=max_feature_loss,
+                                          search_budget=search_budget if search else None,
+                                          unit_samples=unit_samples, matrix=matrix)
+        except ValueError as e:
+            console.print(f"[red]Error training model: {e}[/red]")
+            return
         progress.update(task, advance=100)
     
+    if not results:
+        console.print("[red]No smell type varies across the training files; no model saved[/red]")
+        return
+    
     predictor.save_model(output_dir)
     
     console.print(f"[green]Model trained and saved to {output_dir}[/green]")
@@ -140,31 +354,108 @@ def train(training_dir: str, model_type: str, output_dir: str):
     table.add_column("Smell Type")
     table.add_column("Accuracy")
     table.add_column("CV Score")
+    table.add_column("Threshold")
     table.add_column("Samples")
+    if max_feature_loss is not None:
+        table.add_column("Features")
+        table.add_column("Cost / File")
+    if search:
+        table.add_column("Candidates")
+        table.add_column("Latency")
     
     for smell_type, metrics in results.items():
-        table.add_row(
+        row = [
             smell_type,
             f"{metrics['accuracy']:.3f}",
             f"{metrics['cv_mean']:.3f} ± {metrics['cv_std']:.3f}",
+            f"{metrics['threshold']:.3f}",
             str(metrics['training_samples'])
-        )
+        ]
+        if max_feature_loss is not None:
+            row.append(str(len(metrics['selected_features'])))
+            row.append(f"{metrics['feature_cost'] * 1000:.2f} ms")
+        if search:
+            searched = metrics.get('search')
+            row.append(str(searched['candidates']) if searched else "-")
+            row.append(f"{searched['latency_ms']:.2f} ms" if searched else "-")
+        table.add_row(*row)
     
     console.print(table)
+    
+    if matrix is not None:
+        from src.ml.evaluation import compare_multi_label
+
+        X, Y = matrix
+        _output_multi_label_comparison(compare_multi_label(X, Y, model_type=model_type))
 
 
 @cli.command()
-@click.argument('file_path', type=click.Path(exists=True))
+@click.argument('training_dir', type=click.Path(exists=True))
+@click.option('--model-dir', '-m', type=click.Path(exists=True), default='models')
+@click.option('--output-dir', '-o', type=click.Path(), help='Where to save the updated models (default: --model-dir)')
+@click.option('--new-trees', type=click.IntRange(min=1), default=10, help='Trees added to each random forest')
+def update(training_dir: str, model_dir: str, output_dir: str, new_trees: int):
+    """Fold newly labelled code samples into trained models without retraining"""
+    
+    from rich.table import Table
+    from src.ml.model import SmellPredictor, TrainingDataGenerator
+    
+    training_files = [str(f) for f in Path(training_dir).rglob('*.py')]
+    generator = TrainingDataGenerator()
+    training_data = generator.generate_training_data(training_files)
+    _output_label_failures(generator.failure_report())
+    
+    if not training_data:
+        console.print("[red]No training data generated[/red]")
+        return
+    
+    predictor = SmellPredictor()
+    
+    try:
+        predictor.load_model(model_dir)
+        results = predictor.update(training_data, new_trees=new_trees)
+    except Exception as e:
+        console.print(f"[red]Error updating models: {e}[/red]")
+        return
+    
+    output_dir = output_dir or model_dir
+    predictor.save_model(output_dir)
+    
+    table = Table(title=f"Model Update (version {predictor.model_version})")
+    table.add_column("Smell Type")
+    table.add_column("Method")
+    table.add_column("Samples", justify="right")
+    
+    for smell_type, result in results.items():
+        table.add_row(smell_type, result['method'], str(result['samples']))
+    
+    console.print(table)
+    console.print(f"[green]Updated models saved to {output_dir}[/green]")
+
+
+@cli.command()
+@click.argument('path', type=click.Path(exists=True))
 @click.option('--model-dir', '-m', type=click.Path(), default='models')
-def predict(file_path: str, model_dir: str):
-    """Predict code smells using trained ML model"""
+@click.option('--n-jobs', type=int, default=None, help='Parallel jobs for ML inference')
+@click.option('--compiled', is_flag=True, help='Model directory holds compiled models (see the compile command)')
+@click.option('--cache-dir', type=click.Path(file_okay=False),
+              help='Keep ML scores of seen feature vectors here across runs')
+def predict(path: str, model_dir: str, n_jobs: int, compiled: bool, cache_dir: str):
+    """Predict code smells using trained ML model for a file or directory"""
     
     model_path = Path(model_dir)
     if not model_path.exists():
         console.print(f"[red]Model directory {model_dir} not found[/red]")
         return
     
-    predictor = SmellPredictor()
+    if compiled:
+        from src.ml.compiled import CompiledPredictor
+
+        predictor = CompiledPredictor()
+    else:
+        from src.ml.model import SmellPredictor
+
+        predictor = SmellPredictor(n_jobs=n_jobs)
     
     try:
         predictor.load_model(str(model_path))
@@ -173,23 +464,107 @@ def predict(file_path: str, model_dir: str):
         console.print(f"[red]Error loading model: {e}[/red]")
         return
     
-    predictions = predictor.predict(file_path)
+    if not compiled:
+        _attach_prediction_cache(predictor, cache_dir)
     
-    if not predictions:
+    path_obj = Path(path)
+    if path_obj.is_file():
+        file_paths = [str(path_obj)]
+    else:
+        file_paths = [str(f) for f in path_obj.rglob('*.py')]
+    
+    from src.ml.feature_extractor import stack_features
+    
+    parsed_files = []
+    features = []
+    for file_path in file_paths:
+        try:
+            features.append(predictor.feature_extractor.extract_features_batch([file_path]))
+            parsed_files.append(file_path)
+        except Exception as e:
+            console.print(f"[red]Error extracting features from {file_path}: {e}[/red]")
+    
+    all_predictions = predictor.predict_features(stack_features(features)) if features else []
+    if not compiled:
+        _save_prediction_cache(predictor, cache_dir)
+    
+    if not any(all_predictions):
         console.print("[green]No code smells predicted[/green]")
         return
     
-    console.print(f"[blue]Predictions for {file_path}:[/blue]")
+    from rich.panel import Panel
     
-    for pred in predictions:
-        panel = Panel(
-            f"Smell Type: {pred['smell_type'].value}\n"
-            f"Confidence: {pred['confidence']:.3f}\n"
-            f"Probability: {pred['probability']:.3f}",
-            title=f"Predicted Smell",
-            border_style="yellow"
-        )
-        console.print(panel)
+    for file_path, predictions in zip(parsed_files, all_predictions):
+        if not predictions:
+            continue
+        
+        console.print(f"[blue]Predictions for {file_path}:[/blue]")
+        
+        for pred in predictions:
+            panel = Panel(
+                f"Smell Type: {pred['smell_type'].value}\n"
+                f"Confidence: {pred['confidence']:.3f}\n"
+                f"Probability: {pred['probability']:.3f}",
+                title=f"Predicted Smell",
+                border_style="yellow"
+            )
+            console.print(panel)
+
+
+@cli.command(name='compile')
+@click.option('--model-dir', '-m', type=click.Path(exists=True), default='models')
+@click.option('--output-dir', '-o', type=click.Path(), default='models/compiled')
+def compile_models(model_dir: str, output_dir: str):
+    """Compile trained tree ensembles into flat NumPy arrays"""
+    
+    from src.ml.model import SmellPredictor
+    from src.ml.compiled import export_compiled
+    
+    predictor = SmellPredictor()
+    
+    try:
+        predictor.load_model(model_dir)
+        manifest = export_compiled(predictor, output_dir)
+    except Exception as e:
+        console.print(f"[red]Error compiling models: {e}[/red]")
+        return
+    
+    console.print(f"[green]Compiled {len(manifest['smells'])} smell models to {output_dir}[/green]")
+
+
+@cli.command()
+@click.argument('training_dir', type=click.Path(exists=True))
+@click.option('--model-dir', '-m', type=click.Path(exists=True), default='models')
+@click.option('--output-dir', '-o', type=click.Path(), default='models/compressed')
+@click.option('--max-accuracy-loss', type=click.FloatRange(0, 1), default=0.01,
+              help='Largest held-out accuracy drop accepted for a smaller model')
+def compress(training_dir: str, model_dir: str, output_dir: str, max_accuracy_loss: float):
+    """Prune or distill trained models to the smallest within an accuracy loss"""
+    
+    from src.ml.model import SmellPredictor, TrainingDataGenerator
+    from src.ml.compression import compress_models
+    
+    training_files = [str(f) for f in Path(training_dir).rglob('*.py')]
+    generator = TrainingDataGenerator()
+    training_data = generator.generate_training_data(training_files)
+    _output_label_failures(generator.failure_report())
+    
+    if not training_data:
+        console.print("[red]No training data generated[/red]")
+        return
+    
+    predictor = SmellPredictor()
+    
+    try:
+        predictor.load_model(model_dir)
+        report = compress_models(predictor, training_data, max_accuracy_loss=max_accuracy_loss)
+    except Exception as e:
+        console.print(f"[red]Error compressing models: {e}[/red]")
+        return
+    
+    predictor.save_model(output_dir)
+    _output_compression(report)
+    console.print(f"[green]Compressed models saved to {output_dir}[/green]")
 
 
 @cli.command()
@@ -197,6 +572,8 @@ def predict(file_path: str, model_dir: str):
 def explain(file_path: str):
     """Explain detected code smells with suggestions"""
     
+    from src.detectors.smell_detector import SmellDetector
+    
     detector = SmellDetector()
     analysis = detector.detect_smells(file_path)
     
@@ -204,6 +581,9 @@ def explain(file_path: str):
         console.print("[green]No code smells detected[/green]")
         return
     
+    from rich.panel import Panel
+    from rich.syntax import Syntax
+    
     with open(file_path, 'r') as f:
         content = f.read()
     
@@ -231,13 +611,90 @@ def explain(file_path: str):
         console.print(syntax)
 
 
-def _output_json(results: List[Dict], output_file: str = None):
+def _output_multi_label_comparison(comparison: Dict[str, Any]):
+    """Output independent and multi-label models side by side"""
+    from rich.table import Table
+    
+    table = Table(title="Independent vs Multi-label")
+    table.add_column("Smell Type")
+    table.add_column("Independent Accuracy")
+    table.add_column("Multi-label Accuracy")
+    
+    for smell_type, metrics in comparison['labels'].items():
+        table.add_row(
+            smell_type,
+            f"{metrics['independent_accuracy']:.3f}",
+            f"{metrics['multi_label_accuracy']:.3f}"
+        )
+    
+    independent = comparison['independent']
+    multi = comparison['multi_label']
+    table.add_row("latency (ms)", f"{independent['latency_ms']:.2f}", f"{multi['latency_ms']:.2f}")
+    table.add_row("size (KB)", f"{independent['size_bytes'] / 1024:.1f}", f"{multi['size_bytes'] / 1024:.1f}")
+    
+    console.print(table)
+
+
+def _output_cascade(stats, elapsed_seconds: float):
+    """Output how much ML inference the rule/ML cascade skipped"""
+    console.print(
+        f"[blue]ML cascade: skipped {stats.checks_skipped} of {stats.checks} smell checks "
+        f"({stats.skip_rate:.0%}), {stats.files_skipped} of {stats.files} files; "
+        f"inference {stats.inference_seconds * 1000:.0f} ms, "
+        f"estimated speed-up {stats.estimated_speedup(elapsed_seconds):.2f}x[/blue]"
+    )
+
+
+def _output_label_failures(report: Dict[str, Any], report_file: Optional[str] = None):
+    """Output how many files could not be labelled, by error type, and optionally save the full report"""
+    if report_file:
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    if report['cache_hits']:
+        console.print(f"[blue]Reused labels of {report['cache_hits']} unchanged files[/blue]")
+    if not report['failed']:
+        return
+    
+    console.print(f"[yellow]Skipped {report['failed']} files that could not be labelled:[/yellow]")
+    for error_type, failures in report['errors'].items():
+        example = failures[0]
+        console.print(f"  {error_type}: {len(failures)} files, e.g. {example['file_path']}: {example['message']}")
+
+
+def _output_compression(report: Dict[str, Any]):
+    """Output held-out accuracy, latency and size of every compression candidate"""
+    from rich.table import Table
+    
+    table = Table(title="Model Compression")
+    table.add_column("Smell Type")
+    table.add_column("Candidate")
+    table.add_column("Accuracy", justify="right")
+    table.add_column("Latency (ms)", justify="right")
+    table.add_column("Size (KB)", justify="right")
+    table.add_column("Selected")
+    
+    for smell_type, result in report.items():
+        for row in result['candidates']:
+            table.add_row(
+                smell_type,
+                row['name'],
+                f"{row['accuracy']:.3f}",
+                f"{row['latency_ms']:.2f}",
+                f"{row['size_bytes'] / 1024:.1f}",
+                "[green]yes[/green]" if row['name'] == result['selected'] else ""
+            )
+    
+    console.print(table)
+
+
+def _output_json(batch: 'SmellBatch', file_metrics: Dict[str, Dict], output_file: str = None):
     """Output results in JSON format"""
     json_results = []
     
-    for result in results:
+    for file_path, indices in batch.group_by_file():
         json_smells = []
-        for smell in result['smells']:
+        for smell in batch.to_smells(indices):
             json_smells.append({
                 'type': smell.smell_type.value,
                 'severity': smell.severity.value,
@@ -249,9 +706,9 @@ def _output_json(results: List[Dict], output_file: str = None):
             })
         
         json_results.append({
-            'file': result['file'],
+            'file': file_path,
             'smells': json_smells,
-            'metrics': result['metrics']
+            'metrics': file_metrics.get(file_path, {})
         })
     
     if output_file:
@@ -262,8 +719,10 @@ def _output_json(results: List[Dict], output_file: str = None):
         console.print(json.dumps(json_results, indent=2))
 
 
-def _output_table(results: List[Dict]):
+def _output_table(batch: 'SmellBatch'):
     """Output results in table format"""
+    from rich.table import Table
+    
     table = Table(title="Code Smell Analysis Results")
     table.add_column("File")
     table.add_column("Smell Type")
@@ -271,9 +730,8 @@ def _output_table(results: List[Dict]):
     table.add_column("Line")
     table.add_column("Message")
     
-    for result in results:
-        file_path = result['file']
-        for smell in result['smells']:
+    for file_path, indices in batch.group_by_file():
+        for smell in batch.to_smells(indices):
             table.add_row(
                 file_path,
                 smell.smell_type.value,
@@ -285,16 +743,81 @@ def _output_table(results: List[Dict]):
     console.print(table)
 
 
-def _output_detailed(results: List[Dict]):
+def _output_report(batch: 'SmellBatch', project: ProjectAnalysis, page: int = 1, page_size: int = 50):
+    """Output aggregate summaries followed by a single page of detail rows"""
+    from rich.table import Table
+    
+    summary = project.summary
+    total = project.total_smells
+    console.print(f"[blue]{total} smells in {summary['files']} files "
+                  f"({summary['lines_of_code']} lines of code)[/blue]")
+    
+    type_table = Table(title="Smells by Type")
+    type_table.add_column("Smell Type")
+    type_table.add_column("Count", justify="right")
+    for name, count in Counter(summary['smell_types']).most_common():
+        type_table.add_row(name, str(count))
+    console.print(type_table)
+    
+    severity_table = Table(title="Smells by Severity")
+    severity_table.add_column("Severity")
+    severity_table.add_column("Count", justify="right")
+    for level in Severity:
+        count = summary['severities'].get(level.value, 0)
+        if count:
+            severity_table.add_row(level.value, str(count))
+    console.print(severity_table)
+    
+    directory_table = Table(title="Top Directories")
+    directory_table.add_column("Directory")
+    directory_table.add_column("Files", justify="right")
+    directory_table.add_column("Lines", justify="right")
+    directory_table.add_column("Smells", justify="right")
+    directories = sorted(summary['directories'].items(), key=lambda item: -item[1]['total_smells'])
+    for directory, rollup in directories[:10]:
+        directory_table.add_row(
+            directory,
+            str(rollup['files']),
+            str(rollup['lines_of_code']),
+            str(rollup['total_smells'])
+        )
+    console.print(directory_table)
+    
+    page_count = max(1, -(-total // page_size))
+    if page > page_count:
+        console.print(f"[yellow]Page {page} is out of range (1-{page_count})[/yellow]")
+        return
+    
+    start = (page - 1) * page_size
+    rows = batch.argsort()[start:start + page_size]
+    
+    table = Table(title=f"Details (page {page}/{page_count})")
+    table.add_column("File")
+    table.add_column("Smell Type")
+    table.add_column("Severity")
+    table.add_column("Line")
+    table.add_column("Message")
+    
+    for smell in batch.to_smells(rows):
+        table.add_row(
+            smell.file_path,
+            smell.smell_type.value,
+            smell.severity.value,
+            f"{smell.line_start}-{smell.line_end}",
+            smell.message[:50] + "..." if len(smell.message) > 50 else smell.message
+        )
+    
+    console.print(table)
+    if total:
+        console.print(f"Showing rows {start + 1}-{start + len(rows)} of {total}")
+
+
+def _output_detailed(batch: 'SmellBatch'):
     """Output detailed results"""
-    for result in results:
-        console.print(f"\n[blue]File: {result['file']}[/blue]")
-        
-        if not result['smells']:
-            console.print("[green]No smells detected[/green]")
-            continue
+    for file_path, indices in batch.group_by_file():
+        console.print(f"\n[blue]File: {file_path}[/blue]")
         
-        for smell in result['smells']:
+        for smell in batch.to_smells(indices):
             severity_color = {
                 'low': 'yellow',
                 'medium': 'orange',
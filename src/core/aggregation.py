@@ -0,0 +1,154 @@
+import numpy as np
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import List, Dict, Any, Optional
+
+from .models import CodeSmell, FileAnalysis, ProjectAnalysis
+from .batch import SmellBatch, SMELL_TYPES, SEVERITIES
+
+
+ROOT_DIRECTORY = '.'
+
+
+@dataclass
+class SmellAggregate:
+    file_count: int = 0
+    lines_of_code: int = 0
+    smell_count: int = 0
+    smell_types: Counter = field(default_factory=Counter)
+    severities: Counter = field(default_factory=Counter)
+    metric_sums: Counter = field(default_factory=Counter)
+
+    def add(self, analysis: FileAnalysis, smells: Optional[List[CodeSmell]] = None):
+        if smells is None:
+            smells = analysis.smells
+
+        self.file_count += 1
+        self.lines_of_code += analysis.lines_of_code
+        self.smell_count += len(smells)
+
+        for smell in smells:
+            self.smell_types[smell.smell_type.value] += 1
+            self.severities[smell.severity.value] += 1
+
+        for name, value in analysis.metrics.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.metric_sums[name] += value
+
+    def merge(self, other: 'SmellAggregate') -> 'SmellAggregate':
+        self.file_count += other.file_count
+        self.lines_of_code += other.lines_of_code
+        self.smell_count += other.smell_count
+        self.smell_types.update(other.smell_types)
+        self.severities.update(other.severities)
+        self.metric_sums.update(other.metric_sums)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'files': self.file_count,
+            'lines_of_code': self.lines_of_code,
+            'total_smells': self.smell_count,
+            'smell_types': dict(self.smell_types),
+            'severities': dict(self.severities),
+            'metric_sums': dict(self.metric_sums),
+            'metric_means': {
+                name: total / self.file_count
+                for name, total in self.metric_sums.items()
+            } if self.file_count else {}
+        }
+
+
+class ProjectAggregator:
+    """Builds a project summary incrementally, one FileAnalysis at a time.
+
+    Only per-directory partial aggregates are kept, so memory grows with the
+    number of directories rather than the number of files or smells. Partial
+    aggregators built by separate workers can be combined with ``merge``.
+    """
+
+    def __init__(self, project_path: str):
+        self.project_path = project_path
+        self.directories: Dict[str, SmellAggregate] = {}
+
+    def add(self, analysis: FileAnalysis, smells: Optional[List[CodeSmell]] = None):
+        directory = self._directory_key(analysis.file_path)
+        if directory not in self.directories:
+            self.directories[directory] = SmellAggregate()
+        self.directories[directory].add(analysis, smells)
+
+    def add_batch(self, batch: SmellBatch):
+        """Count the smells of a batch whose files were already added without smells"""
+        for file_path, indices in batch.group_by_file():
+            directory = self._directory_key(file_path)
+            if directory not in self.directories:
+                self.directories[directory] = SmellAggregate()
+            aggregate = self.directories[directory]
+
+            type_counts = np.bincount(batch.smell_types[indices], minlength=len(SMELL_TYPES))
+            severity_counts = np.bincount(batch.severities[indices], minlength=len(SEVERITIES))
+
+            aggregate.smell_count += len(indices)
+            for code in np.flatnonzero(type_counts):
+                aggregate.smell_types[SMELL_TYPES[code].value] += int(type_counts[code])
+            for code in np.flatnonzero(severity_counts):
+                aggregate.severities[SEVERITIES[code].value] += int(severity_counts[code])
+
+    def merge(self, other: 'ProjectAggregator') -> 'ProjectAggregator':
+        for directory, aggregate in other.directories.items():
+            if directory not in self.directories:
+                self.directories[directory] = SmellAggregate()
+            self.directories[directory].merge(aggregate)
+        return self
+
+    def rollup(self) -> Dict[str, SmellAggregate]:
+        """Return aggregates for every directory including all of its descendants"""
+        rolled = {ROOT_DIRECTORY: SmellAggregate()}
+
+        for directory, aggregate in self.directories.items():
+            for ancestor in self._ancestors(directory):
+                if ancestor not in rolled:
+                    rolled[ancestor] = SmellAggregate()
+                rolled[ancestor].merge(aggregate)
+
+        return rolled
+
+    def summary(self) -> Dict[str, Any]:
+        rolled = self.rollup()
+        summary = rolled[ROOT_DIRECTORY].to_dict()
+        summary['directories'] = {
+            directory: aggregate.to_dict()
+            for directory, aggregate in sorted(rolled.items())
+        }
+        return summary
+
+    def to_project_analysis(self) -> ProjectAnalysis:
+        summary = self.summary()
+        return ProjectAnalysis(
+            project_path=self.project_path,
+            files=[],
+            summary=summary,
+            total_smells=summary['total_smells']
+        )
+
+    def _directory_key(self, file_path: str) -> str:
+        directory = Path(file_path).parent
+        try:
+            directory = directory.relative_to(self.project_path)
+        except ValueError:
+            pass
+
+        key = directory.as_posix()
+        return key if key else ROOT_DIRECTORY
+
+    def _ancestors(self, directory: str) -> List[str]:
+        if directory == ROOT_DIRECTORY:
+            return [ROOT_DIRECTORY]
+
+        path = PurePosixPath(directory)
+        ancestors = [directory]
+        ancestors.extend(str(parent) for parent in path.parents)
+        if ROOT_DIRECTORY not in ancestors:
+            ancestors.append(ROOT_DIRECTORY)
+        return ancestors
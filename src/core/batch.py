@@ -0,0 +1,262 @@
+import numpy as np
+from typing import List, Dict, Any, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+from .models import CodeSmell, SmellType, Severity
+
+
+SMELL_TYPES = list(SmellType)
+SEVERITIES = list(Severity)
+
+_SMELL_TYPE_CODES = {smell_type: code for code, smell_type in enumerate(SMELL_TYPES)}
+_SEVERITY_CODES = {severity: code for code, severity in enumerate(SEVERITIES)}
+
+NO_NAME = -1
+
+
+class SmellSpan(NamedTuple):
+    """The type, severity and lines of a batch row, for checks that need no other field"""
+    smell_type: SmellType
+    severity: Severity
+    line_start: int
+    line_end: int
+
+
+class StringTable:
+    """Append-only table mapping strings to dense integer ids"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return NO_NAME
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = len(self.values)
+            self._ids[value] = string_id
+            self.values.append(value)
+        return string_id
+
+    def get(self, string_id: int) -> Optional[str]:
+        return None if string_id == NO_NAME else self.values[string_id]
+
+    def find(self, value: str) -> int:
+        return self._ids.get(value, NO_NAME)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class SmellBatch:
+    """Struct-of-arrays storage for many smells.
+
+    Enum fields are stored as small integer codes (positions in ``SMELL_TYPES``
+    and ``SEVERITIES``) and strings as ids into shared ``StringTable``s, so
+    filtering, sorting and counting are NumPy operations. ``CodeSmell`` objects
+    are only built when rows are read back with ``smell`` or iteration.
+    """
+
+    _numeric_columns = {
+        'smell_types': np.int8,
+        'severities': np.int8,
+        'line_starts': np.int32,
+        'line_ends': np.int32,
+        'column_starts': np.int32,
+        'column_ends': np.int32,
+        'confidences': np.float64,
+        'file_ids': np.int32,
+        'function_ids': np.int32,
+        'class_ids': np.int32,
+        'message_ids': np.int32,
+        'suggestion_ids': np.int32,
+    }
+    _object_columns = ('message_args', 'metrics')
+
+    def __init__(self, capacity: int = 1024, tables: Optional[Dict[str, StringTable]] = None):
+        self._size = 0
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.empty(capacity, dtype=dtype)
+            for name, dtype in self._numeric_columns.items()
+        }
+        for name in self._object_columns:
+            self._columns[name] = np.empty(capacity, dtype=object)
+
+        self.tables = tables if tables is not None else {
+            'files': StringTable(),
+            'names': StringTable(),
+            'messages': StringTable(),
+            'suggestions': StringTable(),
+        }
+
+    @classmethod
+    def from_smells(cls, smells: Iterable[CodeSmell]) -> 'SmellBatch':
+        batch = cls()
+        batch.extend(smells)
+        return batch
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get('_columns')
+        if columns is not None and name in columns:
+            return columns[name][:self._size]
+        raise AttributeError(name)
+
+    def add(self, smell_type: SmellType, severity: Severity, line_start: int, line_end: int,
+            column_start: int, column_end: int, message: str, suggestion: str,
+            confidence: float, file_path: str, function_name: Optional[str] = None,
+            class_name: Optional[str] = None, metrics: Optional[Dict[str, Any]] = None,
+            message_args: Optional[Tuple[Any, ...]] = None):
+        """Append a row from the fields of a ``CodeSmell``, without building one"""
+        if self._size == len(self._columns['file_ids']):
+            self._grow()
+
+        i = self._size
+        columns = self._columns
+        columns['smell_types'][i] = _SMELL_TYPE_CODES[smell_type]
+        columns['severities'][i] = _SEVERITY_CODES[severity]
+        columns['line_starts'][i] = line_start
+        columns['line_ends'][i] = line_end
+        columns['column_starts'][i] = column_start
+        columns['column_ends'][i] = column_end
+        columns['confidences'][i] = confidence
+        columns['file_ids'][i] = self.tables['files'].add(file_path)
+        columns['function_ids'][i] = self.tables['names'].add(function_name)
+        columns['class_ids'][i] = self.tables['names'].add(class_name)
+        columns['message_ids'][i] = self.tables['messages'].add(message)
+        columns['suggestion_ids'][i] = self.tables['suggestions'].add(suggestion)
+        columns['message_args'][i] = message_args or None
+        columns['metrics'][i] = metrics or None
+        self._size += 1
+
+    def append(self, smell: CodeSmell):
+        self.add(
+            smell.smell_type, smell.severity, smell.line_start, smell.line_end,
+            smell.column_start, smell.column_end, smell.message_template, smell.suggestion,
+            smell.confidence, smell.file_path, smell.function_name, smell.class_name,
+            dict(smell.metrics), smell.message_args
+        )
+
+    def extend(self, smells: Iterable[CodeSmell]):
+        for smell in smells:
+            self.append(smell)
+
+    def truncate(self, length: int):
+        """Drop every row from ``length`` onwards, e.g. after a failed file"""
+        self._size = min(self._size, max(0, length))
+
+    def smell(self, index: int) -> CodeSmell:
+        columns = self._columns
+        names = self.tables['names']
+        return CodeSmell(
+            smell_type=SMELL_TYPES[columns['smell_types'][index]],
+            severity=SEVERITIES[columns['severities'][index]],
+            line_start=int(columns['line_starts'][index]),
+            line_end=int(columns['line_ends'][index]),
+            column_start=int(columns['column_starts'][index]),
+            column_end=int(columns['column_ends'][index]),
+            message=self.tables['messages'].get(columns['message_ids'][index]),
+            message_args=columns['message_args'][index],
+            suggestion=self.tables['suggestions'].get(columns['suggestion_ids'][index]),
+            confidence=float(columns['confidences'][index]),
+            file_path=self.tables['files'].get(columns['file_ids'][index]),
+            function_name=names.get(columns['function_ids'][index]),
+            class_name=names.get(columns['class_ids'][index]),
+            metrics=columns['metrics'][index]
+        )
+
+    def __iter__(self) -> Iterator[CodeSmell]:
+        for index in range(self._size):
+            yield self.smell(index)
+
+    def to_smells(self, indices: Optional[Iterable[int]] = None) -> List[CodeSmell]:
+        if indices is None:
+            indices = range(self._size)
+        return [self.smell(int(index)) for index in indices]
+
+    def spans(self, start: int = 0, stop: Optional[int] = None) -> List[SmellSpan]:
+        """Type, severity and lines of rows ``start`` to ``stop``, e.g. rule smells to merge ML ones against"""
+        rows = slice(start, self._size if stop is None else stop)
+        return [
+            SmellSpan(SMELL_TYPES[smell_type], SEVERITIES[severity], int(line_start), int(line_end))
+            for smell_type, severity, line_start, line_end in zip(
+                self._columns['smell_types'][rows], self._columns['severities'][rows],
+                self._columns['line_starts'][rows], self._columns['line_ends'][rows]
+            )
+        ]
+
+    def file_path(self, index: int) -> str:
+        return self.tables['files'].get(self._columns['file_ids'][index])
+
+    def mask(self, severity: Union[Severity, str, None] = None,
+             smell_type: Union[SmellType, str, None] = None) -> np.ndarray:
+        keep = np.ones(self._size, dtype=bool)
+        if severity is not None:
+            keep &= self.severities == _code_for(Severity, _SEVERITY_CODES, severity)
+        if smell_type is not None:
+            keep &= self.smell_types == _code_for(SmellType, _SMELL_TYPE_CODES, smell_type)
+        return keep
+
+    def filter(self, severity: Union[Severity, str, None] = None,
+               smell_type: Union[SmellType, str, None] = None) -> 'SmellBatch':
+        if severity is None and smell_type is None:
+            return self
+        return self.take(np.flatnonzero(self.mask(severity, smell_type)))
+
+    def take(self, indices: Union[np.ndarray, slice]) -> 'SmellBatch':
+        """Return a new batch holding the selected rows; string tables are shared"""
+        selected = {name: values[:self._size][indices] for name, values in self._columns.items()}
+        batch = SmellBatch(capacity=0, tables=self.tables)
+        batch._columns = {name: np.array(values, copy=True) for name, values in selected.items()}
+        batch._size = len(batch._columns['file_ids'])
+        return batch
+
+    def argsort(self, keys: Tuple[str, ...] = ('file_ids', 'line_starts')) -> np.ndarray:
+        """Stable sort order by the given columns, first key most significant"""
+        return np.lexsort(tuple(getattr(self, key) for key in reversed(keys)))
+
+    def sort(self, keys: Tuple[str, ...] = ('file_ids', 'line_starts')) -> 'SmellBatch':
+        return self.take(self.argsort(keys))
+
+    def count_by_type(self) -> Dict[SmellType, int]:
+        counts = np.bincount(self.smell_types, minlength=len(SMELL_TYPES))
+        return {SMELL_TYPES[code]: int(count) for code, count in enumerate(counts) if count}
+
+    def count_by_severity(self) -> Dict[Severity, int]:
+        counts = np.bincount(self.severities, minlength=len(SEVERITIES))
+        return {SEVERITIES[code]: int(count) for code, count in enumerate(counts) if count}
+
+    def count_by_file(self) -> Dict[str, int]:
+        counts = np.bincount(self.file_ids, minlength=len(self.tables['files']))
+        files = self.tables['files']
+        return {files.get(file_id): int(count) for file_id, count in enumerate(counts) if count}
+
+    def group_by_file(self) -> Iterator[Tuple[str, np.ndarray]]:
+        """Yield (file_path, row indices) per file, in order of first appearance"""
+        if not self._size:
+            return
+        order = np.argsort(self.file_ids, kind='stable')
+        file_ids = self.file_ids[order]
+        boundaries = np.flatnonzero(np.diff(file_ids)) + 1
+        groups = np.split(order, boundaries)
+        groups.sort(key=lambda group: group[0])
+        for group in groups:
+            yield self.file_path(group[0]), group
+
+    def _grow(self):
+        capacity = max(16, 2 * len(self._columns['file_ids']))
+        for name, values in self._columns.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[:self._size] = values[:self._size]
+            self._columns[name] = grown
+
+
+def _code_for(enum_class, codes: Dict[Any, int], value) -> int:
+    if not isinstance(value, enum_class):
+        try:
+            value = enum_class(value)
+        except ValueError:
+            return -1
+    return codes[value]
@@ -1,5 +1,7 @@
+import sys
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 from enum import Enum
 
 
@@ -23,25 +25,101 @@ class Severity(Enum):
     CRITICAL = "critical"
 
 
-@dataclass
+_EMPTY_METRICS = MappingProxyType({})
+
+
 class CodeSmell:
-    smell_type: SmellType
-    severity: Severity
-    line_start: int
-    line_end: int
-    column_start: int
-    column_end: int
-    message: str
-    suggestion: str
-    confidence: float
-    file_path: str
-    function_name: Optional[str] = None
-    class_name: Optional[str] = None
-    metrics: Dict[str, Any] = None
+    """A single detected smell.
 
-    def __post_init__(self):
-        if self.metrics is None:
-            self.metrics = {}
+    Instances are slotted and share interned strings for paths, suggestions and
+    message templates, since large projects produce millions of them. When
+    ``message_args`` is given, ``message`` is a ``str.format`` template that is
+    only rendered when the message is read. Empty metrics are not allocated;
+    the ``metrics`` of such a smell is a shared read-only empty mapping.
+    """
+
+    __slots__ = (
+        'smell_type', 'severity', 'line_start', 'line_end', 'column_start', 'column_end',
+        '_message', '_message_args', 'suggestion', 'confidence', 'file_path',
+        'function_name', 'class_name', '_metrics'
+    )
+
+    _fields = (
+        'smell_type', 'severity', 'line_start', 'line_end', 'column_start', 'column_end',
+        'message', 'suggestion', 'confidence', 'file_path', 'function_name', 'class_name', 'metrics'
+    )
+
+    def __init__(self, smell_type: SmellType, severity: Severity, line_start: int, line_end: int,
+                 column_start: int, column_end: int, message: str, suggestion: str,
+                 confidence: float, file_path: str, function_name: Optional[str] = None,
+                 class_name: Optional[str] = None, metrics: Optional[Dict[str, Any]] = None,
+                 message_args: Optional[Tuple[Any, ...]] = None):
+        self.smell_type = smell_type
+        self.severity = severity
+        self.line_start = line_start
+        self.line_end = line_end
+        self.column_start = column_start
+        self.column_end = column_end
+        self._message = _intern(message) if message_args else message
+        self._message_args = message_args or None
+        self.suggestion = _intern(suggestion)
+        self.confidence = confidence
+        self.file_path = _intern(file_path)
+        self.function_name = function_name
+        self.class_name = class_name
+        self._metrics = metrics or None
+
+    @property
+    def message(self) -> str:
+        if self._message_args is None:
+            return self._message
+        return self._message.format(*self._message_args)
+
+    @message.setter
+    def message(self, value: str):
+        self._message = value
+        self._message_args = None
+
+    @property
+    def message_template(self) -> str:
+        return self._message
+
+    @property
+    def message_args(self) -> Tuple[Any, ...]:
+        return self._message_args or ()
+
+    @property
+    def metrics(self) -> Mapping[str, Any]:
+        if self._metrics is None:
+            return _EMPTY_METRICS
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, value: Optional[Dict[str, Any]]):
+        self._metrics = value or None
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._astuple() == other._astuple()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{self.__class__.__name__}({fields})"
+
+    def _astuple(self) -> Tuple[Any, ...]:
+        return tuple(
+            dict(self.metrics) if name == 'metrics' else getattr(self, name)
+            for name in self._fields
+        )
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    if type(value) is str:
+        return sys.intern(value)
+    return value
 
 
 @dataclass
@@ -67,7 +145,8 @@ class ProjectAnalysis:
     def __post_init__(self):
         if self.summary is None:
             self.summary = {}
-        self.total_smells = sum(len(file.smells) for file in self.files)
+        if self.files:
+            self.total_smells = sum(len(file.smells) for file in self.files)
 
 
 @dataclass
@@ -3,6 +3,7 @@ import ast
 from pathlib import Path
 
 from ..core.models import CodeSmell, SmellType, Severity, FileAnalysis
+from ..core.batch import SmellBatch
 from ..parsers.base_parser import PythonParser
 
 
@@ -21,6 +22,13 @@ class SmellDetector:
         ]
     
     def detect_smells(self, file_path: str) -> FileAnalysis:
+        batch = SmellBatch()
+        analysis = self.detect_into(file_path, batch)
+        analysis.smells.extend(batch)
+        return analysis
+    
+    def detect_into(self, file_path: str, batch: SmellBatch) -> FileAnalysis:
+        """Append the smells of a file to a batch; the returned analysis holds no smells"""
         parser = self._get_parser(file_path)
         if not parser:
             return FileAnalysis(file_path, 'unknown', 0, [], {})
@@ -32,8 +40,7 @@ class SmellDetector:
         
         for rule in self.rules:
             if rule.supports_language(analysis.language):
-                smells = rule.detect(tree, file_path, content)
-                analysis.smells.extend(smells)
+                rule.detect_into(tree, file_path, content, batch)
         
         return analysis
     
@@ -52,6 +59,12 @@ class SmellRule:
         return language in self.supported_languages
     
     def detect(self, tree: ast.AST, file_path: str, content: str) -> List[CodeSmell]:
+        batch = SmellBatch()
+        self.detect_into(tree, file_path, content, batch)
+        return batch.to_smells()
+    
+    def detect_into(self, tree: ast.AST, file_path: str, content: str, batch: SmellBatch):
+        """Append each smell's field values to ``batch`` as a row, without building CodeSmells"""
         raise NotImplementedError
 
 
@@ -61,9 +74,7 @@ class LongMethodRule(SmellRule):
         self.supported_languages = ['python']
         self.max_lines = 30
     
-    def detect(self, tree: ast.AST, file_path: str, content: str) -> List[CodeSmell]:
-        smells = []
-        
+    def detect_into(self, tree: ast.AST, file_path: str, content: str, batch: SmellBatch):
         for node in ast.walk(tree):
             if isinstance(node, ast.FunctionDef):
                 if node.end_lineno and node.lineno:
@@ -72,22 +83,21 @@ class LongMethodRule(SmellRule):
                         severity = Severity.HIGH if method_length > 50 else Severity.MEDIUM
                         confidence = min(0.9, (method_length - self.max_lines) / self.max_lines)
                         
-                        smells.append(CodeSmell(
+                        batch.add(
                             smell_type=SmellType.LONG_METHOD,
                             severity=severity,
                             line_start=node.lineno,
                             line_end=node.end_lineno,
                             column_start=node.col_offset,
                             column_end=node.end_col_offset or 0,
-                            message=f"Method '{node.name}' is too long ({method_length} lines)",
-                            suggestion=f"Consider breaking this method into smaller functions",
+                            message="Method '{}' is too long ({} lines)",
+                            message_args=(node.name, method_length),
+                            suggestion="Consider breaking this method into smaller functions",
                             confidence=confidence,
                             file_path=file_path,
                             function_name=node.name,
                             metrics={'method_length': method_length}
-                        ))
-        
-        return smells
+                        )
 
 
 class ComplexConditionalRule(SmellRule):
@@ -96,9 +106,7 @@ class ComplexConditionalRule(SmellRule):
         self.supported_languages = ['python']
         self.max_conditions = 3
     
-    def detect(self, tree: ast.AST, file_path: str, content: str) -> List[CodeSmell]:
-        smells = []
-        
+    def detect_into(self, tree: ast.AST, file_path: str, content: str, batch: SmellBatch):
         for node in ast.walk(tree):
             if isinstance(node, ast.If):
                 condition_count = self._count_conditions(node.test)
@@ -106,21 +114,20 @@ class ComplexConditionalRule(SmellRule):
                     severity = Severity.HIGH if condition_count > 6 else Severity.MEDIUM
                     confidence = min(0.9, (condition_count - self.max_conditions) / self.max_conditions)
                     
-                    smells.append(CodeSmell(
+                    batch.add(
                         smell_type=SmellType.COMPLEX_CONDITIONAL,
                         severity=severity,
                         line_start=node.lineno,
                         line_end=node.end_lineno or node.lineno,
                         column_start=node.col_offset,
                         column_end=node.end_col_offset or 0,
-                        message=f"Complex conditional with {condition_count} conditions",
+                        message="Complex conditional with {} conditions",
+                        message_args=(condition_count,),
                         suggestion="Consider extracting conditions into separate variables or methods",
                         confidence=confidence,
                         file_path=file_path,
                         metrics={'condition_count': condition_count}
-                    ))
-        
-        return smells
+                    )
     
     def _count_conditions(self, node: ast.AST) -> int:
         if isinstance(node, ast.BoolOp):
@@ -137,9 +144,7 @@ class HighComplexityRule(SmellRule):
         self.supported_languages = ['python']
         self.max_complexity = 10
     
-    def detect(self, tree: ast.AST, file_path: str, content: str) -> List[CodeSmell]:
-        smells = []
-        
+    def detect_into(self, tree: ast.AST, file_path: str, content: str, batch: SmellBatch):
         for node in ast.walk(tree):
             if isinstance(node, ast.FunctionDef):
                 complexity = self._calculate_complexity(node)
@@ -147,22 +152,21 @@ class HighComplexityRule(SmellRule):
                     severity = Severity.HIGH if complexity > 20 else Severity.MEDIUM
                     confidence = min(0.9, (complexity - self.max_complexity) / self.max_complexity)
                     
-                    smells.append(CodeSmell(
+                    batch.add(
                         smell_type=SmellType.HIGH_COMPLEXITY,
                         severity=severity,
                         line_start=node.lineno,
                         line_end=node.end_lineno or node.lineno,
                         column_start=node.col_offset,
                         column_end=node.end_col_offset or 0,
-                        message=f"Function '{node.name}' has high cyclomatic complexity ({complexity})",
+                        message="Function '{}' has high cyclomatic complexity ({})",
+                        message_args=(node.name, complexity),
                         suggestion="Consider refactoring to reduce complexity",
                         confidence=confidence,
                         file_path=file_path,
                         function_name=node.name,
                         metrics={'cyclomatic_complexity': complexity}
-                    ))
-        
-        return smells
+                    )
     
     def _calculate_complexity(self, node: ast.FunctionDef) -> int:
         complexity = 1
@@ -178,27 +182,24 @@ class PoorNamingRule(SmellRule):
         self.supported_languages = ['python']
         self.min_length = 3
     
-    def detect(self, tree: ast.AST, file_path: str, content: str) -> List[CodeSmell]:
-        smells = []
-        
+    def detect_into(self, tree: ast.AST, file_path: str, content: str, batch: SmellBatch):
         for node in ast.walk(tree):
             if isinstance(node, ast.FunctionDef):
                 if len(node.name) < self.min_length or node.name.lower() in ['foo', 'bar', 'baz', 'temp', 'tmp']:
-                    smells.append(CodeSmell(
+                    batch.add(
                         smell_type=SmellType.POOR_NAMING,
                         severity=Severity.MEDIUM,
                         line_start=node.lineno,
                         line_end=node.lineno,
                         column_start=node.col_offset,
                         column_end=node.col_offset + len(node.name),
-                        message=f"Poor function name: '{node.name}'",
+                        message="Poor function name: '{}'",
+                        message_args=(node.name,),
                         suggestion="Use descriptive names that explain what the function does",
                         confidence=0.8,
                         file_path=file_path,
                         function_name=node.name
-                    ))
-        
-        return smells
+                    )
 
 
 class LargeClassRule(SmellRule):
@@ -207,9 +208,7 @@ class LargeClassRule(SmellRule):
         self.supported_languages = ['python']
         self.max_methods = 20
     
-    def detect(self, tree: ast.AST, file_path: str, content: str) -> List[CodeSmell]:
-        smells = []
-        
+    def detect_into(self, tree: ast.AST, file_path: str, content: str, batch: SmellBatch):
         for node in ast.walk(tree):
             if isinstance(node, ast.ClassDef):
                 method_count = len([n for n in node.body if isinstance(n, ast.FunctionDef)])
@@ -217,22 +216,21 @@ class LargeClassRule(SmellRule):
                     severity = Severity.HIGH if method_count > 30 else Severity.MEDIUM
                     confidence = min(0.9, (method_count - self.max_methods) / self.max_methods)
                     
-                    smells.append(CodeSmell(
+                    batch.add(
                         smell_type=SmellType.LARGE_CLASS,
                         severity=severity,
                         line_start=node.lineno,
                         line_end=node.end_lineno or node.lineno,
                         column_start=node.col_offset,
                         column_end=node.end_col_offset or 0,
-                        message=f"Class '{node.name}' has too many methods ({method_count})",
+                        message="Class '{}' has too many methods ({})",
+                        message_args=(node.name, method_count),
                         suggestion="Consider splitting into smaller, more focused classes",
                         confidence=confidence,
                         file_path=file_path,
                         class_name=node.name,
                         metrics={'method_count': method_count}
-                    ))
-        
-        return smells
+                    )
 
 
 class DeadCodeRule(SmellRule):
@@ -240,13 +238,11 @@ class DeadCodeRule(SmellRule):
         super().__init__()
         self.supported_languages = ['python']
     
-    def detect(self, tree: ast.AST, file_path: str, content: str) -> List[CodeSmell]:
-        smells = []
-        
+    def detect_into(self, tree: ast.AST, file_path: str, content: str, batch: SmellBatch):
         for node in ast.walk(tree):
             if isinstance(node, ast.If):
                 if isinstance(node.test, ast.Constant) and not node.test.value:
-                    smells.append(CodeSmell(
+                    batch.add(
                         smell_type=SmellType.DEAD_CODE,
                         severity=Severity.MEDIUM,
                         line_start=node.lineno,
@@ -257,6 +253,4 @@ class DeadCodeRule(SmellRule):
                         suggestion="Remove this unreachable code",
                         confidence=0.95,
                         file_path=file_path
-                    ))
-        
-        return smells
\ No newline at end of file
+                    )
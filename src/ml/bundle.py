@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import joblib
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Optional
+
+
+MODEL_FORMAT_VERSION = 3
+MANIFEST_FILE = 'model_info.json'
+
+
+class LazyArtifacts(dict):
+    """A dict of joblib artifacts that are only loaded when first looked up.
+
+    Files are registered by key and read on first access with ``mmap_mode``.
+    Only plain NumPy arrays inside them, such as linear coefficients, are
+    memory-mapped; tree ensembles are copied into memory because sklearn's
+    ``Tree`` copies its node arrays when unpickled. For mapped tree arrays
+    shared between processes, load compiled ensembles instead (see
+    ``CompiledEnsemble.load``). Membership tests never load a file; for
+    registered files whose existence was not guaranteed by the manifest, the
+    first test checks the path once.
+    """
+
+    def __init__(self, mmap_mode: Optional[str] = 'r', on_load: Optional[Callable[[Any], Any]] = None):
+        super().__init__()
+        self.mmap_mode = mmap_mode
+        self.on_load = on_load
+        self._paths: Dict[Any, str] = {}
+        self._verified: Dict[Any, bool] = {}
+
+    def register(self, key, path: str, verified: bool = True):
+        self._paths[key] = path
+        self._verified[key] = verified
+
+    def discard(self, key):
+        """Forget ``key``, whether it was loaded or only registered"""
+        self.pop(key, None)
+        self._paths.pop(key, None)
+        self._verified.pop(key, None)
+
+    def load_all(self):
+        """Load every registered artifact that exists"""
+        for key in list(self._paths):
+            if key in self:
+                self[key]
+
+    def is_loaded(self, key) -> bool:
+        return dict.__contains__(self, key)
+
+    def path(self, key) -> Optional[str]:
+        return self._paths.get(key)
+
+    def __contains__(self, key) -> bool:
+        if dict.__contains__(self, key):
+            return True
+        if key not in self._paths:
+            return False
+        if not self._verified[key]:
+            if not Path(self._paths[key]).exists():
+                del self._paths[key]
+                return False
+            self._verified[key] = True
+        return True
+
+    def __missing__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        value = load_artifact(self._paths[key], self.mmap_mode)
+        if self.on_load is not None:
+            value = self.on_load(value)
+        self[key] = value
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+
+def load_artifact(path: str, mmap_mode: Optional[str] = 'r'):
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+def dump_artifact(value, path: str):
+    """Write an artifact through a temporary file and an atomic rename.
+
+    Readers that memory-mapped the previous file keep a valid mapping, so a
+    bundle can be rewritten in place while it is loaded.
+    """
+    temporary = f"{path}.tmp"
+    joblib.dump(value, temporary)
+    os.replace(temporary, path)
+
+
+def read_manifest(model_path: str) -> Dict[str, Any]:
+    with open(Path(model_path) / MANIFEST_FILE, 'r') as f:
+        manifest = json.load(f)
+    manifest.setdefault('format_version', 1)
+    if manifest['format_version'] > MODEL_FORMAT_VERSION:
+        raise ValueError(
+            f"Model format version {manifest['format_version']} is newer than supported "
+            f"version {MODEL_FORMAT_VERSION}"
+        )
+    return manifest
+
+
+def validate_feature_names(manifest: Dict[str, Any], feature_names: List[str]):
+    stored = manifest.get('feature_names')
+    if stored is not None and list(stored) != list(feature_names):
+        missing = sorted(set(feature_names) - set(stored))
+        extra = sorted(set(stored) - set(feature_names))
+        raise ValueError(
+            "Model feature schema does not match the feature extractor "
+            f"(missing from model: {missing}, unknown to extractor: {extra}, "
+            "or a different order)"
+        )
+
+
+def write_manifest(model_path: str, manifest: Dict[str, Any]):
+    Path(model_path).mkdir(parents=True, exist_ok=True)
+    temporary = Path(model_path) / f"{MANIFEST_FILE}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temporary, Path(model_path) / MANIFEST_FILE)
+
+
+def bundle_digest(model_path: str) -> str:
+    """Fingerprint of a bundle's manifest and the size and mtime of every file in it"""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in sorted(Path(model_path).iterdir()):
+        if path.is_file():
+            stat = path.stat()
+            digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    digest.update((Path(model_path) / MANIFEST_FILE).read_bytes())
+    return digest.hexdigest()
@@ -0,0 +1,113 @@
+import time
+from dataclasses import dataclass, asdict, fields
+from typing import List, Dict, Any, Union
+
+from ..core.models import CodeSmell, Severity, SmellType
+from ..core.batch import SmellSpan
+from .feature_extractor import CodeUnit, MODULE, FUNCTION, CLASS
+from .localization import CLASS_SMELLS, localize_smells, merge_predictions
+
+
+# A rule smell at these severities settles its type for the units it covers
+DECISIVE_SEVERITIES = frozenset({Severity.HIGH, Severity.CRITICAL})
+
+
+@dataclass
+class CascadeStats:
+    """What the cascade sent to the model and what it settled from rule results.
+
+    A check is one (file, smell type) pair; rows are the module, function and
+    class feature vectors of the files that were scored.
+    """
+    files: int = 0
+    files_skipped: int = 0
+    checks: int = 0
+    checks_skipped: int = 0
+    rows: int = 0
+    rows_skipped: int = 0
+    inference_seconds: float = 0.0
+
+    @property
+    def skip_rate(self) -> float:
+        return self.checks_skipped / self.checks if self.checks else 0.0
+
+    def estimated_speedup(self, elapsed_seconds: float) -> float:
+        """End-to-end speed-up over scoring every check, at the measured cost per check"""
+        scored = self.checks - self.checks_skipped
+        if not scored or elapsed_seconds <= 0:
+            return 1.0
+        saved = self.checks_skipped * self.inference_seconds / scored
+        return (elapsed_seconds + saved) / elapsed_seconds
+
+    def merge(self, other: 'CascadeStats'):
+        """Add the counts of another run, e.g. one from a worker process"""
+        for field in fields(self):
+            setattr(self, field.name, getattr(self, field.name) + getattr(other, field.name))
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result['skip_rate'] = self.skip_rate
+        return result
+
+
+class InferenceCascade:
+    """Runs ML inference only where rule results leave a smell undecided.
+
+    A file without functions or classes is settled as clean. A smell type is
+    settled as present when a rule reports it at high severity or above on
+    every unit its prediction could be placed on, since the prediction would
+    then overlap a rule smell and be merged away. The remaining smell types
+    are scored in one call, on the module row and the function rows and/or
+    class rows they need, so their predictions match full inference.
+    """
+
+    def __init__(self, predictor):
+        self.predictor = predictor
+        self.stats = CascadeStats()
+
+    def predict(self, file_path: str, rule_smells: List[Union[CodeSmell, SmellSpan]]) -> List[CodeSmell]:
+        """ML smells of a file that are not already reported by ``rule_smells``"""
+        smell_types = self.predictor.scored_smells()
+        units, features = self.predictor.feature_extractor.extract_unit_features(file_path)
+
+        self.stats.files += 1
+        self.stats.checks += len(smell_types)
+        self.stats.rows += len(units)
+
+        decisive = [smell for smell in rule_smells if smell.severity in DECISIVE_SEVERITIES]
+        remaining = [smell_type for smell_type in smell_types if not _settled(smell_type, units, decisive)]
+
+        if len(units) == 1 or not remaining:
+            self.stats.files_skipped += 1
+            self.stats.checks_skipped += len(smell_types)
+            self.stats.rows_skipped += len(units)
+            return []
+
+        self.stats.checks_skipped += len(smell_types) - len(remaining)
+
+        kinds = {MODULE}
+        kinds.update(CLASS if smell_type in CLASS_SMELLS else FUNCTION for smell_type in remaining)
+        rows = [row for row, unit in enumerate(units) if unit.kind in kinds]
+        self.stats.rows_skipped += len(units) - len(rows)
+
+        start = time.perf_counter()
+        scores = self.predictor.score_features(features[rows], smell_types=remaining)
+        self.stats.inference_seconds += time.perf_counter() - start
+
+        predicted = localize_smells(self.predictor, file_path, [units[row] for row in rows], scores)
+        return merge_predictions(rule_smells, predicted)
+
+
+def _settled(smell_type: SmellType, units: List[CodeUnit], decisive: List[Union[CodeSmell, SmellSpan]]) -> bool:
+    """Whether every unit a prediction of ``smell_type`` could be placed on overlaps a decisive rule smell"""
+    spans = [(smell.line_start, smell.line_end) for smell in decisive if smell.smell_type == smell_type]
+    if not spans:
+        return False
+
+    kind = CLASS if smell_type in CLASS_SMELLS else FUNCTION
+    # Without such units the prediction falls back to the module, which overlaps every smell
+    candidates = [unit for unit in units if unit.kind == kind]
+    return all(
+        any(start <= unit.line_end and unit.line_start <= end for start, end in spans)
+        for unit in candidates
+    )
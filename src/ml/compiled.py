@@ -0,0 +1,344 @@
+import json
+import math
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from ..core.models import SmellType
+from .feature_extractor import FeatureExtractor
+
+
+COMPILED_FORMAT_VERSION = 1
+DEFAULT_THRESHOLD = 0.5
+
+FOREST = 'forest'
+BOOSTING = 'boosting'
+
+
+class CompiledEnsemble:
+    """A tree ensemble flattened into NumPy arrays.
+
+    All trees share one set of node arrays; ``roots`` holds the index of each
+    tree's root node. Leaves loop back to themselves, so evaluation walks every
+    (sample, tree) pair down ``max_depth`` levels with plain array indexing.
+    ``values`` holds, per node and output, the positive-class probability for
+    forests or the raw regression value for gradient boosting. The optional
+    ``mean``/``scale`` reproduce a StandardScaler applied before the trees.
+
+    Only NumPy is needed to evaluate, and results match sklearn's
+    ``predict_proba`` for the positive class.
+    """
+
+    _array_fields = ('features', 'thresholds', 'children_left', 'children_right', 'values', 'roots')
+
+    def __init__(self, kind: str, features: np.ndarray, thresholds: np.ndarray,
+                 children_left: np.ndarray, children_right: np.ndarray, values: np.ndarray,
+                 roots: np.ndarray, max_depth: int, n_features: int, base_score: float = 0.0,
+                 learning_rate: float = 1.0, mean: Optional[np.ndarray] = None,
+                 scale: Optional[np.ndarray] = None):
+        self.kind = kind
+        self.features = features
+        self.thresholds = thresholds
+        self.children_left = children_left
+        self.children_right = children_right
+        self.values = values
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.base_score = float(base_score)
+        self.learning_rate = float(learning_rate)
+        self.mean = mean
+        self.scale = scale
+
+    @property
+    def n_outputs(self) -> int:
+        return self.values.shape[1]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: getattr(self, name) for name in self._array_fields}
+        if self.mean is not None:
+            arrays['mean'] = self.mean
+            arrays['scale'] = self.scale
+        return arrays
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            'kind': self.kind,
+            'max_depth': self.max_depth,
+            'n_features': self.n_features,
+            'base_score': self.base_score,
+            'learning_rate': self.learning_rate
+        }
+
+    @classmethod
+    def from_arrays(cls, metadata: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> 'CompiledEnsemble':
+        return cls(
+            metadata['kind'],
+            *(arrays[name] for name in cls._array_fields),
+            max_depth=metadata['max_depth'],
+            n_features=metadata['n_features'],
+            base_score=metadata['base_score'],
+            learning_rate=metadata['learning_rate'],
+            mean=arrays.get('mean'),
+            scale=arrays.get('scale')
+        )
+
+    def save(self, path: str):
+        """Write one raw .npy file per array plus metadata.json into directory ``path``"""
+        Path(path).mkdir(parents=True, exist_ok=True)
+        for name, values in self.arrays().items():
+            np.save(Path(path) / f"{name}.npy", values)
+        with open(Path(path) / 'metadata.json', 'w') as f:
+            json.dump(self.metadata(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> 'CompiledEnsemble':
+        """Load an ensemble directory; arrays are memory-mapped by default"""
+        with open(Path(path) / 'metadata.json', 'r') as f:
+            metadata = json.load(f)
+        arrays = {
+            array_file.stem: np.load(array_file, mmap_mode=mmap_mode, allow_pickle=False)
+            for array_file in Path(path).glob('*.npy')
+        }
+        return cls.from_arrays(metadata, arrays)
+
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node index reached by every sample in every tree"""
+        if hasattr(X, 'toarray'):
+            X = X.toarray()
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        # sklearn evaluates trees on float32 inputs
+        X = X.astype(np.float32)
+
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.features[nodes]] <= self.thresholds[nodes]
+            nodes = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+        return nodes
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Positive-class probability with shape (n_samples, n_outputs)"""
+        leaf_values = self.values[self.leaves(X)]
+        n_trees = len(self.roots)
+
+        # Accumulate tree by tree, in estimator order, as sklearn does
+        if self.kind == FOREST:
+            total = np.zeros((leaf_values.shape[0], self.n_outputs))
+            for tree in range(n_trees):
+                total += leaf_values[:, tree]
+            return total / n_trees
+
+        raw = np.full((leaf_values.shape[0], self.n_outputs), self.base_score)
+        for tree in range(n_trees):
+            raw += self.learning_rate * leaf_values[:, tree]
+        return _sigmoid(raw)
+
+
+def compile_model(model, scaler=None, columns: Optional[List[int]] = None) -> CompiledEnsemble:
+    """Flatten a fitted random forest or binary gradient boosting classifier.
+
+    ``columns`` maps the model's inputs to columns of the full feature vector,
+    for models trained on a feature subset; the ensemble then reads full vectors.
+    """
+    if hasattr(model, 'learning_rate') and hasattr(model, 'init_'):
+        if model.estimators_.shape[1] != 1:
+            raise ValueError("Only binary gradient boosting models can be compiled")
+        trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+        kind = BOOSTING
+        zeros = np.zeros((1, model.n_features_in_), dtype=np.float32)
+        base_score = float(model._raw_predict_init(zeros)[0, 0])
+        learning_rate = model.learning_rate
+        positive_columns = None
+    elif hasattr(model, 'estimators_') and hasattr(model, 'classes_'):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        kind = FOREST
+        base_score = 0.0
+        learning_rate = 1.0
+        classes = model.classes_ if getattr(model, 'n_outputs_', 1) > 1 else [model.classes_]
+        positive_columns = [_positive_column(output_classes) for output_classes in classes]
+    else:
+        raise ValueError(f"Cannot compile model of type {type(model).__name__}")
+
+    features, thresholds, left, right, values, roots = [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        is_leaf = tree.children_left == -1
+        node_ids = np.arange(tree.node_count)
+
+        tree_features = np.where(is_leaf, 0, tree.feature)
+        features.append(tree_features if columns is None else np.asarray(columns)[tree_features])
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+        if kind == FOREST:
+            tree_values = np.zeros((tree.node_count, len(positive_columns)))
+            for output, column in enumerate(positive_columns):
+                if column is not None:
+                    # Before scikit-learn 1.4 node values are weighted class counts, not fractions
+                    totals = tree.value[:, output, :].sum(axis=1)
+                    totals[totals == 0] = 1.0
+                    tree_values[:, output] = tree.value[:, output, column] / totals
+        else:
+            tree_values = tree.value[:, :, 0]
+        values.append(tree_values)
+
+        roots.append(offset)
+        offset += tree.node_count
+
+    mean = None if scaler is None else np.asarray(scaler.mean_, dtype=np.float64)
+    scale = None if scaler is None else np.asarray(scaler.scale_, dtype=np.float64)
+    n_features = model.n_features_in_
+    if columns is not None:
+        n_features = max(columns) + 1
+        if scaler is not None:
+            mean, scale = np.zeros(n_features), np.ones(n_features)
+            mean[columns], scale[columns] = scaler.mean_, scaler.scale_
+
+    return CompiledEnsemble(
+        kind,
+        features=np.concatenate(features).astype(np.int32),
+        thresholds=np.concatenate(thresholds).astype(np.float64),
+        children_left=np.concatenate(left).astype(np.int32),
+        children_right=np.concatenate(right).astype(np.int32),
+        values=np.concatenate(values).astype(np.float64),
+        roots=np.array(roots, dtype=np.int32),
+        max_depth=max(tree.max_depth for tree in trees),
+        n_features=n_features,
+        base_score=base_score,
+        learning_rate=learning_rate,
+        mean=mean,
+        scale=scale
+    )
+
+
+def export_compiled(predictor, output_dir: str) -> Dict[str, Any]:
+    """Compile every tree ensemble of a trained SmellPredictor into ``output_dir``"""
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    smells = {}
+    if predictor.multi_label_model is not None:
+        ensemble = compile_model(predictor.multi_label_model, predictor.multi_label_scaler)
+        ensemble.save(f"{output_dir}/multi_label")
+        for output, smell_type in enumerate(predictor.trained_smells):
+            smells[smell_type.value] = {'path': 'multi_label', 'output': output}
+    else:
+        for smell_type in predictor.trained_smells:
+            if smell_type in predictor.models:
+                ensemble = compile_model(
+                    predictor.models[smell_type], predictor.scalers.get(smell_type),
+                    predictor.feature_columns(smell_type)
+                )
+                ensemble.save(f"{output_dir}/{smell_type.value}")
+                smells[smell_type.value] = {'path': smell_type.value, 'output': 0}
+
+    manifest = {
+        'format': 'compiled',
+        'format_version': COMPILED_FORMAT_VERSION,
+        'model_type': predictor.model_type,
+        'feature_names': predictor.feature_extractor.feature_names,
+        'hash_features': predictor.feature_extractor.hash_features,
+        'feature_subsets': {smell.value: subset for smell, subset in predictor.feature_subsets.items()},
+        'thresholds': {smell.value: threshold for smell, threshold in predictor.thresholds.items()},
+        'smells': smells
+    }
+    with open(f"{output_dir}/model_info.json", 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+class CompiledPredictor:
+    """Scores files with compiled ensembles; a drop-in for SmellPredictor inference.
+
+    Ensembles are loaded, memory-mapped, the first time their smell type is scored.
+    """
+
+    def __init__(self):
+        self.thresholds: Dict[SmellType, float] = {}
+        self.trained_smells: List[SmellType] = []
+        self.feature_extractor = FeatureExtractor()
+        self._model_path = None
+        self._entries: Dict[SmellType, Tuple[str, int]] = {}
+        self._ensembles: Dict[str, CompiledEnsemble] = {}
+
+    def load_model(self, model_path: str):
+        with open(f"{model_path}/model_info.json", 'r') as f:
+            manifest = json.load(f)
+
+        if manifest.get('format') != 'compiled':
+            raise ValueError(f"{model_path} does not contain compiled models")
+        self.feature_extractor = FeatureExtractor(manifest.get('hash_features', 0))
+        if manifest['feature_names'] != self.feature_extractor.feature_names:
+            raise ValueError("Compiled models were built for a different feature set")
+
+        self._model_path = model_path
+        self._ensembles = {}
+        self._entries = {
+            SmellType(smell): (entry['path'], entry['output'])
+            for smell, entry in manifest['smells'].items()
+        }
+        self.trained_smells = list(self._entries)
+        self.thresholds = {
+            SmellType(smell): threshold
+            for smell, threshold in manifest.get('thresholds', {}).items()
+        }
+
+        subsets = manifest.get('feature_subsets', {})
+        if all(smell in subsets for smell in manifest['smells']):
+            self.feature_extractor.select_features(name for subset in subsets.values() for name in subset)
+
+    def ensemble(self, smell_type: SmellType) -> Tuple[CompiledEnsemble, int]:
+        path, output = self._entries[smell_type]
+        if path not in self._ensembles:
+            self._ensembles[path] = CompiledEnsemble.load(f"{self._model_path}/{path}")
+        return self._ensembles[path], output
+
+    def predict(self, file_path: str) -> List[Dict[str, Any]]:
+        return self.predict_batch([file_path])[0]
+
+    def predict_batch(self, file_paths: List[str]) -> List[List[Dict[str, Any]]]:
+        return self.predict_features(self.feature_extractor.extract_features_batch(file_paths))
+
+    def predict_features(self, features: np.ndarray) -> List[List[Dict[str, Any]]]:
+        if not hasattr(features, 'toarray'):
+            features = np.atleast_2d(features)
+        predictions = [[] for _ in range(features.shape[0])]
+
+        if not features.shape[0]:
+            return predictions
+
+        probabilities = {}
+        for smell_type in self.trained_smells:
+            ensemble, output = self.ensemble(smell_type)
+            if id(ensemble) not in probabilities:
+                probabilities[id(ensemble)] = ensemble.predict_proba(features)
+            scores = probabilities[id(ensemble)][:, output]
+            threshold = self.thresholds.get(smell_type, DEFAULT_THRESHOLD)
+
+            for row in np.flatnonzero(scores >= threshold):
+                probability = float(scores[row])
+                predictions[row].append({
+                    'smell_type': smell_type,
+                    'probability': probability,
+                    'confidence': probability,
+                    'threshold': threshold,
+                    'features': self.feature_extractor.named_values(features, row),
+                    'feature_names': self.feature_extractor.feature_names
+                })
+
+        return predictions
+
+
+def _sigmoid(raw: np.ndarray) -> np.ndarray:
+    # math.exp is the libm exp behind scipy's expit; np.exp can differ in the last bit
+    exp = np.frompyfunc(math.exp, 1, 1)
+    return 1 / (1 + exp(-raw).astype(np.float64))
+
+
+def _positive_column(classes) -> Optional[int]:
+    classes = list(classes)
+    return classes.index(1) if 1 in classes else None
@@ -0,0 +1,135 @@
+import copy
+import numpy as np
+from typing import List, Dict, Any, Tuple
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.tree import DecisionTreeClassifier
+
+from ..core.models import SmellType, CodeSmell
+from .evaluation import measure_latency, model_size
+from .model import SmellPredictor, DEFAULT_THRESHOLD, _group_split
+
+
+PRUNED_ESTIMATORS = (5, 10, 25, 50)
+DISTILLED_LEAVES = (8, 16, 32, 64)
+DISTILLED_FOREST_SIZE = 10
+
+
+def prune_estimators(model, n_estimators: int):
+    """Keep only the first ``n_estimators`` trees or boosting stages of an ensemble"""
+    pruned = copy.copy(model)
+    pruned.estimators_ = model.estimators_[:n_estimators]
+    pruned.n_estimators = n_estimators
+    if hasattr(model, 'n_estimators_'):
+        pruned.n_estimators_ = n_estimators
+    if hasattr(model, 'train_score_'):
+        pruned.train_score_ = model.train_score_[:n_estimators]
+    return pruned
+
+
+def compression_candidates(model, X_train: np.ndarray, threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[str, Any]]:
+    """Smaller stand-ins for a fitted model.
+
+    Ensembles are pruned to their first trees or stages. Leaf-limited trees and
+    small forests are distilled from the model's own predictions on the
+    training split, positive where its score reaches ``threshold`` as at
+    inference, so they learn its decision surface rather than the labels.
+    """
+    candidates = []
+
+    n_estimators = len(getattr(model, 'estimators_', []))
+    for size in PRUNED_ESTIMATORS:
+        if size < n_estimators:
+            candidates.append((f"pruned_{size}", prune_estimators(model, size)))
+
+    positive_column = list(model.classes_).index(1)
+    teacher_labels = (model.predict_proba(X_train)[:, positive_column] >= threshold).astype(int)
+    if len(np.unique(teacher_labels)) < 2:
+        return candidates
+
+    for leaves in DISTILLED_LEAVES:
+        tree = DecisionTreeClassifier(max_leaf_nodes=leaves, random_state=42).fit(X_train, teacher_labels)
+        candidates.append((f"tree_{leaves}", tree))
+
+        forest = RandomForestClassifier(
+            n_estimators=DISTILLED_FOREST_SIZE, max_leaf_nodes=leaves, random_state=42
+        )
+        candidates.append((f"forest_{DISTILLED_FOREST_SIZE}x{leaves}", forest.fit(X_train, teacher_labels)))
+
+        # Larger leaf budgets would reproduce a tree that already fits the labels
+        if tree.get_n_leaves() < leaves:
+            break
+
+    return candidates
+
+
+def compress_models(predictor: SmellPredictor, training_data: List[Tuple[str, List[CodeSmell]]],
+                    max_accuracy_loss: float = 0.01, repeats: int = 20) -> Dict[str, Any]:
+    """Replace each per-smell model with its smallest candidate within an accuracy loss.
+
+    Candidates are scored on the same samples and held-out split ``train``
+    used, unit rows split by file for ``unit_samples`` bundles and file rows
+    otherwise, so they are compared with the shipped model on data it never
+    saw. A candidate qualifies if its held-out accuracy is at most
+    ``max_accuracy_loss`` below the original's; the one with the smallest
+    pickled size wins, ties going to the lower latency. ``predictor.models`` is
+    updated in place.
+
+    Returns, per smell type, every candidate's accuracy, latency and size
+    (the original listed first as ``original``), the name of the selection and
+    the number of held-out samples they were scored on.
+    """
+    if predictor.multi_label_model is not None:
+        raise ValueError("compress supports per-smell models only")
+
+    groups = None
+    if predictor.unit_samples:
+        X, Y, groups = predictor.prepare_unit_training_matrix(training_data)
+    else:
+        X, Y = predictor.prepare_training_matrix(training_data)
+    smell_columns = {smell_type: column for column, smell_type in enumerate(SmellType)}
+    report = {}
+
+    for smell_type in predictor.trained_smells:
+        if smell_type not in predictor.models:
+            continue
+
+        y = Y[:, smell_columns[smell_type]]
+        if len(np.unique(y)) < 2:
+            continue
+
+        if groups is None:
+            X_train, X_test, _, y_test = predictor.split_training_data(X, y)
+        else:
+            train_rows, test_rows = _group_split(y, groups)
+            X_train, X_test, y_test = X[train_rows], X[test_rows], y[test_rows]
+        X_train_inputs = predictor.model_inputs(smell_type, X_train)
+        X_test_inputs = predictor.model_inputs(smell_type, X_test)
+        threshold = predictor.thresholds.get(smell_type, DEFAULT_THRESHOLD)
+
+        model = predictor.models[smell_type]
+        candidates = [('original', model)] + compression_candidates(model, X_train_inputs, threshold)
+
+        rows = []
+        for name, candidate in candidates:
+            scores = predictor._positive_scores(candidate, X_test_inputs)
+            rows.append({
+                'name': name,
+                'accuracy': accuracy_score(y_test, (scores >= threshold).astype(int)),
+                'latency_ms': measure_latency(candidate.predict_proba, X_test_inputs, repeats),
+                'size_bytes': model_size(candidate)
+            })
+
+        floor = rows[0]['accuracy'] - max_accuracy_loss
+        qualifying = [
+            index for index, row in enumerate(rows) if row['accuracy'] >= floor
+        ]
+        best = min(qualifying, key=lambda index: (rows[index]['size_bytes'], rows[index]['latency_ms']))
+
+        predictor.models[smell_type] = candidates[best][1]
+        report[smell_type.value] = {
+            'candidates': rows, 'selected': rows[best]['name'], 'test_samples': X_test.shape[0]
+        }
+
+    return report
@@ -0,0 +1,83 @@
+import pickle
+import time
+import numpy as np
+from typing import Dict, Any, Callable
+
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score
+
+from ..core.models import SmellType
+from .model import SmellPredictor
+
+
+def measure_latency(score: Callable[[np.ndarray], Any], X: np.ndarray, repeats: int = 20) -> float:
+    """Median wall-clock milliseconds of one scoring call over ``X``"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        score(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def model_size(model) -> int:
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def compare_multi_label(X: np.ndarray, Y: np.ndarray, model_type: str = 'random_forest',
+                        repeats: int = 20) -> Dict[str, Any]:
+    """Train independent per-smell models and one multi-label model on the same split.
+
+    ``Y`` holds one column per SmellType. Returns per-label held-out accuracy for
+    both approaches, and the latency of scoring the whole test split and the
+    pickled size of all models for each.
+    """
+    smell_types = list(SmellType)
+    varied = [column for column in range(Y.shape[1]) if len(np.unique(Y[:, column])) == 2]
+    if not varied:
+        raise ValueError("No smell type varies across the samples")
+    test_size = min(0.2, max(0.1, 2.0 / X.shape[0]))
+    X_train, X_test, Y_train, Y_test = train_test_split(X, Y[:, varied], test_size=test_size, random_state=42)
+
+    factory = SmellPredictor(model_type=model_type)
+
+    independent = []
+    for column in range(len(varied)):
+        if len(np.unique(Y_train[:, column])) < 2:
+            independent.append(None)
+            continue
+        model = factory._create_model()
+        model.fit(X_train, Y_train[:, column])
+        independent.append(model)
+
+    multi_label = factory._create_multi_label_model()
+    multi_label.fit(X_train, Y_train)
+    multi_predictions = np.asarray(multi_label.predict(X_test)).reshape(X_test.shape[0], -1)
+
+    labels = {}
+    for column, model in enumerate(independent):
+        smell_type = smell_types[varied[column]]
+        y_test = Y_test[:, column]
+        independent_predictions = model.predict(X_test) if model is not None else np.zeros_like(y_test)
+        labels[smell_type.value] = {
+            'independent_accuracy': accuracy_score(y_test, independent_predictions),
+            'multi_label_accuracy': accuracy_score(y_test, multi_predictions[:, column])
+        }
+
+    trained = [model for model in independent if model is not None]
+
+    def score_independent(features: np.ndarray):
+        for model in trained:
+            model.predict_proba(features)
+
+    return {
+        'labels': labels,
+        'independent': {
+            'latency_ms': measure_latency(score_independent, X_test, repeats),
+            'size_bytes': sum(model_size(model) for model in trained)
+        },
+        'multi_label': {
+            'latency_ms': measure_latency(multi_label.predict_proba, X_test, repeats),
+            'size_bytes': model_size(multi_label)
+        }
+    }
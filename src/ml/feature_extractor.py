@@ -1,14 +1,67 @@
 import ast
+import os
+import textwrap
+import time
+import zlib
 import numpy as np
-from typing import List, Dict, Any, Tuple
+from dataclasses import dataclass
+from typing import List, Dict, Any, Tuple, Optional, Iterable
 from collections import Counter
 
 from ..core.models import CodeMetrics, FileAnalysis
 from ..parsers.base_parser import PythonParser
 
 
+MODULE = 'module'
+FUNCTION = 'function'
+CLASS = 'class'
+
+# Named features grouped by the pass over the source that computes them
+FEATURE_PASSES = {
+    'lines': ('lines_of_code', 'avg_line_length', 'max_line_length', 'empty_line_ratio'),
+    'comments': ('comment_ratio',),
+    'structure': (
+        'cyclomatic_complexity', 'nesting_depth', 'parameter_count', 'variable_count', 'method_count',
+        'class_count', 'import_count', 'function_call_count', 'loop_count', 'conditional_count',
+        'exception_handler_count', 'decorator_count', 'lambda_count', 'comprehension_count',
+        'yield_count', 'return_count', 'assignment_count'
+    ),
+    'lexical': (
+        'string_literal_count', 'numeric_literal_count', 'boolean_literal_count',
+        'comparison_count', 'arithmetic_op_count', 'logical_op_count'
+    ),
+    'indentation': ('indentation_inconsistency',),
+    'duplicates': ('duplicate_line_ratio',)
+}
+
+
+@dataclass
+class CodeUnit:
+    """A module, function or class whose source span gets its own feature vector"""
+    kind: str
+    name: str
+    line_start: int
+    line_end: int
+    column_start: int = 0
+    column_end: int = 0
+    class_name: Optional[str] = None
+
+
 class FeatureExtractor:
-    def __init__(self):
+    """Per-file and per-unit feature vectors.
+
+    With ``hash_features`` > 0, model inputs also carry that many hashed AST
+    n-gram columns after the named features and are returned as CSR sparse
+    matrices; the n-grams are counted in the same traversal as the structural
+    metrics.
+
+    ``select_features`` limits extraction to the passes that compute a given
+    set of features; the others are left at zero.
+    """
+    
+    def __init__(self, hash_features: int = 0):
+        self.hash_features = hash_features
+        self.active_passes = tuple(FEATURE_PASSES)
         self.feature_names = [
             'lines_of_code',
             'cyclomatic_complexity',
@@ -42,7 +95,46 @@ class FeatureExtractor:
             'duplicate_line_ratio'
         ]
     
+    @property
+    def n_features(self) -> int:
+        """Width of a model input row: the named features plus any hashed columns"""
+        return len(self.feature_names) + self.hash_features
+    
+    def select_features(self, feature_names: Optional[Iterable[str]] = None):
+        """Compute only the passes behind ``feature_names``; None restores every pass"""
+        if feature_names is None:
+            self.active_passes = tuple(FEATURE_PASSES)
+            return
+        
+        needed = set(feature_names)
+        self.active_passes = tuple(
+            name for name, features in FEATURE_PASSES.items()
+            if needed.intersection(features) or (name == 'structure' and self.hash_features)
+        )
+    
+    def measure_pass_costs(self, file_paths: List[str]) -> Dict[str, float]:
+        """Mean seconds per file spent in each feature pass; reading and parsing are excluded"""
+        totals = dict.fromkeys(FEATURE_PASSES, 0.0)
+        parser = PythonParser()
+        measured = 0
+        
+        for file_path in file_paths:
+            if not parser.can_parse(file_path):
+                continue
+            content = parser.read_file(file_path)
+            tree = ast.parse(content)
+            lines = content.split('\n')
+            
+            for name in FEATURE_PASSES:
+                start = time.perf_counter()
+                self._extract_pass(name, tree, lines)
+                totals[name] += time.perf_counter() - start
+            measured += 1
+        
+        return {name: total / measured if measured else 0.0 for name, total in totals.items()}
+    
     def extract_features(self, file_path: str) -> np.ndarray:
+        """The named features of a file as a dense vector"""
         parser = PythonParser()
         
         if not parser.can_parse(file_path):
@@ -51,29 +143,163 @@ class FeatureExtractor:
         content = parser.read_file(file_path)
         tree = ast.parse(content)
         
+        return self._feature_vector(tree, content)
+    
+    def extract_unit_features(self, file_path: str) -> Tuple[List[CodeUnit], np.ndarray]:
+        """Feature vectors for the whole file and for every function and class in it.
+
+        The first unit is the module itself and its row equals ``extract_features_batch``
+        for the file; each function and class follows in source order, featurized
+        from its own subtree and dedented source lines. The file is read and
+        parsed once.
+        """
+        parser = PythonParser()
+        
+        if not parser.can_parse(file_path):
+            return [CodeUnit(MODULE, file_path, 1, 1)], self._empty_rows(1)
+        
+        content = parser.read_file(file_path)
+        tree = ast.parse(content)
+        lines = content.split('\n')
+        
+        units = [CodeUnit(MODULE, file_path, 1, max(1, len(content.splitlines())))]
+        rows = [self._feature_row(tree, content)]
+        
+        for node, class_name in _iter_definitions(tree):
+            source = textwrap.dedent('\n'.join(lines[node.lineno - 1:node.end_lineno]))
+            units.append(CodeUnit(
+                CLASS if isinstance(node, ast.ClassDef) else FUNCTION,
+                node.name,
+                node.lineno,
+                node.end_lineno or node.lineno,
+                node.col_offset,
+                node.end_col_offset or 0,
+                class_name
+            ))
+            rows.append(self._feature_row(node, source))
+        
+        return units, stack_features(rows)
+    
+    def extract_features_batch(self, file_paths: List[str], n_jobs: Optional[int] = None):
+        """Model inputs for several files, one row per file.
+
+        A dense array of the named features, or a CSR matrix that adds the
+        hashed n-gram columns when ``hash_features`` is set. With ``n_jobs``
+        other than None or 1, files are parsed in that many processes (-1 for
+        one per CPU); rows keep the order of ``file_paths``.
+        """
+        if not file_paths:
+            return self._empty_rows(0)
+        
+        if n_jobs is None or n_jobs == 1 or len(file_paths) == 1:
+            return stack_features([self._file_row(file_path) for file_path in file_paths])
+        
+        from concurrent.futures import ProcessPoolExecutor
+        
+        workers = min(len(file_paths), (os.cpu_count() or 1) if n_jobs < 0 else n_jobs)
+        with ProcessPoolExecutor(workers) as executor:
+            chunksize = max(1, len(file_paths) // (workers * 4))
+            return stack_features(list(executor.map(self._file_row, file_paths, chunksize=chunksize)))
+
+    def extract_units_batch(self, file_paths: List[str],
+                            n_jobs: Optional[int] = None) -> Tuple[List[List[CodeUnit]], Any]:
+        """``extract_unit_features`` for several files: the units of each file and all their rows.
+
+        Rows are stacked file after file, each file's module row first. Files
+        are parsed once, in ``n_jobs`` processes as in ``extract_features_batch``.
+        """
+        if not file_paths:
+            return [], self._empty_rows(0)
+
+        if n_jobs is None or n_jobs == 1 or len(file_paths) == 1:
+            extracted = [self.extract_unit_features(file_path) for file_path in file_paths]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            workers = min(len(file_paths), (os.cpu_count() or 1) if n_jobs < 0 else n_jobs)
+            with ProcessPoolExecutor(workers) as executor:
+                chunksize = max(1, len(file_paths) // (workers * 4))
+                extracted = list(executor.map(self.extract_unit_features, file_paths, chunksize=chunksize))
+
+        return [units for units, _ in extracted], stack_features([rows for _, rows in extracted])
+
+    def extract_tree_features(self, tree: ast.AST, content: str):
+        """The model input row of an already built tree and its source, e.g. generated code"""
+        return self._feature_row(tree, content)
+
+    def named_values(self, features, row: int) -> List[float]:
+        """The named features of one row of a dense or sparse feature matrix"""
+        values = features[row, :len(self.feature_names)]
+        if hasattr(values, 'toarray'):
+            values = values.toarray()[0]
+        return values.tolist()
+    
+    def _file_row(self, file_path: str):
+        if not self.hash_features:
+            return self.extract_features(file_path)
+        
+        parser = PythonParser()
+        if not parser.can_parse(file_path):
+            return self._empty_rows(1)
+        
+        content = parser.read_file(file_path)
+        return self._feature_row(ast.parse(content), content)
+    
+    def _feature_row(self, tree: ast.AST, content: str):
+        if not self.hash_features:
+            return self._feature_vector(tree, content)
+        
+        from scipy import sparse
+        
+        ngrams = NGramHasher(self.hash_features)
+        named = sparse.csr_matrix(self._feature_vector(tree, content, ngrams).reshape(1, -1))
+        return sparse.hstack([named, ngrams.to_sparse()], format='csr')
+    
+    def _empty_rows(self, count: int):
+        if not self.hash_features:
+            return np.zeros((count, len(self.feature_names)))
+        
+        from scipy import sparse
+        
+        return sparse.csr_matrix((count, self.n_features))
+    
+    def _feature_vector(self, tree: ast.AST, content: str, ngrams: Optional['NGramHasher'] = None) -> np.ndarray:
+        lines = content.split('\n')
         features = {}
         
-        features.update(self._extract_basic_metrics(tree, content))
-        features.update(self._extract_structural_metrics(tree))
-        features.update(self._extract_lexical_metrics(tree))
-        features.update(self._extract_style_metrics(content))
+        for name in self.active_passes:
+            features.update(self._extract_pass(name, tree, lines, ngrams))
         
         return np.array([features.get(name, 0) for name in self.feature_names])
     
-    def _extract_basic_metrics(self, tree: ast.AST, content: str) -> Dict[str, float]:
-        lines = content.split('\n')
+    def _extract_pass(self, name: str, tree: ast.AST, lines: List[str],
+                      ngrams: Optional['NGramHasher'] = None) -> Dict[str, float]:
+        if name == 'lines':
+            return self._extract_line_metrics(lines)
+        if name == 'comments':
+            return {'comment_ratio': self._calculate_comment_ratio(lines)}
+        if name == 'structure':
+            return self._extract_structural_metrics(tree, ngrams)
+        if name == 'lexical':
+            return self._extract_lexical_metrics(tree)
+        if name == 'indentation':
+            return {'indentation_inconsistency': self._calculate_indentation_inconsistency(lines)}
+        if name == 'duplicates':
+            return {'duplicate_line_ratio': len(self._find_duplicate_lines(lines)) / len(lines) if lines else 0}
+        raise ValueError(f"Unknown feature pass: {name}")
+    
+    def _extract_line_metrics(self, lines: List[str]) -> Dict[str, float]:
         non_empty_lines = [line for line in lines if line.strip()]
         
         return {
             'lines_of_code': len(non_empty_lines),
-            'comment_ratio': self._calculate_comment_ratio(lines),
             'avg_line_length': np.mean([len(line) for line in non_empty_lines]) if non_empty_lines else 0,
             'max_line_length': max([len(line) for line in lines]) if lines else 0,
             'empty_line_ratio': (len(lines) - len(non_empty_lines)) / len(lines) if lines else 0
         }
     
-    def _extract_structural_metrics(self, tree: ast.AST) -> Dict[str, float]:
-        visitor = StructuralMetricsVisitor()
+    def _extract_structural_metrics(self, tree: ast.AST, ngrams: Optional['NGramHasher'] = None) -> Dict[str, float]:
+        visitor = StructuralMetricsVisitor(ngrams)
         visitor.visit(tree)
         
         return {
@@ -109,9 +335,7 @@ class FeatureExtractor:
             'logical_op_count': visitor.logical_op_count
         }
     
-    def _extract_style_metrics(self, content: str) -> Dict[str, float]:
-        lines = content.split('\n')
-        
+    def _calculate_indentation_inconsistency(self, lines: List[str]) -> float:
         indentation_levels = []
         for line in lines:
             if line.strip():
@@ -123,13 +347,7 @@ class FeatureExtractor:
             common_indent = Counter(indentation_levels).most_common(1)[0][0]
             indentation_inconsistency = sum(1 for level in indentation_levels if level != common_indent and level != 0) / len(indentation_levels)
         
-        duplicate_lines = self._find_duplicate_lines(lines)
-        duplicate_ratio = len(duplicate_lines) / len(lines) if lines else 0
-        
-        return {
-            'indentation_inconsistency': indentation_inconsistency,
-            'duplicate_line_ratio': duplicate_ratio
-        }
+        return indentation_inconsistency
     
     def _calculate_comment_ratio(self, lines: List[str]) -> float:
         comment_lines = 0
@@ -145,8 +363,80 @@ class FeatureExtractor:
         return [line for line, count in line_counts.items() if count > 1]
 
 
+def stack_features(rows: List[Any]):
+    """Stack feature rows, keeping CSR sparse rows sparse"""
+    if rows and hasattr(rows[0], 'tocsr'):
+        from scipy import sparse
+        
+        return sparse.vstack(rows, format='csr')
+    return np.vstack(rows)
+
+
+class NGramHasher:
+    """Counts AST node-type n-grams into a fixed number of signed hash buckets.
+
+    Each node contributes its type alone, with its parent and with its parent
+    and grandparent (root-ward path contexts), and after its previous sibling's
+    type. Each n-gram string is hashed with CRC32: the low bits pick a bucket
+    and the top bit a sign, so colliding n-grams tend to cancel out rather than
+    pile up. Memory is bounded by ``n_features`` whatever the vocabulary.
+    """
+    
+    def __init__(self, n_features: int, max_path: int = 3):
+        self.n_features = n_features
+        self.max_path = max_path
+        self.counts: Dict[int, float] = {}
+        # Per open node: the path n-grams ending at it, and its last child's type
+        self._suffixes: List[List[str]] = [[]]
+        self._previous: List[Optional[str]] = [None]
+    
+    def enter(self, node: ast.AST):
+        name = type(node).__name__
+        
+        suffixes = [name]
+        suffixes.extend(f"{parent}/{name}" for parent in self._suffixes[-1])
+        for ngram in suffixes:
+            self._add(ngram)
+        if self._previous[-1] is not None:
+            self._add(f"{self._previous[-1]}>{name}")
+        
+        self._previous[-1] = name
+        self._suffixes.append(suffixes[:self.max_path - 1])
+        self._previous.append(None)
+    
+    def exit(self):
+        self._suffixes.pop()
+        self._previous.pop()
+    
+    def to_sparse(self):
+        from scipy import sparse
+        
+        buckets = np.fromiter(self.counts.keys(), dtype=np.int64, count=len(self.counts))
+        values = np.fromiter(self.counts.values(), dtype=np.float64, count=len(self.counts))
+        return sparse.csr_matrix((values, (np.zeros_like(buckets), buckets)), shape=(1, self.n_features))
+    
+    def _add(self, ngram: str):
+        digest = zlib.crc32(ngram.encode())
+        bucket = digest % self.n_features
+        self.counts[bucket] = self.counts.get(bucket, 0.0) + (-1.0 if digest >> 31 else 1.0)
+
+
+def _iter_definitions(node: ast.AST, class_name: Optional[str] = None):
+    """Yield (definition, enclosing class name) for nested functions and classes in source order"""
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, ast.ClassDef):
+            yield child, class_name
+            yield from _iter_definitions(child, child.name)
+        elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield child, class_name
+            yield from _iter_definitions(child, class_name)
+        else:
+            yield from _iter_definitions(child, class_name)
+
+
 class StructuralMetricsVisitor(ast.NodeVisitor):
-    def __init__(self):
+    def __init__(self, ngrams: Optional[NGramHasher] = None):
+        self.ngrams = ngrams
         self.cyclomatic_complexity = 1
         self.max_nesting_depth = 0
         self.current_nesting = 0
@@ -166,6 +456,16 @@ class StructuralMetricsVisitor(ast.NodeVisitor):
         self.return_count = 0
         self.assignment_count = 0
     
+    def visit(self, node: ast.AST):
+        if self.ngrams is None:
+            return super().visit(node)
+        
+        self.ngrams.enter(node)
+        try:
+            return super().visit(node)
+        finally:
+            self.ngrams.exit()
+    
     def visit_FunctionDef(self, node: ast.FunctionDef):
         self.method_count += 1
         self.total_parameters += len(node.args.args)
@@ -0,0 +1,123 @@
+import hashlib
+import inspect
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from ..core.models import CodeSmell, SmellType, Severity
+
+
+CACHE_FILE = 'labels.json'
+
+
+class LabelCache:
+    """A bounded, least-recently-used memo of detected smells per file content.
+
+    Entries are keyed by a digest of a file's bytes, so renamed or copied files
+    hit too; smells are stored without their path and take the path of the
+    file they are looked up for. The cache belongs to one ``rules_key`` (see
+    ``rules_digest``); binding it to another key empties it, and the saved
+    file only ever holds the entries of its key. Contents of edited or deleted
+    files are evicted, oldest first, once there are more than ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.rules_key: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, List[list]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def bind(self, rules_key: str):
+        if rules_key != self.rules_key:
+            self._entries.clear()
+            self.rules_key = rules_key
+
+    def lookup(self, key: str, file_path: str) -> Optional[List[CodeSmell]]:
+        """The cached smells of a file's content, or None; counts a hit or a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return [_smell_from_row(row, file_path) for row in entry]
+
+    def store(self, key: str, smells: List[CodeSmell]):
+        self._put(key, [_smell_row(smell) for smell in smells])
+
+    def _put(self, key: str, rows: List[list]):
+        self._entries[key] = rows
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self, cache_dir: str):
+        """Write the entries, oldest first, to ``cache_dir``; atomically replaces an earlier file"""
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        temporary = Path(cache_dir) / f"{CACHE_FILE}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump({'rules_key': self.rules_key, 'entries': self._entries}, f)
+        os.replace(temporary, Path(cache_dir) / CACHE_FILE)
+
+    def load(self, cache_dir: str):
+        """Read entries saved by ``save``; a file of other rules is ignored and replaced on the next save"""
+        path = Path(cache_dir) / CACHE_FILE
+        if not path.exists():
+            return
+
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('rules_key') == self.rules_key:
+            for key, rows in data['entries'].items():
+                self._put(key, rows)
+
+
+def content_digest(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def rules_digest(rules: List[Any]) -> str:
+    """A digest of every rule's class, source and settings; changes whenever labels could"""
+    description = []
+    for rule in rules:
+        try:
+            source = inspect.getsource(type(rule))
+        except (OSError, TypeError):
+            source = ''
+        description.append([type(rule).__qualname__, source, vars(rule)])
+    return hashlib.blake2b(json.dumps(description, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+
+def _smell_row(smell: CodeSmell) -> list:
+    return [
+        smell.smell_type.value, getattr(smell.severity, 'value', smell.severity), smell.line_start, smell.line_end,
+        smell.column_start, smell.column_end, smell.message_template, list(smell.message_args),
+        smell.suggestion, smell.confidence, smell.function_name, smell.class_name, dict(smell.metrics)
+    ]
+
+
+def _smell_from_row(row: list, file_path: str) -> CodeSmell:
+    (smell_type, severity, line_start, line_end, column_start, column_end, message, message_args,
+     suggestion, confidence, function_name, class_name, metrics) = row
+    return CodeSmell(
+        smell_type=SmellType(smell_type),
+        severity=Severity(severity),
+        line_start=line_start,
+        line_end=line_end,
+        column_start=column_start,
+        column_end=column_end,
+        message=message,
+        message_args=tuple(message_args),
+        suggestion=suggestion,
+        confidence=confidence,
+        file_path=file_path,
+        function_name=function_name,
+        class_name=class_name,
+        metrics=metrics
+    )
@@ -0,0 +1,98 @@
+import numpy as np
+from typing import List, Dict, Union
+
+from ..core.models import CodeSmell, SmellType, Severity
+from ..core.batch import SmellSpan
+from .feature_extractor import CodeUnit, MODULE, FUNCTION, CLASS
+from .model import DEFAULT_THRESHOLD
+
+
+# Smells that describe a class as a whole; every other smell is placed on a function
+CLASS_SMELLS = frozenset({SmellType.LARGE_CLASS, SmellType.FEATURE_ENVY, SmellType.DATA_CLUMPS})
+
+SUGGESTIONS = {
+    SmellType.LONG_METHOD: "Consider breaking this method into smaller functions",
+    SmellType.COMPLEX_CONDITIONAL: "Consider extracting conditions into separate variables or methods",
+    SmellType.HIGH_COMPLEXITY: "Consider refactoring to reduce complexity",
+    SmellType.POOR_NAMING: "Use descriptive names that explain what the function does",
+    SmellType.LARGE_CLASS: "Consider splitting into smaller, more focused classes",
+    SmellType.DEAD_CODE: "Remove this unreachable code"
+}
+
+
+def predict_localized(predictor, file_path: str) -> List[CodeSmell]:
+    """ML-predicted smells of a file, each placed on the unit most likely responsible.
+
+    The file vector and one vector per function and class are scored in a
+    single call. A smell is reported when the file row clears its threshold,
+    and is placed on the candidate unit with the highest score for that smell:
+    classes for class-level smells, functions otherwise, and the module when
+    the file has no such unit.
+    """
+    units, features = predictor.feature_extractor.extract_unit_features(file_path)
+    return localize_smells(predictor, file_path, units, predictor.score_features(features))
+
+
+def localize_smells(predictor, file_path: str, units: List[CodeUnit],
+                    scores: Dict[SmellType, np.ndarray]) -> List[CodeSmell]:
+    """Turn per-unit scores, with the module as the first unit, into localized smells"""
+    smells = []
+
+    for smell_type, unit_scores in scores.items():
+        probability = float(unit_scores[0])
+        if probability < predictor.thresholds.get(smell_type, DEFAULT_THRESHOLD):
+            continue
+
+        kind = CLASS if smell_type in CLASS_SMELLS else FUNCTION
+        candidates = [row for row, unit in enumerate(units) if unit.kind == kind] or [0]
+        # argmax keeps the first of equal scores, i.e. the outermost unit
+        row = candidates[int(np.argmax(unit_scores[candidates]))]
+
+        smells.append(_prediction_smell(smell_type, units[row], probability, float(unit_scores[row]), file_path))
+
+    return smells
+
+
+def merge_predictions(rule_smells: List[Union[CodeSmell, SmellSpan]], ml_smells: List[CodeSmell]) -> List[CodeSmell]:
+    """ML smells not already reported by a rule of the same type over an overlapping span"""
+    return [
+        smell for smell in ml_smells
+        if not any(
+            rule.smell_type == smell.smell_type
+            and rule.line_start <= smell.line_end
+            and smell.line_start <= rule.line_end
+            for rule in rule_smells
+        )
+    ]
+
+
+def _prediction_smell(smell_type: SmellType, unit: CodeUnit, probability: float,
+                      unit_probability: float, file_path: str) -> CodeSmell:
+    if probability >= 0.9:
+        severity = Severity.HIGH
+    elif probability >= 0.75:
+        severity = Severity.MEDIUM
+    else:
+        severity = Severity.LOW
+
+    if unit.kind == MODULE:
+        message, message_args = "Predicted {} in this module", (smell_type.value,)
+    else:
+        message, message_args = "Predicted {} in {} '{}'", (smell_type.value, unit.kind, unit.name)
+
+    return CodeSmell(
+        smell_type=smell_type,
+        severity=severity,
+        line_start=unit.line_start,
+        line_end=unit.line_end,
+        column_start=unit.column_start,
+        column_end=unit.column_end,
+        message=message,
+        message_args=message_args,
+        suggestion=SUGGESTIONS.get(smell_type, "Consider refactoring this code"),
+        confidence=probability,
+        file_path=file_path,
+        function_name=unit.name if unit.kind == FUNCTION else None,
+        class_name=unit.name if unit.kind == CLASS else unit.class_name,
+        metrics={'probability': probability, 'unit_probability': unit_probability}
+    )
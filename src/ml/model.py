@@ -1,43 +1,145 @@
+import copy
+import functools
+import os
+import tempfile
+import time
+import uuid
 import numpy as np
-import pandas as pd
-from typing import List, Dict, Any, Tuple, Optional
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterable, Tuple, Optional
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import GaussianNB
 from sklearn.svm import SVC
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.model_selection import StratifiedGroupKFold, train_test_split, cross_val_score
+from sklearn.metrics import classification_report, confusion_matrix, precision_recall_curve, accuracy_score
 from sklearn.preprocessing import StandardScaler
-import joblib
-import json
+from sklearn.multioutput import MultiOutputClassifier
+from sklearn.pipeline import Pipeline, make_pipeline
 from pathlib import Path
 
 from ..core.models import SmellType, CodeSmell
-from .feature_extractor import FeatureExtractor
+from .feature_extractor import CodeUnit, FeatureExtractor, MODULE
+from .selection import feature_costs, select_features, subset_cost
+from .out_of_core import TrainingMatrix
+from .synthetic import SyntheticGenerator
+from .bundle import (
+    LazyArtifacts, MODEL_FORMAT_VERSION, bundle_digest, dump_artifact, load_artifact, read_manifest,
+    validate_feature_names, write_manifest
+)
+from .prediction_cache import PredictionCache, row_keys
+from .label_cache import LabelCache, content_digest, rules_digest
+
+
+DEFAULT_THRESHOLD = 0.5
 
 
 class SmellPredictor:
-    def __init__(self, model_type: str = 'random_forest'):
+    def __init__(self, model_type: str = 'random_forest', n_jobs: Optional[int] = None,
+                 multi_label: bool = False, hash_features: int = 0):
         self.model_type = model_type
-        self.models = {}
-        self.scalers = {}
-        self.feature_extractor = FeatureExtractor()
+        self.n_jobs = n_jobs
+        self.multi_label = multi_label
+        self.models = LazyArtifacts(on_load=self._apply_n_jobs)
+        self.scalers = LazyArtifacts()
+        self.thresholds = {}
+        self.multi_label_model = None
+        self.multi_label_scaler = None
+        self.feature_extractor = FeatureExtractor(hash_features)
         self.trained_smells = []
+        self.feature_subsets: Dict[SmellType, List[str]] = {}
+        self.feature_costs: Dict[str, float] = {}
+        self.hyperparameters: Dict[SmellType, Dict[str, Any]] = {}
+        self.unit_samples = False
+        self.model_version = 0
+        self.model_key: Optional[str] = None
+        self.history = []
+        self.prediction_cache: Optional[PredictionCache] = None
         
         self.model_classes = {
             'random_forest': RandomForestClassifier,
             'gradient_boosting': GradientBoostingClassifier,
             'logistic_regression': LogisticRegression,
-            'svm': SVC
+            'svm': SVC,
+            'sgd': SGDClassifier,
+            'naive_bayes': GaussianNB
         }
     
-    def train(self, training_data: List[Tuple[str, List[CodeSmell]]]) -> Dict[str, Any]:
+    def train(self, training_data: List[Tuple[str, List[CodeSmell]]],
+              target_precision: Optional[float] = None,
+              target_recall: Optional[float] = None,
+              max_feature_loss: Optional[float] = None,
+              search_budget: Optional[float] = None,
+              unit_samples: bool = False,
+              matrix: Optional[Tuple[Any, np.ndarray]] = None) -> Dict[str, Any]:
+        """Train one classifier per smell type.
+
+        With ``target_precision`` or ``target_recall`` the decision threshold of
+        each smell is chosen on the held-out split to meet that target;
+        otherwise the default threshold of 0.5 is kept.
+
+        With ``max_feature_loss`` the cost of every feature pass is measured on
+        the training files, and each smell's model is trained on the cheapest
+        feature subset within that accuracy loss on a validation split of the
+        training rows (see ``select_features``). Subsets and costs are saved
+        with the models.
+
+        With ``search_budget`` each smell's hyperparameters are tuned by
+        successive halving within its share of that many wall-clock seconds (see
+        ``search_model``). Otherwise the configurations in ``hyperparameters``,
+        e.g. taken from an earlier search, are used where present. Either way
+        they are saved with the models.
+
+        With ``unit_samples`` every function and class of a file is a sample of
+        its own next to the file itself, labelled by the smells it most closely
+        encloses (see ``prepare_unit_training_matrix``). All units of a file stay on the
+        same side of the held-out split and of each CV fold.
+
+        ``matrix`` is the ``prepare_training_matrix`` output for
+        ``training_data`` when the caller already built it, e.g. to evaluate
+        on it as well; features are then not extracted again.
+        """
+        if target_precision is not None and target_recall is not None:
+            raise ValueError("Specify at most one of target_precision and target_recall")
+        if max_feature_loss is not None and self.multi_label:
+            raise ValueError("Feature selection supports per-smell models only")
+        if search_budget is not None and self.multi_label:
+            raise ValueError("Hyperparameter search supports per-smell models only")
+        if unit_samples and self.multi_label:
+            raise ValueError("Unit samples support per-smell models only")
+        if matrix is not None and unit_samples:
+            raise ValueError("A prepared matrix holds file samples, not unit samples")
+        
+        self._record_version('train', len(training_data))
+        self.feature_extractor.select_features(None)
+        self.feature_subsets = {}
+        self.feature_costs = {}
+        self.unit_samples = unit_samples
+        
+        if self.multi_label:
+            return self._train_multi_label(training_data, target_precision, target_recall, matrix)
+        
+        pass_costs = None
+        if max_feature_loss is not None:
+            pass_costs = self.feature_extractor.measure_pass_costs([file_path for file_path, _ in training_data])
+            self.feature_costs = feature_costs(pass_costs)
+        
         results = {}
+        # Features are extracted once; each smell type trains on its label column
+        groups = None
+        if unit_samples:
+            X, Y, groups = self.prepare_unit_training_matrix(training_data)
+        elif matrix is not None:
+            X, Y = matrix
+        else:
+            X, Y = self.prepare_training_matrix(training_data)
+        search_deadline = time.perf_counter() + search_budget if search_budget is not None else None
         
-        for smell_type in SmellType:
+        for column, smell_type in enumerate(SmellType):
             if smell_type not in self.trained_smells:
                 self.trained_smells.append(smell_type)
             
-            X, y = self._prepare_training_data(training_data, smell_type)
+            y = Y[:, column]
             
             if len(np.unique(y)) < 2:
                 print(f"Skipping {smell_type.value} - insufficient data variation")
@@ -49,131 +151,638 @@ class SmellPredictor:
                 print(f"Skipping {smell_type.value} - insufficient training samples ({total_samples})")
                 continue
             
-            # Adjust test size for small datasets
-            test_size = min(0.2, max(0.1, 2.0 / total_samples))
+            groups_train = None
+            if groups is None:
+                X_train, X_test, y_train, y_test = self.split_training_data(X, y)
+            else:
+                train_rows, test_rows = _group_split(y, groups)
+                X_train, X_test, y_train, y_test = X[train_rows], X[test_rows], y[train_rows], y[test_rows]
+                groups_train = groups[train_rows]
             
-            # Check if we can use stratification
-            unique_classes = np.unique(y)
-            min_class_count = min(np.bincount(y))
+            if len(np.unique(y_train)) < 2:
+                print(f"Skipping {smell_type.value} - insufficient data variation in the training split")
+                continue
             
-            if len(unique_classes) >= 2 and min_class_count >= 2 and total_samples >= 10:
-                try:
-                    X_train, X_test, y_train, y_test = train_test_split(
-                        X, y, test_size=test_size, random_state=42, stratify=y
+            create_model = functools.partial(self._create_model, smell_type)
+            feature_names = self.feature_extractor.feature_names
+            if pass_costs is not None:
+                # Subsets are compared on a validation split of the training rows;
+                # the held-out split only scores the final model
+                if groups_train is None:
+                    X_fit, X_val, y_fit, y_val = self.split_training_data(X_train, y_train)
+                else:
+                    fit_rows, val_rows = _group_split(y_train, groups_train)
+                    X_fit, X_val, y_fit, y_val = X_train[fit_rows], X_train[val_rows], y_train[fit_rows], y_train[val_rows]
+                if len(np.unique(y_fit)) == 2:
+                    feature_names = select_features(
+                        create_model, X_fit, y_fit, X_val, y_val,
+                        self.feature_extractor.feature_names, pass_costs, max_feature_loss,
+                        required_passes=('structure',) if self.feature_extractor.hash_features else ()
                     )
-                except ValueError:
-                    # Fallback to non-stratified split
-                    X_train, X_test, y_train, y_test = train_test_split(
-                        X, y, test_size=test_size, random_state=42
-                    )
-            else:
-                X_train, X_test, y_train, y_test = train_test_split(
-                    X, y, test_size=test_size, random_state=42
-                )
-            
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
-            X_test_scaled = scaler.transform(X_test)
+                self.feature_subsets[smell_type] = feature_names
+                columns = self.feature_columns(smell_type)
+                X_train, X_test = X_train[:, columns], X_test[:, columns]
             
-            model = self._create_model()
-            model.fit(X_train_scaled, y_train)
+            # Adjust CV folds for small datasets
+            cv_folds = min(5, X_train.shape[0] // 2, len(np.unique(y_train)))
+            if groups_train is not None:
+                cv_folds = min(cv_folds, len(np.unique(groups_train)))
             
-            y_pred = model.predict(X_test_scaled)
+            search = None
+            if search_deadline is not None and cv_folds >= 2:
+                from .search import search_model
+                
+                # Each smell left gets an even share of the time left
+                remaining = list(SmellType)[column:]
+                budget = max(0.0, search_deadline - time.perf_counter()) / len(remaining)
+                model, search = search_model(
+                    create_model(), self.model_type, X_train, y_train, X_test, cv_folds, budget, self.n_jobs
+                )
+                self.hyperparameters[smell_type] = search['params']
+            else:
+                model = create_model()
+                model.fit(X_train, y_train)
             
-            # Adjust CV folds for small datasets
-            cv_folds = min(5, len(X_train) // 2, len(np.unique(y_train)))
             if cv_folds < 2:
-                cv_scores = np.array([model.score(X_train_scaled, y_train)])
+                cv_scores = np.array([model.score(X_train, y_train)])
             else:
-                cv_scores = cross_val_score(model, X_train_scaled, y_train, cv=cv_folds)
+                cv = cv_folds if groups_train is None else StratifiedGroupKFold(cv_folds)
+                cv_scores = cross_val_score(model, X_train, y_train, cv=cv, groups=groups_train)
+            
+            feature_importance = self._get_feature_importance(model, feature_names)
+            model = self._apply_n_jobs(_fold_scaling(model))
+            
+            test_scores = self._positive_scores(model, X_test)
+            threshold = _select_threshold(y_test, test_scores, target_precision, target_recall)
+            y_pred = (test_scores >= threshold).astype(int)
             
             self.models[smell_type] = model
-            self.scalers[smell_type] = scaler
+            self.scalers.discard(smell_type)
+            self.thresholds[smell_type] = threshold
             
             results[smell_type.value] = {
-                'accuracy': model.score(X_test_scaled, y_test),
+                'accuracy': accuracy_score(y_test, y_pred),
+                'threshold': threshold,
                 'cv_mean': cv_scores.mean(),
                 'cv_std': cv_scores.std(),
                 'classification_report': classification_report(y_test, y_pred, output_dict=True),
+                'feature_importance': feature_importance,
+                'training_samples': X_train.shape[0],
+                'test_samples': X_test.shape[0]
+            }
+            if pass_costs is not None:
+                results[smell_type.value]['selected_features'] = feature_names
+                results[smell_type.value]['feature_cost'] = subset_cost(feature_names, pass_costs)
+            if search is not None:
+                results[smell_type.value]['search'] = search
+        
+        return results
+    
+    def train_out_of_core(self, training_data: Iterable[Tuple[str, List[CodeSmell]]], chunk_size: int = 10000,
+                          work_dir: Optional[str] = None,
+                          target_precision: Optional[float] = None,
+                          target_recall: Optional[float] = None,
+                          synthetic: Optional[SyntheticGenerator] = None,
+                          synthetic_samples: int = 0) -> Dict[str, Any]:
+        """Train one classifier per smell type without holding the feature matrix in memory.
+
+        ``training_data`` is consumed once, ``chunk_size`` files at a time: their
+        features are appended to a disk-backed matrix in a temporary directory
+        under ``work_dir`` (see ``TrainingMatrix``) while the scaling statistics
+        of the training rows are accumulated. Models are then fitted chunk by
+        chunk, in a fixed random chunk order: sgd and naive_bayes through
+        ``partial_fit``, random forests by growing an even share of their trees
+        on each chunk through ``warm_start``. Other model types raise ValueError.
+
+        ``cv_mean`` and ``cv_std`` are progressive validation: each chunk is
+        scored before it is fitted. The held-out rows are then scored chunk by
+        chunk too, and thresholds are picked on their scores and labels. Smell
+        types are skipped when there are fewer than 10 training rows or no
+        held-out rows.
+
+        ``synthetic_samples`` generated modules from ``synthetic`` are appended
+        after the files, built straight into feature rows without touching disk.
+        """
+        if self.model_type not in ('sgd', 'naive_bayes', 'random_forest'):
+            raise ValueError(f"{self.model_type} models cannot be trained out of core; "
+                             f"use sgd, naive_bayes or random_forest")
+        if self.multi_label or self.feature_extractor.hash_features:
+            raise ValueError("Out-of-core training supports per-smell models on the named features only")
+        if target_precision is not None and target_recall is not None:
+            raise ValueError("Specify at most one of target_precision and target_recall")
+
+        self.feature_extractor.select_features(None)
+        self.feature_subsets = {}
+        self.feature_costs = {}
+        self.unit_samples = False
+
+        with tempfile.TemporaryDirectory(dir=work_dir) as directory:
+            matrix = TrainingMatrix(directory, self.feature_extractor.n_features)
+            matrix.write(self.feature_extractor, training_data, chunk_size, n_jobs=self.n_jobs)
+            if synthetic is not None and synthetic_samples:
+                matrix.write_chunks(synthetic.iter_chunks(
+                    self.feature_extractor, synthetic_samples, chunk_size, n_jobs=self.n_jobs
+                ))
+            self._record_version('train', matrix.rows)
+            return self._fit_chunks(matrix, chunk_size, target_precision, target_recall)
+
+    def _fit_chunks(self, matrix: TrainingMatrix, chunk_size: int,
+                    target_precision: Optional[float], target_recall: Optional[float]) -> Dict[str, Any]:
+        X, Y, held_out = matrix.features, matrix.labels, matrix.held_out
+        train_counts = Y[~held_out].sum(axis=0) if matrix.rows else np.zeros(len(SmellType))
+        training_samples = int((~held_out).sum())
+        test_samples = int(held_out.sum())
+        n_chunks = max(1, -(-matrix.rows // chunk_size))
+        scaler = matrix.stats.to_scaler()
+
+        models, trees, accuracies = {}, {}, {}
+        for column, smell_type in enumerate(SmellType):
+            if smell_type not in self.trained_smells:
+                self.trained_smells.append(smell_type)
+            if training_samples < 10 or not test_samples:
+                print(f"Skipping {smell_type.value} - insufficient training samples "
+                      f"({training_samples} training, {test_samples} held out)")
+                continue
+            if train_counts[column] == 0 or train_counts[column] == training_samples:
+                print(f"Skipping {smell_type.value} - insufficient data variation")
+                continue
+            models[smell_type] = _chunked_estimator(self._create_model(smell_type), n_chunks)
+            trees[smell_type] = models[smell_type].get_params().get('n_estimators', 0)
+            accuracies[smell_type] = []
+
+        for rows in matrix.chunks(chunk_size, shuffle=True):
+            train_rows = ~held_out[rows]
+            X_chunk = X[rows][train_rows]
+            if not len(X_chunk):
+                continue
+            X_scaled = scaler.transform(X_chunk)
+            for smell_type, model in models.items():
+                y_chunk = Y[rows, list(SmellType).index(smell_type)][train_rows].astype(int)
+                inputs = X_scaled if self.model_type == 'sgd' else X_chunk
+                if _is_fitted(model) and len(y_chunk):
+                    accuracies[smell_type].append(accuracy_score(y_chunk, model.predict(inputs)))
+                _fit_chunk(model, inputs, y_chunk, trees[smell_type])
+
+        fitted = {}
+        for smell_type, model in models.items():
+            if not _is_fitted(model):
+                print(f"Skipping {smell_type.value} - no chunk holds both classes")
+                continue
+            if isinstance(model, RandomForestClassifier):
+                model.set_params(warm_start=False)
+            if self.model_type == 'sgd':
+                model = make_pipeline(scaler, model)
+            fitted[smell_type] = self._apply_n_jobs(model)
+
+        # Only the scores of held-out rows are kept, not their features
+        test_scores = {smell_type: [] for smell_type in fitted}
+        for rows in matrix.chunks(chunk_size):
+            X_chunk = X[rows][held_out[rows]]
+            if not len(X_chunk):
+                continue
+            for smell_type, model in fitted.items():
+                test_scores[smell_type].append(self._positive_scores(model, X_chunk))
+
+        results = {}
+        for smell_type, model in fitted.items():
+            y_test = Y[held_out, list(SmellType).index(smell_type)].astype(int)
+            scores = np.concatenate(test_scores[smell_type])
+            threshold = _select_threshold(y_test, scores, target_precision, target_recall)
+            y_pred = (scores >= threshold).astype(int)
+
+            self.models[smell_type] = model
+            self.scalers.discard(smell_type)
+            self.thresholds[smell_type] = threshold
+
+            cv_scores = np.array(accuracies[smell_type] or [np.nan])
+            results[smell_type.value] = {
+                'accuracy': accuracy_score(y_test, y_pred),
+                'threshold': threshold,
+                'cv_mean': cv_scores.mean(),
+                'cv_std': cv_scores.std(),
+                'classification_report': classification_report(y_test, y_pred, output_dict=True, zero_division=0),
                 'feature_importance': self._get_feature_importance(model),
-                'training_samples': len(X_train),
-                'test_samples': len(X_test)
+                'training_samples': training_samples,
+                'test_samples': len(y_test),
+                'chunks': n_chunks
             }
+
+        return results
+
+    def update(self, training_data: List[Tuple[str, List[CodeSmell]]], new_trees: int = 10) -> Dict[str, Any]:
+        """Fold newly labelled samples into the trained models without retraining.
+
+        Models with ``partial_fit`` (sgd, naive_bayes) take one incremental pass
+        over the new samples; random forests grow ``new_trees`` trees fitted on
+        them alone through ``warm_start``. Either way the cost is proportional to
+        the new data. A forest is left as is when the new samples do not contain
+        both classes. Other model types raise ValueError. Thresholds are kept.
+        """
+        if self.unit_samples:
+            X, Y, _ = self.prepare_unit_training_matrix(training_data)
+        else:
+            X, Y = self.prepare_training_matrix(training_data)
+        smell_columns = {smell_type: column for column, smell_type in enumerate(SmellType)}
+        results = {}
         
+        if self.multi_label_model is not None:
+            columns = [smell_columns[smell_type] for smell_type in self.trained_smells]
+            model = copy.deepcopy(self.multi_label_model)
+            method = _update_model(model, X, Y[:, columns], new_trees)
+            self.multi_label_model = self._apply_n_jobs(model)
+            for smell_type in self.trained_smells:
+                results[smell_type.value] = {'method': method, 'samples': X.shape[0]}
+        else:
+            for smell_type in self.trained_smells:
+                if smell_type not in self.models:
+                    continue
+                
+                y = Y[:, smell_columns[smell_type]]
+                # Loaded models may hold read-only memory-mapped arrays; update a private copy
+                model = copy.deepcopy(self.models[smell_type])
+                method = _update_model(model, self.model_inputs(smell_type, X), y, new_trees)
+                self.models[smell_type] = self._apply_n_jobs(model)
+                results[smell_type.value] = {'method': method, 'samples': X.shape[0], 'positives': int(y.sum())}
+        
+        self._record_version('update', X.shape[0])
         return results
     
     def predict(self, file_path: str) -> List[Dict[str, Any]]:
-        features = self.feature_extractor.extract_features(file_path)
+        return self.predict_batch([file_path])[0]
+    
+    def predict_batch(self, file_paths: List[str], batch_size: int = 4096) -> List[List[Dict[str, Any]]]:
+        """Predict smells for many files, running each model once per chunk of files"""
         predictions = []
         
-        for smell_type in self.trained_smells:
-            if smell_type in self.models:
-                model = self.models[smell_type]
-                scaler = self.scalers[smell_type]
-                
-                features_scaled = scaler.transform(features.reshape(1, -1))
-                
-                prediction = model.predict(features_scaled)[0]
-                probability = model.predict_proba(features_scaled)[0]
-                
-                if prediction == 1:
-                    predictions.append({
-                        'smell_type': smell_type,
-                        'probability': max(probability),
-                        'confidence': max(probability),
-                        'features': features.tolist(),
-                        'feature_names': self.feature_extractor.feature_names
-                    })
+        for start in range(0, len(file_paths), batch_size):
+            chunk = file_paths[start:start + batch_size]
+            features = self.feature_extractor.extract_features_batch(chunk)
+            predictions.extend(self.predict_features(features))
         
         return predictions
     
+    def predict_features(self, features: np.ndarray) -> List[List[Dict[str, Any]]]:
+        """Predict smells for a stacked feature matrix with one row per sample.
+
+        Rows may be sparse when hashed n-gram features are enabled; each
+        prediction reports only the named features of its row.
+        """
+        if not hasattr(features, 'toarray'):
+            features = np.atleast_2d(features)
+        predictions = [[] for _ in range(features.shape[0])]
+        
+        if not features.shape[0]:
+            return predictions
+        
+        for smell_type, scores in self.score_features(features).items():
+            threshold = self.thresholds.get(smell_type, DEFAULT_THRESHOLD)
+            
+            for row in np.flatnonzero(scores >= threshold):
+                probability = float(scores[row])
+                predictions[row].append({
+                    'smell_type': smell_type,
+                    'probability': probability,
+                    'confidence': probability,
+                    'threshold': threshold,
+                    'features': self.feature_extractor.named_values(features, row),
+                    'feature_names': self.feature_extractor.feature_names
+                })
+        
+        return predictions
+    
+    def score_features(self, features: np.ndarray,
+                       smell_types: Optional[List[SmellType]] = None) -> Dict[SmellType, np.ndarray]:
+        """Positive-class probability per trained smell type for every row.
+
+        ``smell_types`` limits scoring to those types; per-smell models outside
+        it are not evaluated. With a ``prediction_cache``, rows already scored
+        by the same models are answered from it and only the distinct new
+        rows are scored.
+        """
+        if smell_types is None:
+            smell_types = self.trained_smells
+        if self.prediction_cache is None or self.model_key is None:
+            return self._score_rows(features, smell_types)
+        
+        cache = self.prediction_cache
+        cache.bind(self.model_key)
+        scored_types = self.scored_smells(smell_types)
+        keys = row_keys(features)
+        # First row of every distinct vector; duplicates within a call are scored once
+        first_rows = {}
+        for row, key in enumerate(keys):
+            first_rows.setdefault(key, row)
+        
+        entries = {key: cache.lookup(key, scored_types) for key in first_rows}
+        missing = [key for key, entry in entries.items() if entry is None]
+        if missing:
+            computed = self._score_rows(features[[first_rows[key] for key in missing]], smell_types)
+            for index, key in enumerate(missing):
+                entries[key] = {smell_type: float(scores[index]) for smell_type, scores in computed.items()}
+                cache.store(key, entries[key])
+        
+        return {
+            smell_type: np.array([entries[key][smell_type] for key in keys])
+            for smell_type in scored_types
+        }
+    
+    def scored_smells(self, smell_types: Optional[List[SmellType]] = None) -> List[SmellType]:
+        """The smell types ``score_features`` returns scores for"""
+        if smell_types is None:
+            smell_types = self.trained_smells
+        if self.multi_label_model is not None:
+            return [smell_type for smell_type in self.trained_smells if smell_type in smell_types]
+        return [smell_type for smell_type in smell_types if smell_type in self.models]
+    
+    def _score_rows(self, features, smell_types: List[SmellType]) -> Dict[SmellType, np.ndarray]:
+        scores = {}
+        
+        if self.multi_label_model is not None:
+            if self.multi_label_scaler is not None:
+                features = self.multi_label_scaler.transform(features)
+            probabilities = self.multi_label_model.predict_proba(features)
+            if not isinstance(probabilities, list):
+                probabilities = [probabilities]
+            classes = _output_classes(self.multi_label_model)
+            
+            for smell_type, output_classes, output_probabilities in zip(self.trained_smells, classes, probabilities):
+                if smell_type not in smell_types:
+                    continue
+                output_classes = list(output_classes)
+                if 1 in output_classes:
+                    scores[smell_type] = output_probabilities[:, output_classes.index(1)]
+                else:
+                    scores[smell_type] = np.zeros(features.shape[0])
+            return scores
+        
+        for smell_type in smell_types:
+            if smell_type in self.models:
+                scores[smell_type] = self._positive_scores(self.models[smell_type], self.model_inputs(smell_type, features))
+        
+        return scores
+    
+    def model_inputs(self, smell_type: SmellType, features: np.ndarray) -> np.ndarray:
+        """Features as a smell's model expects them.
+
+        Models trained by this version take raw features, limited to the
+        smell's selected columns if it has a feature subset. Bundles from
+        earlier versions store a separate StandardScaler per smell, which is
+        applied here.
+        """
+        columns = self.feature_columns(smell_type)
+        if columns is not None:
+            features = features[:, columns]
+        scaler = self.scalers.get(smell_type)
+        return features if scaler is None else scaler.transform(features)
+    
+    def feature_columns(self, smell_type: SmellType) -> Optional[List[int]]:
+        """Input columns of a smell's model, or None if it uses every column"""
+        subset = self.feature_subsets.get(smell_type)
+        if subset is None:
+            return None
+        names = self.feature_extractor.feature_names
+        columns = [names.index(name) for name in subset]
+        return columns + list(range(len(names), self.feature_extractor.n_features))
+    
     def save_model(self, model_path: str):
-        model_data = {
+        """Write a versioned model bundle: a manifest plus one artifact per smell type"""
+        Path(model_path).mkdir(parents=True, exist_ok=True)
+        
+        artifacts = {}
+        if self.multi_label_model is not None:
+            artifacts['multi_label'] = {'model': 'multi_label_model.joblib'}
+            dump_artifact(self.multi_label_model, f"{model_path}/multi_label_model.joblib")
+            if self.multi_label_scaler is not None:
+                artifacts['multi_label']['scaler'] = 'multi_label_scaler.joblib'
+                dump_artifact(self.multi_label_scaler, f"{model_path}/multi_label_scaler.joblib")
+        else:
+            for smell_type in self.trained_smells:
+                if smell_type in self.models:
+                    artifacts[smell_type.value] = {'model': f"{smell_type.value}_model.joblib"}
+                    dump_artifact(self.models[smell_type], f"{model_path}/{smell_type.value}_model.joblib")
+                    if smell_type in self.scalers:
+                        artifacts[smell_type.value]['scaler'] = f"{smell_type.value}_scaler.joblib"
+                        dump_artifact(self.scalers[smell_type], f"{model_path}/{smell_type.value}_scaler.joblib")
+        
+        write_manifest(model_path, {
+            'format_version': MODEL_FORMAT_VERSION,
             'model_type': self.model_type,
             'trained_smells': [smell.value for smell in self.trained_smells],
-            'feature_names': self.feature_extractor.feature_names
+            'feature_names': self.feature_extractor.feature_names,
+            'hash_features': self.feature_extractor.hash_features,
+            'feature_subsets': {smell.value: subset for smell, subset in self.feature_subsets.items()},
+            'feature_costs': self.feature_costs,
+            'hyperparameters': {smell.value: params for smell, params in self.hyperparameters.items()},
+            'unit_samples': self.unit_samples,
+            'thresholds': {smell.value: threshold for smell, threshold in self.thresholds.items()},
+            'multi_label': self.multi_label_model is not None,
+            'model_version': self.model_version,
+            'history': self.history,
+            'artifacts': artifacts
+        })
+    
+    def load_model(self, model_path: str):
+        """Read a model bundle's manifest; per-smell artifacts are loaded on first use.
+
+        Artifacts are opened with joblib's ``mmap_mode='r'``, which maps their
+        plain arrays but not the nodes of tree models. Raises ValueError if
+        the bundle was trained on a different feature schema. The feature
+        extractor takes the bundle's hashed n-gram width and, when every model
+        has a feature subset, computes only the features they use.
+        """
+        manifest = read_manifest(model_path)
+        self.model_key = bundle_digest(model_path)
+        self.feature_extractor = FeatureExtractor(manifest.get('hash_features', 0))
+        validate_feature_names(manifest, self.feature_extractor.feature_names)
+        
+        self.model_type = manifest['model_type']
+        self.model_version = manifest.get('model_version', 1)
+        self.history = list(manifest.get('history', []))
+        self.trained_smells = [SmellType(smell) for smell in manifest['trained_smells']]
+        self.thresholds = {
+            SmellType(smell): threshold
+            for smell, threshold in manifest.get('thresholds', {}).items()
         }
+        self.feature_subsets = {
+            SmellType(smell): subset
+            for smell, subset in manifest.get('feature_subsets', {}).items()
+        }
+        self.feature_costs = manifest.get('feature_costs', {})
+        self.hyperparameters = {
+            SmellType(smell): params
+            for smell, params in manifest.get('hyperparameters', {}).items()
+        }
+        self.unit_samples = manifest.get('unit_samples', False)
+        self.models = LazyArtifacts(on_load=self._apply_n_jobs)
+        self.scalers = LazyArtifacts()
+        self.multi_label_model = None
+        self.multi_label_scaler = None
         
-        Path(model_path).mkdir(parents=True, exist_ok=True)
+        artifacts = manifest.get('artifacts')
         
-        with open(f"{model_path}/model_info.json", 'w') as f:
-            json.dump(model_data, f, indent=2)
+        if manifest.get('multi_label'):
+            files = (artifacts or {}).get('multi_label', {
+                'model': 'multi_label_model.joblib',
+                'scaler': 'multi_label_scaler.joblib'
+            })
+            self.multi_label = True
+            self.multi_label_model = self._apply_n_jobs(load_artifact(f"{model_path}/{files['model']}"))
+            if 'scaler' in files:
+                self.multi_label_scaler = load_artifact(f"{model_path}/{files['scaler']}")
+            return
         
-        for smell_type in self.trained_smells:
-            if smell_type in self.models:
-                joblib.dump(self.models[smell_type], f"{model_path}/{smell_type.value}_model.joblib")
-                joblib.dump(self.scalers[smell_type], f"{model_path}/{smell_type.value}_scaler.joblib")
+        if artifacts is None:
+            # Format 1 bundles list every smell type, with or without a model file
+            for smell_type in self.trained_smells:
+                self.models.register(smell_type, f"{model_path}/{smell_type.value}_model.joblib", verified=False)
+                self.scalers.register(smell_type, f"{model_path}/{smell_type.value}_scaler.joblib", verified=False)
+            return
+        
+        for smell, files in artifacts.items():
+            self.models.register(SmellType(smell), f"{model_path}/{files['model']}")
+            if 'scaler' in files:
+                self.scalers.register(SmellType(smell), f"{model_path}/{files['scaler']}")
+        
+        if all(SmellType(smell) in self.feature_subsets for smell in artifacts):
+            self.feature_extractor.select_features(
+                name for subset in self.feature_subsets.values() for name in subset
+            )
     
-    def load_model(self, model_path: str):
-        with open(f"{model_path}/model_info.json", 'r') as f:
-            model_data = json.load(f)
+    def load_all_models(self):
+        """Load every lazily registered artifact now, e.g. before forking workers that share them"""
+        self.models.load_all()
+        self.scalers.load_all()
+    
+    def _train_multi_label(self, training_data: List[Tuple[str, List[CodeSmell]]],
+                           target_precision: Optional[float] = None,
+                           target_recall: Optional[float] = None,
+                           matrix: Optional[Tuple[Any, np.ndarray]] = None) -> Dict[str, Any]:
+        X, Y = matrix if matrix is not None else self.prepare_training_matrix(training_data)
         
-        self.model_type = model_data['model_type']
-        self.trained_smells = [SmellType(smell) for smell in model_data['trained_smells']]
+        if X.shape[0] < 10:
+            print(f"Skipping multi-label training - insufficient training samples ({X.shape[0]})")
+            return {}
         
-        for smell_type in self.trained_smells:
-            model_file = f"{model_path}/{smell_type.value}_model.joblib"
-            scaler_file = f"{model_path}/{smell_type.value}_scaler.joblib"
-            
-            if Path(model_file).exists() and Path(scaler_file).exists():
-                self.models[smell_type] = joblib.load(model_file)
-                self.scalers[smell_type] = joblib.load(scaler_file)
-    
-    def _prepare_training_data(self, training_data: List[Tuple[str, List[CodeSmell]]], 
-                             smell_type: SmellType) -> Tuple[np.ndarray, np.ndarray]:
-        X = []
-        y = []
-        
-        for file_path, smells in training_data:
-            features = self.feature_extractor.extract_features(file_path)
-            has_smell = any(smell.smell_type == smell_type for smell in smells)
+        varied = [column for column in range(Y.shape[1]) if len(np.unique(Y[:, column])) == 2]
+        if not varied:
+            print("Skipping multi-label training - insufficient data variation")
+            return {}
+        
+        smell_types = [list(SmellType)[column] for column in varied]
+        Y = Y[:, varied]
+        
+        test_size = min(0.2, max(0.1, 2.0 / X.shape[0]))
+        X_train, X_test, Y_train, Y_test = train_test_split(X, Y, test_size=test_size, random_state=42)
+        
+        model = self._create_multi_label_model()
+        model.fit(X_train, Y_train)
+        
+        # Subset accuracy: a sample counts only if every label is right
+        cv_folds = min(5, X_train.shape[0] // 2)
+        if cv_folds < 2:
+            cv_scores = np.array([model.score(X_train, Y_train)])
+        else:
+            cv_scores = cross_val_score(model, X_train, Y_train, cv=cv_folds)
+        
+        if isinstance(model, MultiOutputClassifier):
+            model.estimators_ = [_fold_scaling(estimator) for estimator in model.estimators_]
+        
+        self.multi_label_model = self._apply_n_jobs(model)
+        self.multi_label_scaler = None
+        self.trained_smells = smell_types
+        self.models = LazyArtifacts(on_load=self._apply_n_jobs)
+        self.scalers = LazyArtifacts()
+        
+        results = {}
+        test_scores = self.score_features(X_test)
+        
+        for column, smell_type in enumerate(smell_types):
+            y_test = Y_test[:, column]
+            threshold = _select_threshold(y_test, test_scores[smell_type], target_precision, target_recall)
+            y_pred = (test_scores[smell_type] >= threshold).astype(int)
+            self.thresholds[smell_type] = threshold
             
-            X.append(features)
-            y.append(1 if has_smell else 0)
+            results[smell_type.value] = {
+                'accuracy': accuracy_score(y_test, y_pred),
+                'threshold': threshold,
+                'cv_mean': cv_scores.mean(),
+                'cv_std': cv_scores.std(),
+                'classification_report': classification_report(y_test, y_pred, output_dict=True, zero_division=0),
+                'feature_importance': self._get_feature_importance(model),
+                'training_samples': X_train.shape[0],
+                'test_samples': X_test.shape[0]
+            }
+        
+        return results
+    
+    def prepare_training_matrix(self, training_data: List[Tuple[str, List[CodeSmell]]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Feature matrix and a label matrix with one column per SmellType.
+
+        Files are parsed once, in ``n_jobs`` processes when set. The feature
+        matrix is sparse CSR when hashed n-gram features are enabled.
+        """
+        smell_columns = {smell_type: column for column, smell_type in enumerate(SmellType)}
+        Y = np.zeros((len(training_data), len(smell_columns)), dtype=int)
+        
+        for row, (_, smells) in enumerate(training_data):
+            for smell in smells:
+                Y[row, smell_columns[smell.smell_type]] = 1
+        
+        X = self.feature_extractor.extract_features_batch(
+            [file_path for file_path, _ in training_data], n_jobs=self.n_jobs
+        )
+        return X, Y
+    
+    def prepare_unit_training_matrix(self, training_data: List[Tuple[str, List[CodeSmell]]]) -> Tuple[Any, np.ndarray, np.ndarray]:
+        """Like ``prepare_training_matrix`` with a row for every unit of each file.
+
+        Units come from ``extract_unit_features``, still one parse per file: the
+        module row, labelled with all of the file's smells, then every function
+        and class, labelled with the smells it is the innermost unit around (see
+        ``_unit_labels``). ``groups`` holds the index in ``training_data`` of
+        each row's file.
+        """
+        file_units, X = self.feature_extractor.extract_units_batch(
+            [file_path for file_path, _ in training_data], n_jobs=self.n_jobs
+        )
+        Y = np.zeros((0, len(SmellType)), dtype=int)
+        if file_units:
+            Y = np.vstack([_unit_labels(units, smells) for units, (_, smells) in zip(file_units, training_data)])
+        groups = np.repeat(np.arange(len(file_units)), [len(units) for units in file_units])
+        return X, Y, groups
+    
+    def split_training_data(self, X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """The train/held-out split used by ``train``; deterministic for the same data"""
+        total_samples = len(y)
+        
+        # Adjust test size for small datasets
+        test_size = min(0.2, max(0.1, 2.0 / total_samples))
+        
+        # Check if we can use stratification
+        unique_classes = np.unique(y)
+        min_class_count = min(np.bincount(y))
+        
+        if len(unique_classes) >= 2 and min_class_count >= 2 and total_samples >= 10:
+            try:
+                return train_test_split(X, y, test_size=test_size, random_state=42, stratify=y)
+            except ValueError:
+                # Fallback to non-stratified split
+                pass
         
-        return np.array(X), np.array(y)
+        return train_test_split(X, y, test_size=test_size, random_state=42)
     
-    def _create_model(self):
+    def _create_model(self, smell_type: Optional[SmellType] = None):
+        """An unfitted estimator over raw features.
+
+        Scale-sensitive models come wrapped in a StandardScaler pipeline;
+        ``_fold_scaling`` removes the wrapper from linear models once fitted.
+        Hashed n-gram inputs are sparse, so their scaler does not center.
+        Searched ``hyperparameters`` of ``smell_type`` override the defaults.
+        """
+        model = self._create_default_model()
+        return model.set_params(**self.hyperparameters.get(smell_type, {}))
+    
+    def _create_default_model(self):
         if self.model_type == 'random_forest':
             return RandomForestClassifier(
                 n_estimators=100,
@@ -190,19 +799,58 @@ class SmellPredictor:
                 random_state=42
             )
         elif self.model_type == 'logistic_regression':
-            return LogisticRegression(
+            return make_pipeline(self._create_scaler(), LogisticRegression(
                 random_state=42,
                 max_iter=1000
-            )
+            ))
         elif self.model_type == 'svm':
-            return SVC(
+            return make_pipeline(self._create_scaler(), SVC(
                 probability=True,
                 random_state=42
-            )
+            ))
+        elif self.model_type == 'sgd':
+            return make_pipeline(self._create_scaler(), SGDClassifier(
+                loss='log_loss',
+                random_state=42
+            ))
+        elif self.model_type == 'naive_bayes':
+            if self.feature_extractor.hash_features:
+                raise ValueError("naive_bayes needs dense features; train it without hash_features")
+            return GaussianNB()
         else:
             raise ValueError(f"Unknown model type: {self.model_type}")
     
-    def _get_feature_importance(self, model) -> Dict[str, float]:
+    def _create_scaler(self) -> StandardScaler:
+        return StandardScaler(with_mean=not self.feature_extractor.hash_features)
+    
+    def _record_version(self, kind: str, samples: int):
+        self.model_key = uuid.uuid4().hex
+        self.model_version += 1
+        self.history.append({'version': self.model_version, 'kind': kind, 'samples': samples})
+    
+    def _positive_scores(self, model, features: np.ndarray) -> np.ndarray:
+        positive_column = list(model.classes_).index(1)
+        return model.predict_proba(features)[:, positive_column]
+    
+    def _apply_n_jobs(self, model):
+        if self.n_jobs is not None and 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=self.n_jobs)
+        return model
+    
+    def _create_multi_label_model(self):
+        """One estimator over the whole label matrix.
+
+        Random forests are natively multi-output, so one set of trees serves
+        every smell type; other model types fall back to one estimator per
+        label behind a single MultiOutputClassifier.
+        """
+        if self.model_type == 'random_forest':
+            return self._create_model()
+        return MultiOutputClassifier(self._create_model())
+    
+    def _get_feature_importance(self, model, feature_names: Optional[List[str]] = None) -> Dict[str, float]:
+        if isinstance(model, Pipeline):
+            model = model.steps[-1][1]
         if hasattr(model, 'feature_importances_'):
             importances = model.feature_importances_
         elif hasattr(model, 'coef_'):
@@ -212,39 +860,303 @@ class SmellPredictor:
         
         return {
             name: float(importance) 
-            for name, importance in zip(self.feature_extractor.feature_names, importances)
+            for name, importance in zip(feature_names or self.feature_extractor.feature_names, importances)
         }
     
     def get_model_info(self) -> Dict[str, Any]:
         return {
             'model_type': self.model_type,
             'trained_smells': [smell.value for smell in self.trained_smells],
-            'feature_count': len(self.feature_extractor.feature_names),
-            'feature_names': self.feature_extractor.feature_names
+            'multi_label': self.multi_label_model is not None,
+            'feature_count': self.feature_extractor.n_features,
+            'hash_features': self.feature_extractor.hash_features,
+            'feature_names': self.feature_extractor.feature_names,
+            'feature_subsets': {smell.value: subset for smell, subset in self.feature_subsets.items()},
+            'hyperparameters': {smell.value: params for smell, params in self.hyperparameters.items()},
+            'unit_samples': self.unit_samples
+        }
+
+
+def _select_threshold(y_true: np.ndarray, scores: np.ndarray,
+                      target_precision: Optional[float] = None,
+                      target_recall: Optional[float] = None) -> float:
+    """Pick the threshold meeting a precision or recall target on held-out data.
+
+    For a precision target the lowest qualifying threshold is used, keeping as
+    much recall as possible; for a recall target the highest qualifying one is
+    used, keeping as much precision as possible. Falls back to the default
+    threshold when there is no target or it cannot be met.
+    """
+    if (target_precision is None and target_recall is None) or not np.any(y_true == 1):
+        return DEFAULT_THRESHOLD
+    
+    precision, recall, thresholds = precision_recall_curve(y_true, scores)
+    # precision and recall have one more entry than thresholds (the empty selection)
+    precision = precision[:-1]
+    recall = recall[:-1]
+    
+    if target_precision is not None:
+        candidates = np.flatnonzero(precision >= target_precision)
+        if not len(candidates):
+            return DEFAULT_THRESHOLD
+        return float(thresholds[candidates[0]])
+    
+    candidates = np.flatnonzero(recall >= target_recall)
+    if not len(candidates):
+        return DEFAULT_THRESHOLD
+    return float(thresholds[candidates[-1]])
+
+
+def _unit_labels(units: List[CodeUnit], smells: List[CodeSmell]) -> np.ndarray:
+    """One label row per unit: the module gets every smell, other units the smells they enclose most closely.
+
+    A smell is labelled on the innermost function or class spanning its lines,
+    so a class carries class-level smells such as large_class but not those of
+    its methods; a smell outside every function and class is on the module only.
+    """
+    smell_columns = {smell_type: column for column, smell_type in enumerate(SmellType)}
+    Y = np.zeros((len(units), len(smell_columns)), dtype=int)
+    
+    for smell in smells:
+        column = smell_columns[smell.smell_type]
+        enclosing = [
+            row for row, unit in enumerate(units)
+            if unit.kind != MODULE and unit.line_start <= smell.line_start and smell.line_end <= unit.line_end
+        ]
+        # Nested definitions follow their parents, so the last enclosing unit is the innermost
+        rows = [0, enclosing[-1]] if enclosing else [0]
+        Y[rows, column] = 1
+    return Y
+
+
+def _group_split(y: np.ndarray, groups: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Train and held-out rows with each group, e.g. the units of one file, wholly on one side.
+
+    About the share of groups ``split_training_data`` holds out is held out,
+    stratified as far as the groups allow; deterministic for the same data.
+    """
+    n_groups = len(np.unique(groups))
+    test_size = min(0.2, max(0.1, 2.0 / n_groups))
+    if n_groups < 2:
+        return train_test_split(np.arange(len(y)), test_size=test_size, random_state=42)
+    
+    n_splits = min(n_groups, max(2, round(1 / test_size)))
+    splitter = StratifiedGroupKFold(n_splits, shuffle=True, random_state=42)
+    return next(splitter.split(np.zeros(len(y)), y, groups))
+
+
+def _fold_scaling(model):
+    """Fold a fitted StandardScaler pipeline step into a linear model's coefficients.
+
+    ``coef . (x - mean) / scale + b`` equals ``(coef / scale) . x + b - coef . (mean / scale)``,
+    so the scaler can be dropped. Models without coefficients, such as RBF
+    SVMs, keep their pipeline; anything else is returned unchanged. Models with
+    ``partial_fit`` keep it too, so later update batches are standardized with
+    the same scaler.
+    """
+    if not isinstance(model, Pipeline) or len(model.steps) != 2:
+        return model
+    
+    scaler, estimator = model.steps[0][1], model.steps[1][1]
+    if not isinstance(scaler, StandardScaler) or not hasattr(estimator, 'coef_'):
+        return model
+    if hasattr(estimator, 'support_') or hasattr(estimator, 'partial_fit'):
+        return model
+    
+    mean = scaler.mean_ if scaler.with_mean else 0.0
+    scale = scaler.scale_ if scaler.with_std else 1.0
+    coef = estimator.coef_ / scale
+    estimator.intercept_ = estimator.intercept_ - np.dot(estimator.coef_, np.broadcast_to(mean / scale, coef.shape[1:]))
+    estimator.coef_ = coef
+    return estimator
+
+
+def _update_model(model, X: np.ndarray, y: np.ndarray, new_trees: int) -> str:
+    """Update a fitted model in place with new samples; returns the method used"""
+    if isinstance(model, MultiOutputClassifier):
+        methods = {
+            _update_model(estimator, X, y[:, column], new_trees)
+            for column, estimator in enumerate(model.estimators_)
         }
+        return methods.pop() if len(methods) == 1 else 'mixed'
+    
+    if isinstance(model, Pipeline):
+        X = model[:-1].transform(X)
+        model = model.steps[-1][1]
+    
+    if hasattr(model, 'partial_fit'):
+        model.partial_fit(X, y, classes=model.classes_)
+        return 'partial_fit'
+    
+    if isinstance(model, RandomForestClassifier):
+        labels = y.reshape(len(y), -1)
+        # warm_start recomputes classes_ from the new labels, so every output needs both
+        if any(len(np.unique(labels[:, column])) < 2 for column in range(labels.shape[1])):
+            return 'skipped'
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + new_trees)
+        model.fit(X, y)
+        model.set_params(warm_start=False)
+        return 'warm_start'
+    
+    raise ValueError(f"{type(model).__name__} models cannot be updated incrementally; retrain them")
+
+
+def _chunked_estimator(model, n_chunks: int):
+    """The estimator of ``model`` set up to be fitted one chunk at a time.
+
+    Scaling pipelines give up their scaler, as chunks arrive already scaled; a
+    random forest's ``n_estimators`` becomes its even share of trees for each
+    of ``n_chunks``.
+    """
+    if isinstance(model, Pipeline):
+        model = model.steps[-1][1]
+    if isinstance(model, RandomForestClassifier):
+        model.set_params(n_estimators=max(1, -(-model.n_estimators // n_chunks)), warm_start=True)
+    return model
+
+
+def _fit_chunk(model, X: np.ndarray, y: np.ndarray, trees: int):
+    """Fit one chunk: ``partial_fit``, or ``trees`` more trees of a random forest"""
+    if not isinstance(model, RandomForestClassifier):
+        if len(y):
+            model.partial_fit(X, y, classes=np.array([0, 1]))
+        return
+    
+    # warm_start recomputes classes_ from each chunk, so every chunk needs both
+    if len(np.unique(y)) < 2:
+        return
+    model.set_params(n_estimators=len(getattr(model, 'estimators_', [])) + trees)
+    model.fit(X, y)
+
+
+def _is_fitted(model) -> bool:
+    return hasattr(model, 'classes_')
+
+
+# The detector of a label worker process, set once when the process starts
+_worker_detector = None
+
+
+def _set_worker_detector(detector):
+    global _worker_detector
+    _worker_detector = detector
+
+
+def _detect_in_worker(file_path: str) -> Tuple[str, Optional[List[CodeSmell]], Optional['LabelFailure']]:
+    return _detect_file(_worker_detector, file_path)
+
+
+def _detect_file(detector, file_path: str) -> Tuple[str, Optional[List[CodeSmell]], Optional['LabelFailure']]:
+    try:
+        return file_path, detector.detect_smells(file_path).smells, None
+    except Exception as e:
+        return file_path, None, _label_failure(file_path, e)
+
+
+def _label_failure(file_path: str, error: Exception) -> 'LabelFailure':
+    return LabelFailure(file_path, type(error).__name__, str(error))
+
+
+def _output_classes(model) -> List[np.ndarray]:
+    if isinstance(model, MultiOutputClassifier):
+        return [estimator.classes_ for estimator in model.estimators_]
+    if getattr(model, 'n_outputs_', 1) == 1:
+        return [model.classes_]
+    return model.classes_
+
+
+@dataclass
+class LabelFailure:
+    """A file whose smells could not be detected"""
+    file_path: str
+    error_type: str
+    message: str
 
 
 class TrainingDataGenerator:
-    def __init__(self):
+    """Labels files with the rule-based SmellDetector.
+
+    With ``n_jobs`` other than None or 1, files are labelled in that many
+    processes (-1 for one per CPU). With ``cache_dir``, smells are cached by
+    file content and a digest of the rules (see ``LabelCache``), so files
+    unchanged since an earlier run under the same rules are not detected again.
+    Files that fail are left out and recorded in ``failures``.
+    """
+    
+    def __init__(self, n_jobs: Optional[int] = None, cache_dir: Optional[str] = None):
         self.smell_detector = None
+        self.n_jobs = n_jobs
+        self.cache_dir = cache_dir
+        self.label_cache: Optional[LabelCache] = None
+        self.failures: List[LabelFailure] = []
     
     def generate_training_data(self, file_paths: List[str]) -> List[Tuple[str, List[CodeSmell]]]:
         from ..detectors.smell_detector import SmellDetector
         
         if not self.smell_detector:
             self.smell_detector = SmellDetector()
+        self.failures = []
         
-        training_data = []
+        if self.cache_dir is not None and self.label_cache is None:
+            self.label_cache = LabelCache()
+            self.label_cache.bind(rules_digest(self.smell_detector.rules))
+            self.label_cache.load(self.cache_dir)
         
+        labels: Dict[str, List[CodeSmell]] = {}
+        keys: Dict[str, str] = {}
+        pending = []
         for file_path in file_paths:
+            if self.label_cache is None:
+                pending.append(file_path)
+                continue
             try:
-                analysis = self.smell_detector.detect_smells(file_path)
-                training_data.append((file_path, analysis.smells))
-            except Exception as e:
-                print(f"Error processing {file_path}: {e}")
+                keys[file_path] = content_digest(Path(file_path).read_bytes())
+            except OSError as e:
+                self.failures.append(_label_failure(file_path, e))
                 continue
+            smells = self.label_cache.lookup(keys[file_path], file_path)
+            if smells is None:
+                pending.append(file_path)
+            else:
+                labels[file_path] = smells
+        
+        for file_path, smells, failure in self._detect(pending):
+            if failure is not None:
+                self.failures.append(failure)
+                continue
+            labels[file_path] = smells
+            if self.label_cache is not None:
+                self.label_cache.store(keys[file_path], smells)
+        
+        if self.label_cache is not None and pending:
+            self.label_cache.save(self.cache_dir)
+        
+        return [(file_path, labels[file_path]) for file_path in file_paths if file_path in labels]
+    
+    def failure_report(self) -> Dict[str, Any]:
+        """Counts of the last run and its failures, grouped by error type"""
+        by_type: Dict[str, List[Dict[str, str]]] = {}
+        for failure in self.failures:
+            by_type.setdefault(failure.error_type, []).append(
+                {'file_path': failure.file_path, 'message': failure.message}
+            )
+        return {
+            'failed': len(self.failures),
+            'cache_hits': self.label_cache.hits if self.label_cache else 0,
+            'cache_misses': self.label_cache.misses if self.label_cache else 0,
+            'errors': by_type
+        }
+    
+    def _detect(self, file_paths: List[str]) -> List[Tuple[str, Optional[List[CodeSmell]], Optional[LabelFailure]]]:
+        if self.n_jobs is None or self.n_jobs == 1 or len(file_paths) < 2:
+            return [_detect_file(self.smell_detector, file_path) for file_path in file_paths]
+        
+        from concurrent.futures import ProcessPoolExecutor
         
-        return training_data
+        workers = min(len(file_paths), (os.cpu_count() or 1) if self.n_jobs < 0 else self.n_jobs)
+        with ProcessPoolExecutor(workers, initializer=_set_worker_detector, initargs=(self.smell_detector,)) as executor:
+            chunksize = max(1, len(file_paths) // (workers * 4))
+            return list(executor.map(_detect_in_worker, file_paths, chunksize=chunksize))
     
     def create_synthetic_smells(self, file_path: str, smell_types: List[SmellType]) -> List[CodeSmell]:
         synthetic_smells = []
@@ -0,0 +1,145 @@
+import numpy as np
+from pathlib import Path
+from typing import List, Iterable, Iterator, Optional, Tuple
+
+from sklearn.preprocessing import StandardScaler
+
+from ..core.models import SmellType, CodeSmell
+from .feature_extractor import FeatureExtractor
+
+
+FEATURES_FILE = 'features.f64'
+LABELS_FILE = 'labels.u8'
+HELD_OUT_FILE = 'held_out.u8'
+
+
+class RunningStats:
+    """Per-column mean and variance accumulated one chunk of rows at a time.
+
+    Chunks are merged with the pairwise form of Welford's update (Chan et al.),
+    which keeps the sum of squared deviations numerically stable no matter how
+    many rows are seen.
+    """
+
+    def __init__(self, n_features: int):
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self._squared_deviations = np.zeros(n_features)
+
+    @property
+    def variance(self) -> np.ndarray:
+        return self._squared_deviations / self.count if self.count else np.zeros_like(self.mean)
+
+    def update(self, rows: np.ndarray):
+        if not len(rows):
+            return
+        count = len(rows)
+        mean = rows.mean(axis=0)
+        squared_deviations = ((rows - mean) ** 2).sum(axis=0)
+
+        total = self.count + count
+        delta = mean - self.mean
+        self._squared_deviations += squared_deviations + delta ** 2 * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+
+    def to_scaler(self) -> StandardScaler:
+        """A fitted StandardScaler equivalent to one fitted on every row seen"""
+        scaler = StandardScaler()
+        scale = np.sqrt(self.variance)
+        scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+
+        scaler.mean_ = self.mean.copy()
+        scaler.var_ = self.variance
+        scaler.scale_ = scale
+        scaler.n_samples_seen_ = self.count
+        scaler.n_features_in_ = len(self.mean)
+        return scaler
+
+
+class TrainingMatrix:
+    """Features and labels of a training corpus in disk-backed arrays.
+
+    ``write`` and ``write_chunks`` stream rows chunk by chunk into raw files
+    under ``directory``; only one chunk of feature rows is held in memory at a
+    time. Each row is assigned to the held-out split at random as it is
+    written, and ``stats`` accumulates the feature statistics of the training
+    rows.
+    """
+
+    def __init__(self, directory: str, n_features: int):
+        self.directory = Path(directory)
+        self.n_features = n_features
+        self.rows = 0
+        self.stats = RunningStats(n_features)
+
+    def write(self, extractor: FeatureExtractor, training_data: Iterable[Tuple[str, List[CodeSmell]]],
+              chunk_size: int, test_size: float = 0.2, n_jobs: Optional[int] = None):
+        """Append the features and labels of labelled files, ``chunk_size`` files at a time"""
+        self.write_chunks(file_chunks(extractor, training_data, chunk_size, n_jobs), test_size)
+
+    def write_chunks(self, chunks: Iterable[Tuple[np.ndarray, np.ndarray]], test_size: float = 0.2):
+        """Append chunks of feature rows and label rows, e.g. from ``SyntheticGenerator.iter_chunks``"""
+        rng = np.random.default_rng(42 + self.rows)
+
+        with open(self.directory / FEATURES_FILE, 'ab') as features_file, \
+                open(self.directory / LABELS_FILE, 'ab') as labels_file, \
+                open(self.directory / HELD_OUT_FILE, 'ab') as held_out_file:
+            for X, Y in chunks:
+                X = np.ascontiguousarray(X, dtype=np.float64)
+                held_out = rng.random(len(X)) < test_size
+
+                features_file.write(X.tobytes())
+                labels_file.write(np.ascontiguousarray(Y, dtype=np.uint8).tobytes())
+                held_out_file.write(held_out.astype(np.uint8).tobytes())
+                self.stats.update(X[~held_out])
+                self.rows += len(X)
+
+    @property
+    def features(self) -> np.ndarray:
+        return self._open(FEATURES_FILE, np.float64, (self.rows, self.n_features))
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self._open(LABELS_FILE, np.uint8, (self.rows, len(SmellType)))
+
+    @property
+    def held_out(self) -> np.ndarray:
+        return self._open(HELD_OUT_FILE, np.uint8, (self.rows,)).astype(bool)
+
+    def chunks(self, chunk_size: int, shuffle: bool = False) -> Iterator[slice]:
+        """Row ranges of ``chunk_size`` rows, in a fixed random order with ``shuffle``"""
+        starts = np.arange(0, self.rows, chunk_size)
+        if shuffle:
+            starts = np.random.default_rng(42).permutation(starts)
+        for start in starts:
+            yield slice(int(start), int(min(start + chunk_size, self.rows)))
+
+    def _open(self, name: str, dtype, shape: Tuple[int, ...]) -> np.ndarray:
+        if not self.rows:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self.directory / name, dtype=dtype, mode='r', shape=shape)
+
+
+def file_chunks(extractor: FeatureExtractor, training_data: Iterable[Tuple[str, List[CodeSmell]]],
+                chunk_size: int, n_jobs: Optional[int] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Feature rows and label rows, one column per SmellType, of labelled files"""
+    smell_columns = {smell_type: column for column, smell_type in enumerate(SmellType)}
+    for chunk in _chunked(training_data, chunk_size):
+        X = extractor.extract_features_batch([file_path for file_path, _ in chunk], n_jobs=n_jobs)
+        Y = np.zeros((len(chunk), len(smell_columns)), dtype=np.uint8)
+        for row, (_, smells) in enumerate(chunk):
+            for smell in smells:
+                Y[row, smell_columns[smell.smell_type]] = 1
+        yield X, Y
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import numpy as np
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Optional, Set
+
+from ..core.models import SmellType
+
+
+CACHE_FILE = 'predictions.npz'
+KEY_SIZE = 16
+
+
+class PredictionCache:
+    """A bounded, least-recently-used memo of smell scores per feature vector.
+
+    Entries are keyed by a digest of the feature row and hold the score of
+    every smell type computed for it so far. The cache belongs to one
+    ``model_key`` (see ``SmellPredictor.model_key``); binding it to another
+    key empties it, so scores of retrained or updated models are never reused.
+
+    With ``track_stored``, the keys stored are also remembered until
+    ``take_stored``, so that a worker process can hand the entries it scored
+    back to its parent's cache (see ``merge``).
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.model_key: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.track_stored = False
+        self._stored: Set[bytes] = set()
+        self._entries: 'OrderedDict[bytes, Dict[SmellType, float]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def bind(self, model_key: str):
+        if model_key != self.model_key:
+            self._entries.clear()
+            self.model_key = model_key
+
+    def lookup(self, key: bytes, smell_types: List[SmellType]) -> Optional[Dict[SmellType, float]]:
+        """Cached scores for every one of ``smell_types``, or None; counts a hit or a miss"""
+        entry = self._entries.get(key)
+        if entry is None or any(smell_type not in entry for smell_type in smell_types):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def store(self, key: bytes, scores: Dict[SmellType, float]):
+        self._put(key, scores)
+        if self.track_stored:
+            self._stored.add(key)
+
+    def take_stored(self) -> Dict[bytes, Dict[SmellType, float]]:
+        """The entries stored since the last call, while ``track_stored`` is set"""
+        entries = {key: dict(self._entries[key]) for key in self._stored if key in self._entries}
+        self._stored.clear()
+        return entries
+
+    def merge(self, entries: Dict[bytes, Dict[SmellType, float]], hits: int = 0, misses: int = 0):
+        """Add entries and lookup counts of another cache, e.g. one in a worker process"""
+        for key, scores in entries.items():
+            self._put(key, scores)
+        self.hits += hits
+        self.misses += misses
+
+    def _put(self, key: bytes, scores: Dict[SmellType, float]):
+        entry = self._entries.setdefault(key, {})
+        entry.update(scores)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self, cache_dir: str):
+        """Write the entries, oldest first, to ``cache_dir``; atomically replaces an earlier file"""
+        smell_types = sorted({smell_type for entry in self._entries.values() for smell_type in entry},
+                             key=lambda smell_type: smell_type.value)
+        columns = {smell_type: column for column, smell_type in enumerate(smell_types)}
+        scores = np.full((len(self._entries), len(smell_types)), np.nan)
+        for row, entry in enumerate(self._entries.values()):
+            for smell_type, score in entry.items():
+                scores[row, columns[smell_type]] = score
+
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        temporary = Path(cache_dir) / f"{CACHE_FILE}.tmp.npz"
+        np.savez(
+            temporary,
+            model_key=np.array(self.model_key or ''),
+            smell_types=np.array([smell_type.value for smell_type in smell_types]),
+            keys=np.frombuffer(b''.join(self._entries), dtype=np.uint8).reshape(-1, KEY_SIZE),
+            scores=scores
+        )
+        os.replace(temporary, Path(cache_dir) / CACHE_FILE)
+
+    def load(self, cache_dir: str):
+        """Read entries saved by ``save``; entries of another model key are ignored"""
+        path = Path(cache_dir) / CACHE_FILE
+        if not path.exists():
+            return
+
+        with np.load(path, allow_pickle=False) as data:
+            if str(data['model_key']) != self.model_key:
+                return
+            smell_types = [SmellType(value) for value in data['smell_types']]
+            for key, row in zip(data['keys'], data['scores']):
+                self._put(key.tobytes(), {
+                    smell_type: float(score)
+                    for smell_type, score in zip(smell_types, row) if not np.isnan(score)
+                })
+
+
+def row_keys(features) -> List[bytes]:
+    """A digest per row of a dense or CSR feature matrix"""
+    if hasattr(features, 'indptr'):
+        return [
+            _digest(features.indices[start:end].tobytes() + features.data[start:end].tobytes())
+            for start, end in zip(features.indptr[:-1], features.indptr[1:])
+        ]
+    features = np.ascontiguousarray(features, dtype=np.float64)
+    return [_digest(row.tobytes()) for row in features]
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=KEY_SIZE).digest()
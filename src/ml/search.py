@@ -0,0 +1,201 @@
+import math
+import time
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+from scipy.stats import loguniform, randint
+from joblib import effective_n_jobs
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV, ParameterSampler
+
+from .evaluation import measure_latency
+
+
+# Hyperparameter distributions per model type; pipeline steps use make_pipeline's step names
+SEARCH_SPACES = {
+    'random_forest': {
+        'n_estimators': [25, 50, 100, 200],
+        'max_depth': [4, 6, 10, 16, None],
+        'min_samples_split': randint(2, 11),
+        'min_samples_leaf': randint(1, 5),
+        'max_features': ['sqrt', 'log2', None]
+    },
+    'gradient_boosting': {
+        'n_estimators': [25, 50, 100, 200],
+        'learning_rate': loguniform(0.01, 0.3),
+        'max_depth': [2, 3, 5],
+        'subsample': [0.7, 0.85, 1.0]
+    },
+    'logistic_regression': {
+        'logisticregression__C': loguniform(1e-3, 1e2)
+    },
+    'svm': {
+        'svc__C': loguniform(1e-2, 1e2),
+        'svc__gamma': ['scale', 0.01, 0.1, 1.0]
+    },
+    'sgd': {
+        'sgdclassifier__alpha': loguniform(1e-6, 1e-2),
+        'sgdclassifier__penalty': ['l2', 'l1', 'elasticnet']
+    },
+    'naive_bayes': {
+        'var_smoothing': loguniform(1e-11, 1e-7)
+    }
+}
+
+HALVING_FACTOR = 3
+MAX_CANDIDATES = 243
+FINALISTS = 3
+
+
+def search_model(model, model_type: str, X_train, y_train: np.ndarray, X_test, cv: int,
+                 budget_seconds: float, n_jobs: Optional[int] = None,
+                 accuracy_tolerance: float = 0.01) -> Tuple[Any, Dict[str, Any]]:
+    """Tune an unfitted model with successive halving under a wall-clock budget.
+
+    A few sampled configurations are fitted and timed on a ninth of the
+    samples, then on a third if the budget allows. The number of sampled
+    candidates is the largest whose estimated halving cost, in fits across
+    ``cv`` folds spread over ``n_jobs`` processes, plus the refits of its
+    finalists fits in what is left of ``budget_seconds``. Finalists within ``accuracy_tolerance`` of the best
+    cross-validated accuracy are refitted while time remains, and the one with
+    the lowest latency on ``X_test`` wins, so a smaller model is preferred
+    when accuracy is a tie. If not even two candidates fit, no search runs and
+    the model keeps its own configuration.
+
+    The budget can only be overrun by the floor every call pays: the probe on
+    a ninth of the samples, one fit on all of them and its latency timing.
+
+    Returns the winner, fitted on the training split, and a report with its
+    parameters, scores and the candidate count.
+    """
+    start = time.perf_counter()
+    deadline = start + budget_seconds
+    workers = effective_n_jobs(n_jobs)
+    n_samples = len(y_train)
+
+    # Fit time is probed on a ninth of the samples and, if time allows, on a third
+    rows = np.random.default_rng(0).permutation(n_samples)
+    small, large = (np.sort(rows[:max(4 * cv, n_samples // share)]) for share in (9, HALVING_FACTOR))
+    small_seconds = _probe_seconds(model, model_type, X_train[small], y_train[small])
+    # Scaled up without a fixed cost, the small probe bounds larger fits from above
+    fit_seconds = (0.0, small_seconds / len(small))
+    large_probe = HALVING_FACTOR * small_seconds * len(large) / len(small)
+    if len(small) < len(large) and time.perf_counter() + large_probe < deadline:
+        large_seconds = _probe_seconds(model, model_type, X_train[large], y_train[large])
+        per_sample = max(0.0, large_seconds - small_seconds) / (len(large) - len(small))
+        fit_seconds = (max(0.0, large_seconds - per_sample * len(large)), per_sample)
+
+    n_candidates = candidates_for_budget(deadline - time.perf_counter(), fit_seconds, y_train, cv, workers)
+    finalists = []
+    if n_candidates:
+        search = HalvingRandomSearchCV(
+            clone(model), SEARCH_SPACES[model_type], n_candidates=n_candidates, factor=HALVING_FACTOR,
+            min_resources=min_resources(n_candidates, y_train, cv), cv=cv, scoring='accuracy',
+            refit=False, n_jobs=n_jobs, random_state=42
+        ).fit(X_train, y_train)
+        finalists = _finalists(search.cv_results_, accuracy_tolerance)
+
+    # Keep the defaults if no candidate could be scored
+    finalists = finalists or [({}, float('nan'))]
+    refit_seconds = fit_seconds[0] + fit_seconds[1] * n_samples
+    best = None
+    for params, score in finalists:
+        if best is not None and time.perf_counter() + refit_seconds > deadline:
+            break
+        candidate = clone(model).set_params(**params).fit(X_train, y_train)
+        latency = measure_latency(candidate.predict_proba, X_test, repeats=5)
+        if best is None or latency < best[2]:
+            best = (candidate, params, latency, score)
+
+    candidate, params, latency, score = best
+    report = {
+        'params': _json_params(params),
+        'cv_accuracy': score,
+        'latency_ms': latency,
+        'candidates': n_candidates,
+        'search_seconds': time.perf_counter() - start
+    }
+    return candidate, report
+
+
+def candidates_for_budget(budget_seconds: float, fit_seconds: Tuple[float, float], y: np.ndarray, cv: int,
+                          n_jobs: int = 1) -> int:
+    """Most candidates, up to MAX_CANDIDATES, whose search and finalist refits fit in the budget.
+
+    ``budget_seconds`` is wall-clock time: halving fits are spread over
+    ``n_jobs`` processes, while up to FINALISTS finalists are refitted one
+    after another on every sample. 0 when not even two candidates fit.
+    """
+    fixed, per_sample = fit_seconds
+    refit_seconds = fixed + per_sample * len(y)
+    best = 0
+    for n_candidates in range(2, MAX_CANDIDATES + 1):
+        cost = halving_cost(n_candidates, fit_seconds, y, cv) / n_jobs + min(FINALISTS, n_candidates) * refit_seconds
+        if cost > budget_seconds:
+            break
+        best = n_candidates
+    return best
+
+
+def halving_cost(n_candidates: int, fit_seconds: Tuple[float, float], y: np.ndarray, cv: int) -> float:
+    """Estimated seconds of fitting in a sample-halving search.
+
+    Iteration ``i`` keeps ``n_candidates / factor**i`` candidates, each
+    fitted ``cv`` times on ``factor**i`` times ``min_resources`` samples.
+    ``fit_seconds`` is the fixed and the per-sample time of one fit.
+    """
+    n_samples = len(y)
+    resources = min_resources(n_candidates, y, cv)
+    possible = 1 + int(math.floor(math.log(max(1, n_samples // resources), HALVING_FACTOR)))
+    fixed, per_sample = fit_seconds
+    fold_fraction = (cv - 1) / cv
+
+    return sum(
+        math.ceil(n_candidates / HALVING_FACTOR ** i) * cv
+        * (fixed + per_sample * fold_fraction * min(n_samples, resources * HALVING_FACTOR ** i))
+        for i in range(min(_required_iterations(n_candidates), possible))
+    )
+
+
+def min_resources(n_candidates: int, y: np.ndarray, cv: int) -> int:
+    """Samples in the first halving iteration.
+
+    As few as let the last iteration use every sample, but enough that the
+    rarer class expects ``2 * cv`` samples, so every fold sees both classes.
+    """
+    n_samples = len(y)
+    rarer = max(1, min(np.bincount(y.astype(int), minlength=2)))
+    floor = math.ceil(2 * cv * n_samples / rarer)
+    return min(n_samples, max(floor, n_samples // HALVING_FACTOR ** (_required_iterations(n_candidates) - 1)))
+
+
+def _probe_seconds(model, model_type: str, X, y: np.ndarray) -> float:
+    """Mean fit time of a few sampled configurations"""
+    start = time.perf_counter()
+    for params in ParameterSampler(SEARCH_SPACES[model_type], HALVING_FACTOR, random_state=0):
+        clone(model).set_params(**params).fit(X, y)
+    return (time.perf_counter() - start) / HALVING_FACTOR
+
+
+def _required_iterations(n_candidates: int) -> int:
+    return 1 + int(math.floor(math.log(n_candidates, HALVING_FACTOR)))
+
+
+def _finalists(cv_results: Dict[str, Any], accuracy_tolerance: float) -> List[Tuple[Dict[str, Any], float]]:
+    """Candidates of the last halving iteration within the tolerance of its best score"""
+    iterations = np.asarray(cv_results['iter'])
+    last = np.flatnonzero(iterations == iterations.max())
+    scores = np.nan_to_num(np.asarray(cv_results['mean_test_score'], dtype=float), nan=-np.inf)
+    order = last[np.argsort(-scores[last], kind='stable')]
+    best_score = scores[last].max()
+
+    return [
+        (cv_results['params'][index], float(scores[index]))
+        for index in order[:FINALISTS]
+        if np.isfinite(scores[index]) and scores[index] >= best_score - accuracy_tolerance
+    ]
+
+
+def _json_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: value.item() if hasattr(value, 'item') else value for name, value in params.items()}
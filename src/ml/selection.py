@@ -0,0 +1,73 @@
+import numpy as np
+from typing import List, Dict, Callable, Iterable, Tuple
+
+from sklearn.metrics import accuracy_score
+
+from .feature_extractor import FEATURE_PASSES
+
+
+def feature_costs(pass_costs: Dict[str, float]) -> Dict[str, float]:
+    """Cost of each named feature: the cost of the pass that computes it"""
+    return {
+        feature: pass_costs[name]
+        for name, features in FEATURE_PASSES.items()
+        for feature in features
+    }
+
+
+def subset_cost(feature_names: Iterable[str], pass_costs: Dict[str, float]) -> float:
+    """Seconds per file to compute a feature subset; each pass it touches counts once"""
+    needed = set(feature_names)
+    return sum(cost for name, cost in pass_costs.items() if needed.intersection(FEATURE_PASSES[name]))
+
+
+def select_features(create_model: Callable, X_train, y_train: np.ndarray, X_val, y_val: np.ndarray,
+                    feature_names: List[str], pass_costs: Dict[str, float],
+                    max_accuracy_loss: float = 0.01, required_passes: Iterable[str] = ()) -> List[str]:
+    """The cheapest named-feature subset whose model stays within an accuracy loss.
+
+    Passes are dropped greedily, most expensive first and in repeated rounds,
+    as long as a model refitted without their features keeps its validation
+    accuracy within ``max_accuracy_loss`` of the model on every feature. The
+    validation rows must not be the split the chosen model is reported on, or
+    that accuracy is biased towards the subset picked to maximise it.
+    Features the remaining model never splits on are then dropped if that
+    keeps the accuracy too. ``required_passes`` are never dropped. Columns
+    past the named features, such as hashed n-grams, are always kept.
+    """
+    extra_columns = list(range(len(feature_names), X_train.shape[1]))
+
+    def accuracy(subset: List[str]) -> Tuple[float, object]:
+        columns = [feature_names.index(name) for name in subset] + extra_columns
+        model = create_model().fit(X_train[:, columns], y_train)
+        return accuracy_score(y_val, model.predict(X_val[:, columns])), model
+
+    floor = accuracy(feature_names)[0] - max_accuracy_loss
+    kept_passes = list(FEATURE_PASSES)
+
+    dropped = True
+    while dropped:
+        dropped = False
+        for name in sorted(kept_passes, key=lambda name: pass_costs.get(name, 0.0), reverse=True):
+            trial = [kept for kept in kept_passes if kept != name]
+            if name in required_passes or not trial:
+                continue
+            if accuracy(_pass_features(trial, feature_names))[0] >= floor:
+                kept_passes = trial
+                dropped = True
+
+    subset = _pass_features(kept_passes, feature_names)
+    model = accuracy(subset)[1]
+
+    importances = getattr(model[-1] if hasattr(model, 'steps') else model, 'feature_importances_', None)
+    if importances is not None:
+        used = [name for name, importance in zip(subset, importances) if importance > 0]
+        if used and len(used) < len(subset) and accuracy(used)[0] >= floor:
+            subset = used
+
+    return subset
+
+
+def _pass_features(passes: List[str], feature_names: List[str]) -> List[str]:
+    features = {feature for name in passes for feature in FEATURE_PASSES[name]}
+    return [name for name in feature_names if name in features]
@@ -0,0 +1,286 @@
+import ast
+import os
+import numpy as np
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Iterator, Optional, Tuple
+
+from ..core.models import SmellType
+from ..detectors.smell_detector import (
+    SmellDetector, LongMethodRule, ComplexConditionalRule, HighComplexityRule, LargeClassRule
+)
+from .feature_extractor import FeatureExtractor
+
+
+# Smell types the generator can plant; each has a rule in SmellDetector
+PLANTED_SMELLS = (
+    SmellType.LONG_METHOD, SmellType.COMPLEX_CONDITIONAL, SmellType.HIGH_COMPLEXITY,
+    SmellType.POOR_NAMING, SmellType.LARGE_CLASS, SmellType.DEAD_CODE
+)
+
+VERBS = ('load', 'parse', 'build', 'compute', 'update', 'render', 'validate', 'merge', 'send', 'collect')
+NOUNS = ('user', 'order', 'config', 'report', 'item', 'record', 'cache', 'token', 'batch', 'event')
+POOR_NAMES = ('x', 'f', 'do', 'go', 'foo', 'bar', 'baz', 'temp', 'tmp')
+
+
+@dataclass
+class SyntheticSample:
+    """A generated module, its unparsed source and the smell types it is labelled with"""
+    tree: ast.Module
+    source: str
+    smell_types: List[SmellType]
+
+
+class SyntheticGenerator:
+    """Builds varied Python modules as ASTs, with smells planted at random.
+
+    Each sample plants every smell in PLANTED_SMELLS with probability
+    ``smell_rate``. ``intensity`` sets how far a planted smell goes past its
+    rule's threshold: just past it at 0, up to twice the threshold at 1.
+    Functions without a planted smell stay at or under the thresholds.
+    ``noise`` is the chance of a filler statement (calls, loops, try blocks,
+    comprehensions) after each generated statement; filler can push code past
+    a threshold on its own.
+
+    Labels come from running SmellDetector's rules on the built tree, so they
+    always agree with the labels of real files. Line numbers are assigned the
+    way ``ast.unparse`` lays the source out, so nothing is ever re-parsed.
+    ``label_noise`` then flips each label with that probability.
+    """
+
+    def __init__(self, intensity: float = 0.5, smell_rate: float = 0.3, noise: float = 0.2,
+                 label_noise: float = 0.0, seed: Optional[int] = None):
+        self.intensity = intensity
+        self.smell_rate = smell_rate
+        self.noise = noise
+        self.label_noise = label_noise
+        self.rng = np.random.default_rng(seed)
+        self.rules = SmellDetector().rules
+        self.max_lines = _rule(self.rules, LongMethodRule).max_lines
+        self.max_conditions = _rule(self.rules, ComplexConditionalRule).max_conditions
+        self.max_complexity = _rule(self.rules, HighComplexityRule).max_complexity
+        self.max_methods = _rule(self.rules, LargeClassRule).max_methods
+
+    def sample(self) -> SyntheticSample:
+        planted = {smell_type for smell_type in PLANTED_SMELLS if self.rng.random() < self.smell_rate}
+        body = []
+
+        if self.rng.random() < 0.5:
+            body.append(ast.Expr(ast.Constant(f"{self._choice(VERBS).capitalize()} {self._choice(NOUNS)}s.")))
+
+        functions = int(self.rng.integers(1, 4))
+        function_smells = planted - {SmellType.LARGE_CLASS}
+        for index in range(functions):
+            # Planted function smells all go into the first function
+            body.append(self._function(function_smells if index == 0 else set()))
+
+        if SmellType.LARGE_CLASS in planted or self.rng.random() < 0.3:
+            body.append(self._class(SmellType.LARGE_CLASS in planted))
+
+        tree = ast.Module(body=body, type_ignores=[])
+        _locate(tree.body, 1, 0)
+        source = ast.unparse(tree)
+
+        labels = {smell.smell_type for rule in self.rules for smell in rule.detect(tree, '<synthetic>', source)}
+        smell_types = [
+            smell_type for smell_type in SmellType
+            if (smell_type in labels) != (self.rng.random() < self.label_noise)
+        ]
+        return SyntheticSample(tree, source, smell_types)
+
+    def iter_samples(self, count: int) -> Iterator[SyntheticSample]:
+        for _ in range(count):
+            yield self.sample()
+
+    def iter_chunks(self, extractor: FeatureExtractor, count: int, chunk_size: int,
+                    n_jobs: Optional[int] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Feature rows and label rows, one column per SmellType, for ``count`` samples.
+
+        Every chunk gets its own seed drawn from this generator, so the chunks
+        are the same whether they are built here or, with ``n_jobs`` other than
+        None or 1, in that many processes (-1 for one per CPU).
+        """
+        sizes = [min(chunk_size, count - start) for start in range(0, count, chunk_size)]
+        seeds = self.rng.integers(0, 2 ** 63, len(sizes))
+        settings = (self.intensity, self.smell_rate, self.noise, self.label_noise)
+        tasks = [(settings, int(seed), size, extractor) for seed, size in zip(seeds, sizes)]
+
+        if n_jobs is None or n_jobs == 1 or len(tasks) < 2:
+            for task in tasks:
+                yield _build_chunk(task)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = min(len(tasks), (os.cpu_count() or 1) if n_jobs < 0 else n_jobs)
+        with ProcessPoolExecutor(workers) as executor:
+            # Submit a few chunks ahead of the consumer, not all of them
+            for start in range(0, len(tasks), workers * 2):
+                yield from executor.map(_build_chunk, tasks[start:start + workers * 2])
+
+    def rows(self, extractor: FeatureExtractor, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Feature rows and label rows of ``count`` samples"""
+        smell_columns = {smell_type: column for column, smell_type in enumerate(SmellType)}
+        X = np.zeros((count, extractor.n_features))
+        Y = np.zeros((count, len(smell_columns)), dtype=np.uint8)
+        for row, sample in enumerate(self.iter_samples(count)):
+            X[row] = extractor.extract_tree_features(sample.tree, sample.source)
+            for smell_type in sample.smell_types:
+                Y[row, smell_columns[smell_type]] = 1
+        return X, Y
+
+    def write_corpus(self, directory: str, count: int) -> List[str]:
+        """Write ``count`` samples as source files; returns their paths"""
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        file_paths = []
+        for index, sample in enumerate(self.iter_samples(count)):
+            file_path = Path(directory) / f"sample_{index:06d}.py"
+            file_path.write_text(sample.source + '\n')
+            file_paths.append(str(file_path))
+        return file_paths
+
+    def _function(self, planted: set, method: bool = False) -> ast.FunctionDef:
+        if SmellType.POOR_NAMING in planted:
+            name = self._choice(POOR_NAMES)
+        else:
+            name = f"{self._choice(VERBS)}_{self._choice(NOUNS)}"
+        arguments = [ast.arg('self')] if method else []
+        arguments += [ast.arg(str(name)) for name in self.rng.choice(NOUNS, int(self.rng.integers(0, 4)), replace=False)]
+
+        body = []
+        if self.rng.random() < 0.5:
+            body.append(ast.Expr(ast.Constant(f"{name.replace('_', ' ').capitalize()}.")))
+
+        # Cyclomatic complexity is one plus a branch per if and loop
+        branches = self._count(SmellType.HIGH_COMPLEXITY in planted, self.max_complexity - 1,
+                               upper=1 if method else 4)
+        for _ in range(branches):
+            self._add(body, self._branch())
+        if SmellType.COMPLEX_CONDITIONAL in planted or self.rng.random() < 0.3:
+            conditions = self._count(SmellType.COMPLEX_CONDITIONAL in planted, self.max_conditions)
+            self._add(body, ast.If(self._condition(conditions), [self._assignment()], []))
+        if SmellType.DEAD_CODE in planted:
+            self._add(body, ast.If(ast.Constant(self._choice((False, 0, None, ''))), [self._call_statement()], []))
+
+        # The method length is the lines after the def line; class methods stay short
+        length = self._count(SmellType.LONG_METHOD in planted, self.max_lines, upper=4 if method else 12)
+        while _lines(body) + 1 < length:
+            self._add(body, self._assignment())
+        body.append(ast.Return(self._expression()))
+
+        return ast.FunctionDef(name, ast.arguments([], arguments, None, [], [], None, []), body, [], None, None)
+
+    def _class(self, large: bool) -> ast.ClassDef:
+        methods = self._count(large, self.max_methods, upper=6)
+        body = [self._function(set(), method=True) for _ in range(methods)]
+        return ast.ClassDef(f"{self._choice(NOUNS).capitalize()}Service", [], [], body, [])
+
+    def _count(self, planted: bool, threshold: int, upper: Optional[int] = None) -> int:
+        """A count past ``threshold`` when planted, else up to ``upper`` (at most the threshold)"""
+        if planted:
+            return threshold + 1 + int(self.rng.integers(0, int(self.intensity * threshold) + 1))
+        return int(self.rng.integers(1, min(threshold, upper or threshold) + 1))
+
+    def _add(self, body: list, statement: ast.stmt):
+        body.append(statement)
+        if self.rng.random() < self.noise:
+            body.append(self._filler())
+
+    def _filler(self) -> ast.stmt:
+        kind = self.rng.integers(0, 4)
+        if kind == 0:
+            return self._call_statement()
+        if kind == 1:
+            return ast.For(ast.Name('item', ast.Store()), self._name(), [self._call_statement()], [], None)
+        if kind == 2:
+            handler = ast.ExceptHandler(ast.Name(self._choice(('ValueError', 'KeyError')), ast.Load()), None,
+                                        [ast.Pass()])
+            return ast.Try([self._call_statement()], [handler], [], [])
+        return ast.Assign([ast.Name(self._choice(NOUNS) + 's', ast.Store())], ast.ListComp(
+            self._name(), [ast.comprehension(ast.Name('item', ast.Store()), self._name(), [], 0)]
+        ), None)
+
+    def _branch(self) -> ast.stmt:
+        if self.rng.random() < 0.6:
+            return ast.If(self._condition(int(self.rng.integers(1, 3))), [self._assignment()], [])
+        return ast.For(ast.Name('index', ast.Store()),
+                       ast.Call(ast.Name('range', ast.Load()), [self._number()], []), [self._assignment()], [], None)
+
+    def _condition(self, conditions: int) -> ast.expr:
+        comparisons = [
+            ast.Compare(self._name(), [self._choice((ast.Gt(), ast.Lt(), ast.Eq(), ast.NotEq()))], [self._number()])
+            for _ in range(conditions)
+        ]
+        if conditions == 1:
+            return comparisons[0]
+        return ast.BoolOp(self._choice((ast.And(), ast.Or())), comparisons)
+
+    def _assignment(self) -> ast.stmt:
+        return ast.Assign([ast.Name(self._choice(NOUNS), ast.Store())], self._expression(), None)
+
+    def _call_statement(self) -> ast.stmt:
+        return ast.Expr(ast.Call(ast.Name(self._choice(('print', 'log', 'notify')), ast.Load()),
+                                 [self._expression()], []))
+
+    def _expression(self) -> ast.expr:
+        kind = self.rng.integers(0, 4)
+        if kind == 0:
+            return self._number()
+        if kind == 1:
+            return ast.Constant(self._choice(NOUNS))
+        if kind == 2:
+            return ast.BinOp(self._name(), self._choice((ast.Add(), ast.Sub(), ast.Mult())), self._number())
+        return ast.Call(ast.Name(f"{self._choice(VERBS)}_{self._choice(NOUNS)}", ast.Load()), [self._name()], [])
+
+    def _name(self) -> ast.expr:
+        return ast.Name(self._choice(NOUNS), ast.Load())
+
+    def _number(self) -> ast.expr:
+        return ast.Constant(int(self.rng.integers(0, 100)))
+
+    def _choice(self, options):
+        return options[int(self.rng.integers(0, len(options)))]
+
+
+def _build_chunk(task) -> Tuple[np.ndarray, np.ndarray]:
+    settings, seed, size, extractor = task
+    return SyntheticGenerator(*settings, seed=seed).rows(extractor, size)
+
+
+def _rule(rules, rule_class):
+    return next(rule for rule in rules if isinstance(rule, rule_class))
+
+
+def _lines(statements: List[ast.stmt]) -> int:
+    """Lines ``ast.unparse`` gives a block of generated statements, not counting blank lines"""
+    total = 0
+    for statement in statements:
+        total += 1
+        for block in ('body', 'orelse', 'finalbody'):
+            if getattr(statement, block, None):
+                total += _lines(getattr(statement, block)) + (block != 'body')
+        for handler in getattr(statement, 'handlers', ()):
+            total += 1 + _lines(handler.body)
+    return total
+
+
+def _locate(statements: List[ast.stmt], line: int, column: int) -> int:
+    """Give generated statements the positions they have in ``ast.unparse`` output; returns the next line.
+
+    Like unparse, a blank line goes before every def and class except at the
+    very start of the module.
+    """
+    for statement in statements:
+        if isinstance(statement, (ast.FunctionDef, ast.ClassDef)) and line > 1:
+            line += 1
+        statement.lineno, statement.col_offset = line, column
+        line += 1
+        for block in ('body', 'orelse', 'finalbody'):
+            if getattr(statement, block, None):
+                line = _locate(getattr(statement, block), line + (block != 'body'), column + 4)
+        for handler in getattr(statement, 'handlers', ()):
+            handler.lineno, handler.col_offset = line, column
+            line = _locate(handler.body, line + 1, column + 4)
+            handler.end_lineno = line - 1
+        statement.end_lineno = line - 1
+    return line
@@ -0,0 +1,64 @@
+import gc
+import multiprocessing
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+
+# The task of the current pool, inherited by its workers when they fork
+_task: Optional[Callable[[Any], Any]] = None
+
+
+def fork_available() -> bool:
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+class SharedModelPool:
+    """Worker processes that run ``task`` with the models the parent already loaded.
+
+    Workers are forked, so they inherit the parent's memory instead of each
+    loading its own copy of every model. Before forking, every live object is
+    moved into the permanent generation with ``gc.freeze``; collections in the
+    workers then skip them and never write to their pages. Model arrays are
+    only read, so those pages stay shared copy-on-write and memory stays flat
+    as workers are added. Load every model (see ``SmellPredictor.load_all_models``)
+    before creating the pool; anything loaded later is loaded per worker.
+
+    Needs the fork start method, which Windows lacks.
+    """
+
+    def __init__(self, task: Callable[[Any], Any], workers: int):
+        global _task
+
+        if not fork_available():
+            raise RuntimeError("Sharing models with worker processes needs the fork start method")
+
+        _task = task
+        gc.collect()
+        gc.freeze()
+        try:
+            self._pool = multiprocessing.get_context('fork').Pool(workers)
+        except BaseException:
+            gc.unfreeze()
+            raise
+
+    def imap(self, items: Iterable[Any], chunksize: int = 1) -> Iterator[Any]:
+        """Results of ``task`` for every item, in order"""
+        return self._pool.imap(_run_task, items, chunksize)
+
+    def close(self, terminate: bool = False):
+        """Wait for the workers to finish, or stop them at once with ``terminate``"""
+        if terminate:
+            self._pool.terminate()
+        else:
+            self._pool.close()
+        self._pool.join()
+        gc.unfreeze()
+
+    def __enter__(self) -> 'SharedModelPool':
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close(terminate=exc_type is not None)
+
+
+def _run_task(item: Any) -> Any:
+    return _task(item)
@@ -0,0 +1,108 @@
+import unittest
+
+from src.core.aggregation import ProjectAggregator, SmellAggregate
+from src.core.batch import SmellBatch
+from src.core.models import FileAnalysis, SmellType, Severity
+from test_models import make_smell
+
+
+def make_analysis(file_path: str, smells, complexity: int = 1) -> FileAnalysis:
+    return FileAnalysis(
+        file_path=file_path,
+        language='python',
+        lines_of_code=10,
+        smells=smells,
+        metrics={'cyclomatic_complexity': complexity}
+    )
+
+
+class TestProjectAggregator(unittest.TestCase):
+    def setUp(self):
+        self.analyses = [
+            make_analysis('proj/a.py', [
+                make_smell(file_path='proj/a.py', smell_type=SmellType.LONG_METHOD, severity=Severity.HIGH)
+            ], 3),
+            make_analysis('proj/pkg/b.py', [
+                make_smell(file_path='proj/pkg/b.py', smell_type=SmellType.POOR_NAMING, severity=Severity.MEDIUM),
+                make_smell(file_path='proj/pkg/b.py', smell_type=SmellType.LONG_METHOD, severity=Severity.MEDIUM)
+            ], 5),
+            make_analysis('proj/pkg/sub/c.py', [], 7)
+        ]
+
+    def test_rollup_includes_descendants(self):
+        aggregator = ProjectAggregator('proj')
+        for analysis in self.analyses:
+            aggregator.add(analysis)
+
+        rolled = aggregator.rollup()
+
+        self.assertEqual(rolled['.'].file_count, 3)
+        self.assertEqual(rolled['.'].smell_count, 3)
+        self.assertEqual(rolled['pkg'].file_count, 2)
+        self.assertEqual(rolled['pkg'].smell_count, 2)
+        self.assertEqual(rolled['pkg/sub'].file_count, 1)
+        self.assertEqual(rolled['pkg'].metric_sums['cyclomatic_complexity'], 12)
+
+    def test_summary_histograms(self):
+        aggregator = ProjectAggregator('proj')
+        for analysis in self.analyses:
+            aggregator.add(analysis)
+
+        summary = aggregator.summary()
+
+        self.assertEqual(summary['total_smells'], 3)
+        self.assertEqual(summary['smell_types'], {'long_method': 2, 'poor_naming': 1})
+        self.assertEqual(summary['severities'], {'high': 1, 'medium': 2})
+        self.assertEqual(summary['lines_of_code'], 30)
+        self.assertAlmostEqual(summary['metric_means']['cyclomatic_complexity'], 5.0)
+
+    def test_merge_matches_sequential(self):
+        sequential = ProjectAggregator('proj')
+        for analysis in self.analyses:
+            sequential.add(analysis)
+
+        left = ProjectAggregator('proj')
+        right = ProjectAggregator('proj')
+        left.add(self.analyses[0])
+        right.add(self.analyses[1])
+        right.add(self.analyses[2])
+
+        self.assertEqual(left.merge(right).summary(), sequential.summary())
+
+    def test_explicit_smells_override_analysis(self):
+        aggregator = ProjectAggregator('proj')
+        aggregator.add(self.analyses[1], smells=[])
+
+        self.assertEqual(aggregator.summary()['total_smells'], 0)
+        self.assertEqual(aggregator.summary()['files'], 1)
+
+    def test_project_analysis(self):
+        aggregator = ProjectAggregator('proj')
+        for analysis in self.analyses:
+            aggregator.add(analysis)
+
+        project = aggregator.to_project_analysis()
+
+        self.assertEqual(project.total_smells, 3)
+        self.assertEqual(project.files, [])
+        self.assertIn('directories', project.summary)
+
+    def test_add_batch_matches_add(self):
+        expected = ProjectAggregator('proj')
+        batched = ProjectAggregator('proj')
+        batch = SmellBatch()
+        for analysis in self.analyses:
+            expected.add(analysis)
+            batched.add(analysis, smells=[])
+            batch.extend(analysis.smells)
+
+        batched.add_batch(batch)
+
+        self.assertEqual(batched.summary(), expected.summary())
+
+    def test_empty_aggregate(self):
+        self.assertEqual(SmellAggregate().to_dict()['metric_means'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
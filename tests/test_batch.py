@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+
+from src.core.batch import SmellBatch
+from src.core.models import SmellType, Severity
+from test_models import make_smell
+
+
+class TestSmellBatch(unittest.TestCase):
+    def setUp(self):
+        self.smells = [
+            make_smell(file_path='b.py', smell_type=SmellType.POOR_NAMING, severity=Severity.MEDIUM,
+                       line_start=9, line_end=10, function_name='x', metrics={'line': 9}),
+            make_smell(file_path='a.py', smell_type=SmellType.LONG_METHOD, severity=Severity.HIGH,
+                       line_start=4, line_end=5, function_name='y'),
+            make_smell(file_path='b.py', smell_type=SmellType.POOR_NAMING, severity=Severity.LOW,
+                       line_start=2, line_end=3, function_name='z'),
+            make_smell(file_path='a.py', smell_type=SmellType.POOR_NAMING, severity=Severity.MEDIUM,
+                       line_start=1, line_end=2, metrics={'line': 1}),
+        ]
+        self.batch = SmellBatch.from_smells(self.smells)
+
+    def test_round_trip(self):
+        self.assertEqual(len(self.batch), 4)
+        self.assertEqual(list(self.batch), self.smells)
+        self.assertEqual(len(self.batch.tables['files']), 2)
+
+    def test_grows_past_capacity(self):
+        batch = SmellBatch(capacity=1)
+        batch.extend(self.smells * 10)
+
+        self.assertEqual(len(batch), 40)
+        self.assertEqual(batch.smell(39), self.smells[3])
+
+    def test_filter(self):
+        medium = self.batch.filter(severity='medium')
+        self.assertEqual(medium.to_smells(), [self.smells[0], self.smells[3]])
+
+        naming = self.batch.filter(severity=Severity.MEDIUM, smell_type='poor_naming')
+        self.assertEqual(len(naming), 2)
+
+        self.assertEqual(len(self.batch.filter(smell_type='not_a_smell')), 0)
+        self.assertIs(self.batch.filter(), self.batch)
+
+    def test_sort(self):
+        ordered = self.batch.sort()
+
+        self.assertEqual([s.file_path for s in ordered], ['b.py', 'b.py', 'a.py', 'a.py'])
+        self.assertEqual(list(ordered.line_starts), [2, 9, 1, 4])
+
+    def test_counts(self):
+        self.assertEqual(self.batch.count_by_type(), {SmellType.POOR_NAMING: 3, SmellType.LONG_METHOD: 1})
+        self.assertEqual(self.batch.count_by_severity()[Severity.MEDIUM], 2)
+        self.assertEqual(self.batch.count_by_file(), {'b.py': 2, 'a.py': 2})
+
+    def test_group_by_file_keeps_first_appearance_order(self):
+        groups = [(path, list(indices)) for path, indices in self.batch.group_by_file()]
+
+        self.assertEqual(groups, [('b.py', [0, 2]), ('a.py', [1, 3])])
+
+    def test_truncate(self):
+        self.batch.truncate(1)
+
+        self.assertEqual(len(self.batch), 1)
+        self.assertTrue(np.array_equal(self.batch.line_starts, [9]))
+
+    def test_add_matches_append(self):
+        batch = SmellBatch()
+        for smell in self.smells:
+            batch.add(
+                smell.smell_type, smell.severity, smell.line_start, smell.line_end, smell.column_start,
+                smell.column_end, smell.message_template, smell.suggestion, smell.confidence, smell.file_path,
+                function_name=smell.function_name, metrics=dict(smell.metrics), message_args=smell.message_args
+            )
+
+        self.assertEqual(list(batch), self.smells)
+
+    def test_spans(self):
+        spans = self.batch.spans(2)
+
+        self.assertEqual([tuple(span) for span in spans],
+                         [(SmellType.POOR_NAMING, Severity.LOW, 2, 3), (SmellType.POOR_NAMING, Severity.MEDIUM, 1, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import tempfile
+import os
+
+import numpy as np
+
+from src.ml.cascade import InferenceCascade, CascadeStats
+from src.ml.localization import predict_localized, merge_predictions
+from src.ml.model import SmellPredictor, TrainingDataGenerator
+from src.detectors.smell_detector import SmellDetector
+from src.core.models import SmellType, Severity
+from test_model import write_training_corpus
+
+
+class TestInferenceCascade(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.file_paths = write_training_corpus(cls.temp_dir)
+        cls.predictor = SmellPredictor()
+        cls.predictor.train(TrainingDataGenerator().generate_training_data(cls.file_paths))
+        cls.smell_count = len(cls.predictor.models)
+
+    @classmethod
+    def tearDownClass(cls):
+        import shutil
+        shutil.rmtree(cls.temp_dir)
+
+    def setUp(self):
+        self.cascade = InferenceCascade(self.predictor)
+        self.scored = []
+        score_features = self.predictor.score_features
+
+        def recording_score_features(features, smell_types=None):
+            self.scored.append((len(features), smell_types))
+            return score_features(features, smell_types)
+
+        self.predictor.score_features = recording_score_features
+
+    def tearDown(self):
+        del self.predictor.score_features
+
+    def create_temp_file(self, content: str, filename: str) -> str:
+        file_path = os.path.join(self.temp_dir, filename)
+        with open(file_path, 'w') as f:
+            f.write(content)
+        return file_path
+
+    def test_file_without_definitions_is_skipped(self):
+        file_path = self.create_temp_file('x = 1\ny = x + 2\n', 'constants.py')
+
+        self.assertEqual(self.cascade.predict(file_path, []), [])
+
+        self.assertEqual(self.scored, [])
+        self.assertEqual(self.cascade.stats.files_skipped, 1)
+        self.assertEqual(self.cascade.stats.checks_skipped, self.smell_count)
+        self.assertEqual(self.cascade.stats.skip_rate, 1.0)
+
+    def test_decisive_rule_smell_is_not_scored(self):
+        body = '\n'.join([f'    value_{j} = {j}' for j in range(60)])
+        file_path = self.create_temp_file(f'def long_function():\n{body}\n    return value_0\n', 'long.py')
+        rule_smells = SmellDetector().detect_smells(file_path).smells
+        self.assertIn((SmellType.LONG_METHOD, Severity.HIGH),
+                      [(smell.smell_type, smell.severity) for smell in rule_smells])
+
+        self.cascade.predict(file_path, rule_smells)
+
+        (_, smell_types), = self.scored
+        self.assertNotIn(SmellType.LONG_METHOD, smell_types)
+        self.assertEqual(self.cascade.stats.checks_skipped, 1)
+
+    def test_prediction_on_another_function_is_kept(self):
+        body = '\n'.join([f'    value_{j} = {j}' for j in range(60)])
+        file_path = self.create_temp_file(
+            f'def long_function():\n{body}\n    return value_0\n\n\ndef short_function(a, b):\n    return a + b\n',
+            'long_and_short.py'
+        )
+        rule_smells = SmellDetector().detect_smells(file_path).smells
+
+        # Short rows score highest, so the long_method prediction lands on short_function
+        def score_features(features, smell_types=None):
+            scores = np.where(features[:, 0] < 10, 1.0, 0.8)
+            return {smell_type: scores for smell_type in smell_types or self.predictor.scored_smells()}
+
+        self.predictor.score_features = score_features
+        expected = merge_predictions(rule_smells, predict_localized(self.predictor, file_path))
+        predicted = self.cascade.predict(file_path, rule_smells)
+
+        self.assertIn(('short_function', SmellType.LONG_METHOD),
+                      [(smell.function_name, smell.smell_type) for smell in predicted])
+        self.assertEqual(predicted, expected)
+
+    def test_undecided_files_match_full_inference(self):
+        for file_path in self.file_paths:
+            rule_smells = SmellDetector().detect_smells(file_path).smells
+            if any(smell.severity in (Severity.HIGH, Severity.CRITICAL) for smell in rule_smells):
+                continue
+
+            expected = merge_predictions(rule_smells, predict_localized(self.predictor, file_path))
+
+            self.assertEqual(self.cascade.predict(file_path, rule_smells), expected)
+
+
+class TestCascadeStats(unittest.TestCase):
+    def test_estimated_speedup(self):
+        stats = CascadeStats(checks=10, checks_skipped=5, inference_seconds=1.0)
+
+        self.assertEqual(stats.skip_rate, 0.5)
+        self.assertEqual(stats.estimated_speedup(2.0), 1.5)
+
+    def test_no_checks(self):
+        stats = CascadeStats()
+
+        self.assertEqual(stats.skip_rate, 0.0)
+        self.assertEqual(stats.estimated_speedup(1.0), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
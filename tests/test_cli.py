@@ -0,0 +1,169 @@
+import unittest
+import tempfile
+import os
+import subprocess
+import sys
+
+from click.testing import CliRunner
+
+from cli import cli
+from src.ml.workers import fork_available
+from test_model import write_training_corpus
+
+
+class TestAnalyzeReport(unittest.TestCase):
+    def setUp(self):
+        self.runner = CliRunner()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def create_temp_file(self, content: str, filename: str = "test.py") -> str:
+        file_path = os.path.join(self.temp_dir, filename)
+        with open(file_path, 'w') as f:
+            f.write(content)
+        return file_path
+
+    def create_poorly_named_file(self, count: int, filename: str = "test.py") -> str:
+        code = '\n'.join([f'def f{i}():\n    pass\n' for i in range(count)])
+        return self.create_temp_file(code, filename)
+
+    def test_report_shows_summaries(self):
+        self.create_poorly_named_file(5)
+
+        result = self.runner.invoke(cli, ['analyze', self.temp_dir, '--format', 'report'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("5 smells in 1 files", result.output)
+        self.assertIn("Smells by Type", result.output)
+        self.assertIn("Smells by Severity", result.output)
+        self.assertIn("Top Directories", result.output)
+
+    def test_report_renders_only_requested_page(self):
+        self.create_poorly_named_file(5)
+
+        result = self.runner.invoke(cli, ['analyze', self.temp_dir, '--format', 'report',
+                                          '--page', '2', '--page-size', '2'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("page 2/3", result.output)
+        self.assertIn("Showing rows 3-4 of 5", result.output)
+        self.assertIn("'f2'", result.output)
+        self.assertNotIn("'f0'", result.output)
+        self.assertNotIn("'f4'", result.output)
+
+    @unittest.skipUnless(fork_available(), "worker processes need fork")
+    def test_workers_match_sequential_analysis(self):
+        for i in range(4):
+            self.create_poorly_named_file(i + 1, f"module_{i}.py")
+        sequential = os.path.join(self.temp_dir, 'sequential.json')
+        parallel = os.path.join(self.temp_dir, 'parallel.json')
+
+        self.runner.invoke(cli, ['analyze', self.temp_dir, '--format', 'json', '--output', sequential])
+        result = self.runner.invoke(cli, ['analyze', self.temp_dir, '--format', 'json', '--output', parallel,
+                                          '--workers', '2'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        with open(sequential) as f, open(parallel) as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_report_page_out_of_range(self):
+        self.create_poorly_named_file(2)
+
+        result = self.runner.invoke(cli, ['analyze', self.temp_dir, '--format', 'report',
+                                          '--page', '5'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("out of range", result.output)
+
+
+class TestTrain(unittest.TestCase):
+    def setUp(self):
+        self.runner = CliRunner()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_multi_label_without_varied_labels_saves_nothing(self):
+        training_dir = os.path.join(self.temp_dir, 'clean')
+        os.mkdir(training_dir)
+        for i in range(12):
+            with open(os.path.join(training_dir, f'clean_{i}.py'), 'w') as f:
+                f.write(f'def add_numbers_{i}(first, second):\n    return first + second\n')
+        model_dir = os.path.join(self.temp_dir, 'models')
+
+        result = self.runner.invoke(cli, ['train', training_dir, '--multi-label', '--output-dir', model_dir])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("no model saved", result.output)
+        self.assertFalse(os.path.exists(model_dir))
+
+    def test_multi_label_with_hashed_features_compares_models(self):
+        training_dir = os.path.join(self.temp_dir, 'corpus')
+        os.mkdir(training_dir)
+        write_training_corpus(training_dir)
+        model_dir = os.path.join(self.temp_dir, 'models')
+
+        # Hashed features are sparse, so the comparison must not take len() of them
+        result = self.runner.invoke(cli, ['train', training_dir, '--multi-label', '--hash-features', '64',
+                                          '--output-dir', model_dir])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIsNone(result.exception)
+        self.assertIn("Independent vs Multi-label", result.output)
+        self.assertTrue(os.path.exists(os.path.join(model_dir, 'model_info.json')))
+
+
+class TestStartup(unittest.TestCase):
+    # Cumulative `import cli` time under -X importtime, in microseconds: the
+    # 200ms startup target. It imports in roughly 110ms without NumPy.
+    IMPORT_BUDGET_US = 200000
+    # The modules `analyze` imports on first use. They cost about 85ms, of which
+    # NumPy is about 75ms: SmellBatch columns, its filters and the aggregator's
+    # bincounts run on every analyze, so NumPy cannot stay lazy on this path.
+    # A rule-only analyze of one file therefore takes about 300ms wall here
+    # (the bare interpreter alone starts in about 80ms), short of the 200ms
+    # goal; this budget guards the chain against further growth.
+    ANALYZE_MODULES = ('src.core.batch', 'src.detectors.smell_detector', 'src.core.aggregation')
+    ANALYZE_BUDGET_US = 120000
+    DEFERRED_MODULES = ('numpy', 'sklearn', 'scipy', 'pandas', 'joblib', 'rich.syntax', 'pygments')
+
+    def import_times(self, modules: str = 'cli') -> dict:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {modules}'],
+            cwd=root, capture_output=True, text=True
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        times = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, module = line.split('|')
+            times[module.strip()] = int(cumulative)
+        return times
+
+    def test_heavy_modules_are_deferred(self):
+        imported = self.import_times()
+
+        for module in self.DEFERRED_MODULES:
+            self.assertNotIn(module, imported)
+
+    def test_import_time_budget(self):
+        self.assertLess(self.import_times()['cli'], self.IMPORT_BUDGET_US)
+
+    def test_analyze_import_budget(self):
+        times = self.import_times(', '.join(self.ANALYZE_MODULES))
+
+        # Each module's cumulative time excludes what an earlier one already loaded
+        total = sum(times[module] for module in self.ANALYZE_MODULES)
+        self.assertLess(total, self.ANALYZE_BUDGET_US)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+import tempfile
+import os
+import subprocess
+import sys
+import copy
+from types import SimpleNamespace
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from src.ml.compiled import CompiledEnsemble, CompiledPredictor, compile_model, export_compiled
+from src.ml.model import SmellPredictor
+from src.core.models import SmellType
+
+
+class TestCompiledEnsemble(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.random((400, 6)) * 40
+        self.y = (self.X[:, 0] + self.X[:, 2] > 40).astype(int)
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_random_forest_parity(self):
+        scaler = StandardScaler().fit(self.X)
+        model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0)
+        model.fit(scaler.transform(self.X), self.y)
+
+        compiled = compile_model(model, scaler)
+
+        expected = model.predict_proba(scaler.transform(self.X))[:, 1]
+        self.assertTrue(np.array_equal(compiled.predict_proba(self.X)[:, 0], expected))
+
+    def test_forest_leaf_counts_are_normalized(self):
+        model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(self.X, self.y)
+        expected = model.predict_proba(self.X)[:, 1]
+
+        # Older scikit-learn stores weighted class counts in tree_.value
+        counting = copy.copy(model)
+        counting.estimators_ = [
+            SimpleNamespace(tree_=SimpleNamespace(
+                node_count=tree.node_count, children_left=tree.children_left, children_right=tree.children_right,
+                feature=tree.feature, threshold=tree.threshold, max_depth=tree.max_depth,
+                value=tree.value * tree.weighted_n_node_samples[:, None, None]
+            ))
+            for tree in (estimator.tree_ for estimator in model.estimators_)
+        ]
+
+        self.assertTrue(np.allclose(compile_model(counting).predict_proba(self.X)[:, 0], expected))
+
+    def test_gradient_boosting_parity(self):
+        model = GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=0)
+        model.fit(self.X, self.y)
+
+        compiled = compile_model(model)
+
+        expected = model.predict_proba(self.X)[:, 1]
+        self.assertTrue(np.array_equal(compiled.predict_proba(self.X)[:, 0], expected))
+
+    def test_multi_output_forest_parity(self):
+        Y = np.column_stack([self.y, (self.X[:, 1] > 20).astype(int)])
+        model = RandomForestClassifier(n_estimators=10, random_state=0).fit(self.X, Y)
+
+        compiled = compile_model(model)
+
+        for output, expected in enumerate(model.predict_proba(self.X)):
+            self.assertTrue(np.array_equal(compiled.predict_proba(self.X)[:, output], expected[:, 1]))
+
+    def test_save_and_load(self):
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(self.X, self.y)
+        compiled = compile_model(model)
+        path = os.path.join(self.temp_dir, 'ensemble')
+
+        compiled.save(path)
+        loaded = CompiledEnsemble.load(path)
+
+        self.assertIsInstance(loaded.thresholds, np.memmap)
+        self.assertTrue(np.array_equal(loaded.predict_proba(self.X), compiled.predict_proba(self.X)))
+
+    def test_rejects_non_tree_models(self):
+        model = LogisticRegression().fit(self.X, self.y)
+
+        with self.assertRaises(ValueError):
+            compile_model(model)
+
+
+class TestCompiledPredictor(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(1)
+        self.features = rng.random((60, 30)) * 30
+        labels = (self.features[:, 0] > 15).astype(int)
+
+        self.predictor = SmellPredictor()
+        self.predictor.trained_smells = [SmellType.LONG_METHOD]
+        scaler = StandardScaler().fit(self.features)
+        model = RandomForestClassifier(n_estimators=10, random_state=0)
+        self.predictor.models[SmellType.LONG_METHOD] = model.fit(scaler.transform(self.features), labels)
+        self.predictor.scalers[SmellType.LONG_METHOD] = scaler
+        self.predictor.thresholds[SmellType.LONG_METHOD] = 0.4
+
+        export_compiled(self.predictor, self.temp_dir)
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_predictions_match_predictor(self):
+        compiled = CompiledPredictor()
+        compiled.load_model(self.temp_dir)
+
+        expected = self.predictor.predict_features(self.features)
+        actual = compiled.predict_features(self.features)
+
+        self.assertEqual(
+            [[(p['smell_type'], p['probability']) for p in row] for row in actual],
+            [[(p['smell_type'], p['probability']) for p in row] for row in expected]
+        )
+
+    def test_inference_does_not_import_sklearn(self):
+        code = (
+            "import sys, numpy as np\n"
+            "from src.ml.compiled import CompiledPredictor\n"
+            "predictor = CompiledPredictor()\n"
+            f"predictor.load_model({self.temp_dir!r})\n"
+            "predictor.predict_features(np.ones((3, 30)))\n"
+            "assert 'sklearn' not in sys.modules\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
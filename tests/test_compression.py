@@ -0,0 +1,84 @@
+import unittest
+import tempfile
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+
+from src.ml.compression import compress_models, prune_estimators
+from src.ml.model import SmellPredictor, TrainingDataGenerator
+from src.core.models import SmellType
+from test_model import write_training_corpus
+
+
+class TestPruneEstimators(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.random((200, 4))
+        self.y = (self.X[:, 0] > 0.5).astype(int)
+
+    def test_pruned_forest_matches_first_trees(self):
+        model = RandomForestClassifier(n_estimators=20, random_state=0).fit(self.X, self.y)
+        pruned = prune_estimators(model, 5)
+
+        expected = np.mean([tree.predict_proba(self.X) for tree in model.estimators_[:5]], axis=0)
+        self.assertEqual(len(pruned.estimators_), 5)
+        self.assertEqual(len(model.estimators_), 20)
+        self.assertTrue(np.allclose(pruned.predict_proba(self.X), expected))
+
+    def test_pruned_boosting_matches_staged_prediction(self):
+        model = GradientBoostingClassifier(n_estimators=20, random_state=0).fit(self.X, self.y)
+        pruned = prune_estimators(model, 5)
+
+        staged = list(model.staged_predict_proba(self.X))[4]
+        self.assertTrue(np.allclose(pruned.predict_proba(self.X), staged))
+
+
+class TestCompressModels(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.file_paths = write_training_corpus(cls.temp_dir)
+        cls.training_data = TrainingDataGenerator().generate_training_data(cls.file_paths)
+
+    @classmethod
+    def tearDownClass(cls):
+        import shutil
+        shutil.rmtree(cls.temp_dir)
+
+    def test_selects_smaller_model_within_accuracy_loss(self):
+        predictor = SmellPredictor()
+        predictor.train(self.training_data)
+        original = predictor.models[SmellType.LONG_METHOD]
+
+        report = compress_models(predictor, self.training_data, max_accuracy_loss=0.0, repeats=1)
+
+        result = report[SmellType.LONG_METHOD.value]
+        rows = {row['name']: row for row in result['candidates']}
+        selected = rows[result['selected']]
+        self.assertGreaterEqual(selected['accuracy'], rows['original']['accuracy'])
+        self.assertLessEqual(selected['size_bytes'], rows['original']['size_bytes'])
+        self.assertIsNot(predictor.models[SmellType.LONG_METHOD], original)
+        self.assertEqual(len(predictor.predict_batch(self.file_paths)), len(self.file_paths))
+
+    def test_scores_unit_sample_bundles_on_their_unit_split(self):
+        predictor = SmellPredictor()
+        results = predictor.train(self.training_data, unit_samples=True)
+
+        report = compress_models(predictor, self.training_data, repeats=1)
+
+        # Candidates are scored on train's held-out units, not on file rows
+        self.assertIn(SmellType.LONG_METHOD.value, report)
+        for smell, result in report.items():
+            self.assertEqual(result['test_samples'], results[smell]['test_samples'])
+            self.assertEqual(result['candidates'][0]['accuracy'], results[smell]['accuracy'])
+
+    def test_rejects_multi_label_models(self):
+        predictor = SmellPredictor(multi_label=True)
+        predictor.train(self.training_data)
+
+        with self.assertRaises(ValueError):
+            compress_models(predictor, self.training_data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ import os
 from pathlib import Path
 
 from src.detectors.smell_detector import SmellDetector
+from src.core.batch import SmellBatch
 from src.core.models import SmellType, Severity
 
 
@@ -119,6 +120,17 @@ def function_with_dead_code():
         dead_code_smells = [s for s in analysis.smells if s.smell_type == SmellType.DEAD_CODE]
         self.assertEqual(len(dead_code_smells), 1)
     
+    def test_detect_smells_matches_batch_rows(self):
+        body = '\n'.join([f'    value_{j} = {j}' for j in range(40)])
+        file_path = self.create_temp_file(f'def f():\n    if False:\n        pass\n{body}\n')
+        batch = SmellBatch()
+
+        self.detector.detect_into(file_path, batch)
+
+        smells = self.detector.detect_smells(file_path).smells
+        self.assertEqual(len(smells), 3)
+        self.assertEqual(smells, list(batch))
+
     def test_clean_code_no_smells(self):
         clean_code = '''
 def calculate_sum(numbers):
@@ -190,7 +190,73 @@ def test():
         
         # Should return zeros for non-Python files
         self.assertTrue(all(f == 0 for f in features))
+    
+    def test_unit_features(self):
+        code = '''
+class Greeter:
+    def greet(self, name):
+        if name:
+            return "Hello " + name
+        return "Hello"
+
+
+def main():
+    Greeter().greet("world")
+'''
+        
+        file_path = self.create_temp_file(code)
+        units, features = self.extractor.extract_unit_features(file_path)
+        
+        self.assertEqual([(unit.kind, unit.name) for unit in units],
+                         [('module', file_path), ('class', 'Greeter'), ('function', 'greet'), ('function', 'main')])
+        self.assertEqual((units[2].line_start, units[2].line_end, units[2].class_name), (3, 6, 'Greeter'))
+        self.assertEqual(features.shape, (4, len(self.extractor.feature_names)))
+        self.assertTrue(np.array_equal(features[0], self.extractor.extract_features(file_path)))
+        
+        conditionals = self.extractor.feature_names.index('conditional_count')
+        self.assertEqual(list(features[:, conditionals]), [1, 1, 1, 0])
 
+    
+    def test_hashed_ngram_features(self):
+        code = '''
+class Greeter:
+    def greet(self, name):
+        if name:
+            return "Hello " + name
+        return "Hello"
+'''
+        
+        file_path = self.create_temp_file(code)
+        empty_path = self.create_temp_file("", "empty.py")
+        extractor = FeatureExtractor(hash_features=64)
+        features = extractor.extract_features_batch([file_path, empty_path])
+        
+        self.assertEqual(features.shape, (2, len(extractor.feature_names) + 64))
+        self.assertEqual(extractor.n_features, features.shape[1])
+        self.assertTrue(np.array_equal(
+            features[0, :len(extractor.feature_names)].toarray()[0],
+            self.extractor.extract_features(file_path)
+        ))
+        self.assertGreater(features[0, len(extractor.feature_names):].nnz, 0)
+        self.assertTrue(np.array_equal(
+            features.toarray(), extractor.extract_features_batch([file_path, empty_path]).toarray()
+        ))
+        
+        units, unit_features = extractor.extract_unit_features(file_path)
+        self.assertEqual(unit_features.shape, (len(units), extractor.n_features))
+        self.assertTrue(np.array_equal(unit_features[0].toarray(), features[0].toarray()))
+        self.assertEqual(extractor.named_values(features, 0), list(self.extractor.extract_features(file_path)))
+    
+    def test_parallel_batch_matches_sequential(self):
+        file_paths = [
+            self.create_temp_file(f"def f{i}(a):\n" + "    a += 1\n" * i + "    return a\n", f"module_{i}.py")
+            for i in range(6)
+        ]
+        
+        sequential = self.extractor.extract_features_batch(file_paths)
+        parallel = self.extractor.extract_features_batch(file_paths, n_jobs=2)
+        
+        self.assertTrue(np.array_equal(sequential, parallel))
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,103 @@
+import io
+import json
+import os
+import unittest
+import tempfile
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from src.detectors.smell_detector import SmellDetector
+from src.ml.label_cache import CACHE_FILE, LabelCache, rules_digest
+from src.ml.model import TrainingDataGenerator
+from test_model import write_training_corpus
+
+
+class TestLabelCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, 'labels')
+        self.file_paths = write_training_corpus(self.temp_dir)
+        self.expected = TrainingDataGenerator().generate_training_data(self.file_paths)
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_unchanged_corpus_skips_detection(self):
+        TrainingDataGenerator(cache_dir=self.cache_dir).generate_training_data(self.file_paths)
+
+        generator = TrainingDataGenerator(cache_dir=self.cache_dir)
+        with patch.object(SmellDetector, 'detect_smells', side_effect=AssertionError('detected again')):
+            training_data = generator.generate_training_data(self.file_paths)
+
+        self.assertEqual(training_data, self.expected)
+        self.assertEqual(generator.failure_report()['cache_hits'], len(self.file_paths))
+
+    def test_changed_file_and_changed_rules_miss(self):
+        TrainingDataGenerator(cache_dir=self.cache_dir).generate_training_data(self.file_paths)
+        with open(self.file_paths[0], 'a') as f:
+            f.write('\n\ndef added():\n    return 1\n')
+
+        generator = TrainingDataGenerator(cache_dir=self.cache_dir)
+        generator.generate_training_data(self.file_paths)
+        self.assertEqual(generator.label_cache.misses, 1)
+
+        generator = TrainingDataGenerator(cache_dir=self.cache_dir)
+        generator.smell_detector = SmellDetector()
+        generator.smell_detector.rules[0].max_lines = 5
+        self.assertNotEqual(rules_digest(generator.smell_detector.rules), rules_digest(SmellDetector().rules))
+        generator.generate_training_data(self.file_paths)
+        self.assertEqual(generator.label_cache.hits, 0)
+
+    def test_changed_rules_replace_saved_entries(self):
+        TrainingDataGenerator(cache_dir=self.cache_dir).generate_training_data(self.file_paths)
+
+        generator = TrainingDataGenerator(cache_dir=self.cache_dir)
+        generator.smell_detector = SmellDetector()
+        generator.smell_detector.rules[0].max_lines = 5
+        generator.generate_training_data(self.file_paths)
+
+        with open(os.path.join(self.cache_dir, CACHE_FILE)) as f:
+            saved = json.load(f)
+        self.assertEqual(saved['rules_key'], rules_digest(generator.smell_detector.rules))
+        self.assertEqual(len(saved['entries']), len(self.file_paths))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = LabelCache(max_entries=2)
+        cache.bind('rules')
+        cache.store('first', [])
+        cache.store('second', [])
+        self.assertEqual(cache.lookup('first', 'a.py'), [])
+
+        cache.store('third', [])
+        cache.save(self.cache_dir)
+
+        loaded = LabelCache(max_entries=2)
+        loaded.bind('rules')
+        loaded.load(self.cache_dir)
+        self.assertEqual(len(loaded), 2)
+        self.assertIsNone(loaded.lookup('second', 'a.py'))
+        self.assertEqual(loaded.lookup('first', 'a.py'), [])
+
+    def test_failures_are_reported_not_printed(self):
+        broken = os.path.join(self.temp_dir, 'broken.py')
+        with open(broken, 'w') as f:
+            f.write('def broken(:\n')
+
+        generator = TrainingDataGenerator(cache_dir=self.cache_dir)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            training_data = generator.generate_training_data(self.file_paths + [broken])
+
+        self.assertEqual(output.getvalue(), '')
+        self.assertEqual(training_data, self.expected)
+        report = generator.failure_report()
+        self.assertEqual(report['failed'], 1)
+        self.assertEqual(report['errors']['SyntaxError'][0]['file_path'], broken)
+
+    def test_parallel_labels_match_serial(self):
+        self.assertEqual(TrainingDataGenerator(n_jobs=2).generate_training_data(self.file_paths), self.expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import tempfile
+import os
+
+from src.ml.localization import predict_localized, merge_predictions
+from src.ml.model import SmellPredictor, TrainingDataGenerator
+from src.core.models import SmellType
+from test_models import make_smell
+from test_model import write_training_corpus
+
+
+class TestPredictLocalized(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        file_paths = write_training_corpus(cls.temp_dir)
+        cls.predictor = SmellPredictor()
+        cls.predictor.train(TrainingDataGenerator().generate_training_data(file_paths))
+
+    @classmethod
+    def tearDownClass(cls):
+        import shutil
+        shutil.rmtree(cls.temp_dir)
+
+    def test_smell_placed_on_responsible_function(self):
+        body = '\n'.join([f'    value_{j} = {j}' for j in range(40)])
+        code = f'def short_one(a, b):\n    return a + b\n\n\ndef long_function():\n{body}\n    return value_0\n'
+        file_path = os.path.join(self.temp_dir, 'mixed.py')
+        with open(file_path, 'w') as f:
+            f.write(code)
+
+        smells = {smell.smell_type: smell for smell in predict_localized(self.predictor, file_path)}
+
+        long_method = smells[SmellType.LONG_METHOD]
+        self.assertEqual(long_method.function_name, 'long_function')
+        self.assertEqual((long_method.line_start, long_method.line_end), (5, 46))
+        self.assertEqual(long_method.file_path, file_path)
+        self.assertGreaterEqual(long_method.confidence, self.predictor.thresholds[SmellType.LONG_METHOD])
+
+
+class TestMergePredictions(unittest.TestCase):
+    def test_drops_predictions_overlapping_rule_smells_of_same_type(self):
+        rule_smells = [make_smell(smell_type=SmellType.LONG_METHOD, line_start=5, line_end=46)]
+        ml_smells = [
+            make_smell(smell_type=SmellType.LONG_METHOD, line_start=10, line_end=20),
+            make_smell(smell_type=SmellType.LONG_METHOD, line_start=50, line_end=60),
+            make_smell(smell_type=SmellType.POOR_NAMING, line_start=5, line_end=46)
+        ]
+
+        merged = merge_predictions(rule_smells, ml_smells)
+
+        self.assertEqual(merged, ml_smells[1:])
+
+    def test_keeps_all_without_rule_smells(self):
+        ml_smells = [make_smell(smell_type=SmellType.DEAD_CODE, line_start=1, line_end=2)]
+
+        self.assertEqual(merge_predictions([], ml_smells), ml_smells)
+
+
+if __name__ == '__main__':
+    unittest.main()
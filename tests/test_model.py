@@ -0,0 +1,400 @@
+import unittest
+import tempfile
+import os
+import json
+from unittest.mock import patch
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import GaussianNB
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from src.ml.model import (
+    SmellPredictor, TrainingDataGenerator, DEFAULT_THRESHOLD, _select_threshold, _fold_scaling, _update_model, _group_split
+)
+from src.ml.evaluation import compare_multi_label
+from src.ml.feature_extractor import FeatureExtractor
+from src.core.models import SmellType
+
+
+def write_training_corpus(directory: str) -> list:
+    file_paths = []
+    for i in range(12):
+        if i % 2:
+            body = '\n'.join([f'    value_{j} = {j}' for j in range(35 + i)])
+            code = f'def long_function_{i}():\n{body}\n    return value_0\n'
+        else:
+            code = f'def f{i}(a, b):\n    return a + b\n\n\ndef add_{i}(a, b):\n    return a - b\n'
+
+        file_path = os.path.join(directory, f"sample_{i}.py")
+        with open(file_path, 'w') as f:
+            f.write(code)
+        file_paths.append(file_path)
+    return file_paths
+
+
+class TestSmellPredictor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.file_paths = write_training_corpus(cls.temp_dir)
+        cls.training_data = TrainingDataGenerator().generate_training_data(cls.file_paths)
+
+        cls.predictor = SmellPredictor()
+        cls.results = cls.predictor.train(cls.training_data)
+
+    @classmethod
+    def tearDownClass(cls):
+        import shutil
+        shutil.rmtree(cls.temp_dir)
+
+    def test_trains_varied_smells(self):
+        self.assertIn(SmellType.LONG_METHOD.value, self.results)
+        self.assertIn(SmellType.POOR_NAMING.value, self.results)
+
+    def test_train_parses_each_file_once(self):
+        predictor = SmellPredictor(model_type='logistic_regression')
+        with patch.object(FeatureExtractor, '_file_row', autospec=True,
+                          side_effect=FeatureExtractor._file_row) as file_row:
+            predictor.train(self.training_data)
+
+        self.assertEqual(file_row.call_count, len(self.training_data))
+
+    def test_unit_samples_are_span_labelled(self):
+        X, Y, groups = SmellPredictor().prepare_unit_training_matrix(self.training_data)
+        long_method = list(SmellType).index(SmellType.LONG_METHOD)
+        poor_naming = list(SmellType).index(SmellType.POOR_NAMING)
+
+        # Module plus two functions in even files, module plus one function in odd ones
+        self.assertEqual(X.shape[0], 6 * 3 + 6 * 2)
+        self.assertEqual(groups[:8].tolist(), [0, 0, 0, 1, 1, 2, 2, 2])
+        # sample_0: f0 is poorly named, add_0 is not; the module carries both
+        self.assertEqual(Y[0:3, poor_naming].tolist(), [1, 1, 0])
+        # sample_1: the long function and its module
+        self.assertEqual(Y[3:5, long_method].tolist(), [1, 1])
+
+    def test_class_rows_carry_only_their_own_smells(self):
+        body = '\n'.join([f'        value_{j} = {j}' for j in range(40)])
+        file_path = os.path.join(self.temp_dir, 'service.py')
+        with open(file_path, 'w') as f:
+            f.write(f'class Service:\n    def handle_request(self):\n{body}\n        return value_0\n')
+        training_data = TrainingDataGenerator().generate_training_data([file_path])
+
+        _, Y, _ = SmellPredictor().prepare_unit_training_matrix(training_data)
+
+        # Module, class Service, method handle_request
+        self.assertEqual(Y[:, list(SmellType).index(SmellType.LONG_METHOD)].tolist(), [1, 0, 1])
+
+    def test_unit_samples_parse_each_file_once(self):
+        predictor = SmellPredictor(model_type='logistic_regression')
+        with patch.object(FeatureExtractor, 'extract_unit_features', autospec=True,
+                          side_effect=FeatureExtractor.extract_unit_features) as extract_units:
+            results = predictor.train(self.training_data, unit_samples=True)
+
+        self.assertEqual(extract_units.call_count, len(self.training_data))
+        metrics = results[SmellType.LONG_METHOD.value]
+        self.assertEqual(metrics['training_samples'] + metrics['test_samples'], 30)
+
+    def test_unit_held_out_split_keeps_files_whole(self):
+        _, Y, groups = SmellPredictor().prepare_unit_training_matrix(self.training_data)
+        train_rows, test_rows = _group_split(Y[:, list(SmellType).index(SmellType.POOR_NAMING)], groups)
+
+        self.assertTrue(len(test_rows))
+        self.assertFalse(set(groups[train_rows]) & set(groups[test_rows]))
+
+    def test_unit_samples_round_trip_and_update(self):
+        predictor = SmellPredictor(model_type='sgd')
+        predictor.train(self.training_data, unit_samples=True)
+        model_dir = os.path.join(self.temp_dir, 'unit_models')
+        predictor.save_model(model_dir)
+
+        loaded = SmellPredictor()
+        loaded.load_model(model_dir)
+        results = loaded.update(self.training_data[:2])
+
+        self.assertTrue(loaded.get_model_info()['unit_samples'])
+        self.assertEqual(results[SmellType.LONG_METHOD.value]['samples'], 5)
+
+    def test_predict_batch_matches_single_file_predictions(self):
+        batched = self.predictor.predict_batch(self.file_paths, batch_size=5)
+
+        self.assertEqual(len(batched), len(self.file_paths))
+        for file_path, predictions in zip(self.file_paths, batched):
+            single = self.predictor.predict(file_path)
+            self.assertEqual(
+                [(p['smell_type'], p['probability']) for p in single],
+                [(p['smell_type'], p['probability']) for p in predictions]
+            )
+
+    def test_predict_batch_empty(self):
+        self.assertEqual(self.predictor.predict_batch([]), [])
+
+    def test_n_jobs_applied_to_models(self):
+        predictor = SmellPredictor(n_jobs=2)
+        predictor.train(self.training_data)
+
+        model = predictor.models[SmellType.LONG_METHOD]
+        self.assertEqual(model.get_params()['n_jobs'], 2)
+
+    def test_thresholds_round_trip(self):
+        predictor = SmellPredictor()
+        predictor.train(self.training_data, target_recall=1.0)
+        model_dir = os.path.join(self.temp_dir, 'models')
+        predictor.save_model(model_dir)
+
+        loaded = SmellPredictor()
+        loaded.load_model(model_dir)
+
+        self.assertEqual(loaded.thresholds, predictor.thresholds)
+
+    def test_predictions_respect_threshold(self):
+        predictor = SmellPredictor()
+        predictor.train(self.training_data)
+        predictor.thresholds = {smell_type: 1.01 for smell_type in predictor.models}
+
+        self.assertEqual(predictor.predict_batch(self.file_paths), [[] for _ in self.file_paths])
+
+    def test_multi_label_round_trip(self):
+        predictor = SmellPredictor(multi_label=True)
+        results = predictor.train(self.training_data)
+        model_dir = os.path.join(self.temp_dir, 'multi_label_models')
+        predictor.save_model(model_dir)
+
+        loaded = SmellPredictor()
+        loaded.load_model(model_dir)
+
+        self.assertIn(SmellType.LONG_METHOD.value, results)
+        self.assertTrue(loaded.get_model_info()['multi_label'])
+        self.assertEqual(loaded.trained_smells, predictor.trained_smells)
+        self.assertEqual(
+            [[p['smell_type'] for p in row] for row in loaded.predict_batch(self.file_paths)],
+            [[p['smell_type'] for p in row] for row in predictor.predict_batch(self.file_paths)]
+        )
+
+    def test_compare_multi_label(self):
+        X, Y = self.predictor.prepare_training_matrix(self.training_data)
+        comparison = compare_multi_label(X, Y, repeats=2)
+
+        self.assertEqual(X.shape[0], Y.shape[0])
+        self.assertEqual(Y.shape[1], len(SmellType))
+        self.assertIn(SmellType.LONG_METHOD.value, comparison['labels'])
+        self.assertLess(comparison['multi_label']['size_bytes'], comparison['independent']['size_bytes'])
+
+    def test_load_is_lazy_per_smell_type(self):
+        model_dir = os.path.join(self.temp_dir, 'lazy_models')
+        self.predictor.save_model(model_dir)
+
+        loaded = SmellPredictor()
+        loaded.load_model(model_dir)
+
+        self.assertIn(SmellType.LONG_METHOD, loaded.models)
+        self.assertFalse(loaded.models.is_loaded(SmellType.LONG_METHOD))
+        loaded.models[SmellType.LONG_METHOD]
+        self.assertTrue(loaded.models.is_loaded(SmellType.LONG_METHOD))
+        self.assertFalse(loaded.models.is_loaded(SmellType.POOR_NAMING))
+
+    def test_load_rejects_mismatched_feature_schema(self):
+        model_dir = os.path.join(self.temp_dir, 'schema_models')
+        self.predictor.save_model(model_dir)
+        with open(os.path.join(model_dir, 'model_info.json')) as f:
+            manifest = json.load(f)
+        manifest['feature_names'] = manifest['feature_names'][::-1]
+        with open(os.path.join(model_dir, 'model_info.json'), 'w') as f:
+            json.dump(manifest, f)
+
+        with self.assertRaises(ValueError):
+            SmellPredictor().load_model(model_dir)
+
+    def test_loads_format_1_bundle(self):
+        model_dir = os.path.join(self.temp_dir, 'legacy_models')
+        self.predictor.save_model(model_dir)
+        with open(os.path.join(model_dir, 'model_info.json')) as f:
+            manifest = json.load(f)
+        del manifest['format_version']
+        del manifest['artifacts']
+        manifest['trained_smells'] = [smell.value for smell in SmellType]
+        with open(os.path.join(model_dir, 'model_info.json'), 'w') as f:
+            json.dump(manifest, f)
+
+        loaded = SmellPredictor()
+        loaded.load_model(model_dir)
+
+        self.assertIn(SmellType.LONG_METHOD, loaded.models)
+        self.assertNotIn(SmellType.FEATURE_ENVY, loaded.models)
+        self.assertEqual(
+            [[p['smell_type'] for p in row] for row in loaded.predict_batch(self.file_paths)],
+            [[p['smell_type'] for p in row] for row in self.predictor.predict_batch(self.file_paths)]
+        )
+
+    def test_tree_models_are_saved_without_scalers(self):
+        model_dir = os.path.join(self.temp_dir, 'scale_free_models')
+        self.predictor.save_model(model_dir)
+
+        self.assertFalse(any(name.endswith('_scaler.joblib') for name in os.listdir(model_dir)))
+        features = self.predictor.feature_extractor.extract_features_batch(self.file_paths)
+        model = self.predictor.models[SmellType.LONG_METHOD]
+        scores = self.predictor.score_features(features)[SmellType.LONG_METHOD]
+        self.assertTrue(np.array_equal(scores, self.predictor._positive_scores(model, features)))
+
+    def test_linear_models_fold_scaling(self):
+        predictor = SmellPredictor(model_type='logistic_regression')
+        predictor.train(self.training_data)
+
+        self.assertIsInstance(predictor.models[SmellType.LONG_METHOD], LogisticRegression)
+        self.assertEqual(len(predictor.scalers), 0)
+
+    def test_separate_scalers_still_applied(self):
+        features = self.predictor.feature_extractor.extract_features_batch(self.file_paths)
+        labels = np.arange(len(features)) % 2
+        scaler = StandardScaler().fit(features)
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(scaler.transform(features), labels)
+
+        predictor = SmellPredictor()
+        predictor.trained_smells = [SmellType.LONG_METHOD]
+        predictor.models[SmellType.LONG_METHOD] = model
+        predictor.scalers[SmellType.LONG_METHOD] = scaler
+        model_dir = os.path.join(self.temp_dir, 'scaled_models')
+        predictor.save_model(model_dir)
+
+        loaded = SmellPredictor()
+        loaded.load_model(model_dir)
+
+        expected = model.predict_proba(scaler.transform(features))[:, 1]
+        self.assertTrue(np.array_equal(loaded.score_features(features)[SmellType.LONG_METHOD], expected))
+
+    def test_hashed_features_round_trip(self):
+        predictor = SmellPredictor(model_type='logistic_regression', hash_features=256)
+        results = predictor.train(self.training_data)
+        model_dir = os.path.join(self.temp_dir, 'hashed_models')
+        predictor.save_model(model_dir)
+
+        loaded = SmellPredictor()
+        loaded.load_model(model_dir)
+        features = loaded.feature_extractor.extract_features_batch(self.file_paths)
+
+        self.assertIn(SmellType.LONG_METHOD.value, results)
+        self.assertEqual(loaded.feature_extractor.hash_features, 256)
+        self.assertEqual(features.shape, (len(self.file_paths), loaded.feature_extractor.n_features))
+        self.assertTrue(np.allclose(
+            loaded.score_features(features)[SmellType.LONG_METHOD],
+            predictor.score_features(features)[SmellType.LONG_METHOD]
+        ))
+        for predictions in loaded.predict_batch(self.file_paths):
+            for prediction in predictions:
+                self.assertEqual(len(prediction['features']), len(prediction['feature_names']))
+
+    def test_update_partial_fit_models_in_place(self):
+        predictor = SmellPredictor(model_type='sgd')
+        predictor.train(self.training_data)
+        model_dir = os.path.join(self.temp_dir, 'sgd_models')
+        predictor.save_model(model_dir)
+
+        loaded = SmellPredictor()
+        loaded.load_model(model_dir)
+        before = np.array(loaded.models[SmellType.LONG_METHOD][-1].coef_)
+        results = loaded.update(self.training_data[:4])
+        loaded.save_model(model_dir)
+
+        reloaded = SmellPredictor()
+        reloaded.load_model(model_dir)
+
+        self.assertEqual(results[SmellType.LONG_METHOD.value], {'method': 'partial_fit', 'samples': 4, 'positives': 2})
+        self.assertFalse(np.array_equal(reloaded.models[SmellType.LONG_METHOD][-1].coef_, before))
+        self.assertEqual(reloaded.model_version, 2)
+        self.assertEqual([entry['kind'] for entry in reloaded.history], ['train', 'update'])
+        self.assertEqual(len(reloaded.predict_batch(self.file_paths)), len(self.file_paths))
+
+    def test_update_grows_forests(self):
+        predictor = SmellPredictor()
+        predictor.train(self.training_data)
+
+        results = predictor.update(self.training_data[:4], new_trees=5)
+
+        self.assertEqual(results[SmellType.LONG_METHOD.value]['method'], 'warm_start')
+        self.assertEqual(len(predictor.models[SmellType.LONG_METHOD].estimators_), 105)
+        self.assertFalse(predictor.models[SmellType.LONG_METHOD].warm_start)
+
+    def test_update_rejects_non_incremental_models(self):
+        predictor = SmellPredictor(model_type='gradient_boosting')
+        predictor.train(self.training_data)
+
+        with self.assertRaises(ValueError):
+            predictor.update(self.training_data[:4])
+
+
+class TestUpdateModel(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.random((100, 3))
+        self.y = (self.X[:, 0] > 0.5).astype(int)
+
+    def test_naive_bayes_partial_fit(self):
+        model = GaussianNB().fit(self.X[:50], self.y[:50])
+
+        self.assertEqual(_update_model(model, self.X[50:], self.y[50:], new_trees=10), 'partial_fit')
+        self.assertEqual(model.class_count_.sum(), 100)
+
+    def test_forest_skipped_without_both_classes(self):
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(self.X, self.y)
+
+        self.assertEqual(_update_model(model, self.X[:3], np.ones(3, dtype=int), new_trees=10), 'skipped')
+        self.assertEqual(len(model.estimators_), 5)
+
+
+class TestFoldScaling(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.random((200, 5)) * [1, 10, 100, 1000, 5]
+        self.y = (self.X[:, 0] * 100 + self.X[:, 2] > 100).astype(int)
+
+    def test_folded_linear_model_matches_pipeline(self):
+        pipeline = make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000)).fit(self.X, self.y)
+        expected_proba = pipeline.predict_proba(self.X)
+        expected_labels = pipeline.predict(self.X)
+
+        folded = _fold_scaling(pipeline)
+
+        self.assertIsInstance(folded, LogisticRegression)
+        self.assertTrue(np.allclose(folded.predict_proba(self.X), expected_proba, rtol=0, atol=1e-12))
+        self.assertTrue(np.array_equal(folded.predict(self.X), expected_labels))
+
+    def test_kernel_svm_keeps_pipeline(self):
+        pipeline = make_pipeline(StandardScaler(), SVC(probability=True, random_state=0)).fit(self.X, self.y)
+
+        self.assertIs(_fold_scaling(pipeline), pipeline)
+
+    def test_unscaled_models_unchanged(self):
+        model = RandomForestClassifier(n_estimators=3, random_state=0).fit(self.X, self.y)
+
+        self.assertIs(_fold_scaling(model), model)
+
+
+class TestSelectThreshold(unittest.TestCase):
+    def setUp(self):
+        self.y_true = np.array([0, 0, 1, 0, 1, 1])
+        self.scores = np.array([0.1, 0.3, 0.4, 0.6, 0.7, 0.9])
+
+    def test_default_without_target(self):
+        self.assertEqual(_select_threshold(self.y_true, self.scores), DEFAULT_THRESHOLD)
+
+    def test_target_precision_keeps_most_recall(self):
+        threshold = _select_threshold(self.y_true, self.scores, target_precision=1.0)
+
+        self.assertEqual(threshold, 0.7)
+
+    def test_target_recall_keeps_most_precision(self):
+        threshold = _select_threshold(self.y_true, self.scores, target_recall=1.0)
+
+        self.assertEqual(threshold, 0.4)
+
+    def test_no_positives_falls_back(self):
+        threshold = _select_threshold(np.zeros(4, dtype=int), self.scores[:4], target_precision=0.9)
+
+        self.assertEqual(threshold, DEFAULT_THRESHOLD)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from src.core.models import CodeSmell, SmellType, Severity
+
+
+def make_smell(**overrides) -> CodeSmell:
+    """A long-method CodeSmell; ``overrides`` replace any of its constructor arguments"""
+    fields = dict(
+        smell_type=SmellType.LONG_METHOD,
+        severity=Severity.MEDIUM,
+        line_start=1,
+        line_end=40,
+        column_start=0,
+        column_end=0,
+        message="Method '{}' is too long ({} lines)",
+        message_args=('handler', 39),
+        suggestion="Consider breaking this method into smaller functions",
+        confidence=0.3,
+        file_path="src/" + "module.py"
+    )
+    fields.update(overrides)
+    return CodeSmell(**fields)
+
+
+class TestCodeSmell(unittest.TestCase):
+    def test_slotted(self):
+        smell = make_smell()
+
+        self.assertFalse(hasattr(smell, '__dict__'))
+        with self.assertRaises(AttributeError):
+            smell.unknown_attribute = 1
+
+    def test_message_formatted_lazily(self):
+        smell = make_smell()
+
+        self.assertEqual(smell.message_template, "Method '{}' is too long ({} lines)")
+        self.assertEqual(smell.message, "Method 'handler' is too long (39 lines)")
+
+    def test_plain_message_is_not_formatted(self):
+        smell = make_smell(message="Braces {} are kept", message_args=None)
+
+        self.assertEqual(smell.message, "Braces {} are kept")
+        self.assertEqual(smell.message_args, ())
+
+    def test_strings_are_interned(self):
+        first = make_smell()
+        second = make_smell()
+
+        self.assertIs(first.file_path, second.file_path)
+        self.assertIs(first.suggestion, second.suggestion)
+
+    def test_empty_metrics_not_allocated(self):
+        smell = make_smell()
+
+        self.assertEqual(dict(smell.metrics), {})
+        self.assertIs(smell.metrics, make_smell().metrics)
+        self.assertEqual(make_smell(metrics={'method_length': 39}).metrics, {'method_length': 39})
+
+    def test_equality_uses_rendered_fields(self):
+        templated = make_smell()
+        rendered = make_smell(message="Method 'handler' is too long (39 lines)", message_args=None)
+
+        self.assertEqual(templated, rendered)
+        self.assertNotEqual(templated, make_smell(line_start=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import tempfile
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from src.ml.out_of_core import RunningStats, TrainingMatrix
+from src.ml.feature_extractor import FeatureExtractor
+from src.ml.model import SmellPredictor, TrainingDataGenerator
+from src.core.models import SmellType
+from test_model import write_training_corpus
+
+
+class TestRunningStats(unittest.TestCase):
+    def test_chunks_match_one_pass_scaler(self):
+        rng = np.random.default_rng(0)
+        X = rng.normal(1e6, 3.0, (1000, 4))
+        X[:, 3] = 7.0
+
+        stats = RunningStats(4)
+        for start in range(0, len(X), 128):
+            stats.update(X[start:start + 128])
+        stats.update(X[:0])
+        scaler = stats.to_scaler()
+        expected = StandardScaler().fit(X)
+
+        self.assertEqual(scaler.n_samples_seen_, 1000)
+        np.testing.assert_allclose(scaler.mean_, expected.mean_)
+        np.testing.assert_allclose(scaler.var_, expected.var_, rtol=1e-6)
+        np.testing.assert_allclose(scaler.transform(X), expected.transform(X), atol=1e-6)
+
+
+class TestOutOfCoreTraining(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.file_paths = write_training_corpus(cls.temp_dir)
+        cls.training_data = TrainingDataGenerator().generate_training_data(cls.file_paths) * 4
+
+    @classmethod
+    def tearDownClass(cls):
+        import shutil
+        shutil.rmtree(cls.temp_dir)
+
+    def test_matrix_holds_features_and_labels(self):
+        extractor = FeatureExtractor()
+        with tempfile.TemporaryDirectory() as directory:
+            matrix = TrainingMatrix(directory, extractor.n_features)
+            matrix.write(extractor, iter(self.training_data), chunk_size=5)
+
+            expected_X, expected_Y = SmellPredictor().prepare_training_matrix(self.training_data)
+            self.assertEqual(matrix.rows, len(self.training_data))
+            np.testing.assert_array_equal(matrix.features, expected_X)
+            np.testing.assert_array_equal(matrix.labels, expected_Y)
+            self.assertEqual(matrix.stats.count, int((~matrix.held_out).sum()))
+            rows = [row for chunk in matrix.chunks(5, shuffle=True) for row in range(matrix.rows)[chunk]]
+            self.assertEqual(sorted(rows), list(range(matrix.rows)))
+
+    def test_models_train_chunk_by_chunk(self):
+        for model_type in ('sgd', 'naive_bayes', 'random_forest'):
+            predictor = SmellPredictor(model_type=model_type)
+            results = predictor.train_out_of_core(self.training_data, chunk_size=16)
+
+            self.assertEqual(results[SmellType.LONG_METHOD.value]['chunks'], 3)
+            scores = predictor.score_features(predictor.feature_extractor.extract_features_batch(self.file_paths))
+            self.assertEqual(len(scores[SmellType.LONG_METHOD]), len(self.file_paths))
+
+    def test_forest_grows_its_trees_across_chunks(self):
+        predictor = SmellPredictor()
+        predictor.train_out_of_core(self.training_data, chunk_size=16)
+        model = predictor.models[SmellType.LONG_METHOD]
+
+        self.assertEqual(len(model.estimators_), model.n_estimators)
+        self.assertGreaterEqual(model.n_estimators, 34)
+        self.assertFalse(model.warm_start)
+
+    def test_held_out_rows_are_scored_chunk_by_chunk(self):
+        predictor = SmellPredictor(model_type='sgd')
+        results = predictor.train_out_of_core(self.training_data, chunk_size=7, target_recall=1.0)
+
+        self.assertEqual(results[SmellType.LONG_METHOD.value]['training_samples']
+                         + results[SmellType.LONG_METHOD.value]['test_samples'], len(self.training_data))
+        self.assertEqual(results[SmellType.LONG_METHOD.value]['classification_report']['1']['recall'], 1.0)
+
+    def test_tiny_corpus_is_skipped(self):
+        results = SmellPredictor(model_type='sgd').train_out_of_core(self.training_data[:3], chunk_size=2)
+
+        self.assertEqual(results, {})
+
+    def test_models_without_chunked_fitting_are_rejected(self):
+        with self.assertRaises(ValueError):
+            SmellPredictor(model_type='svm').train_out_of_core(self.training_data)
+        with self.assertRaises(ValueError):
+            SmellPredictor(hash_features=64).train_out_of_core(self.training_data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import tempfile
+
+import numpy as np
+
+from src.ml.model import SmellPredictor, TrainingDataGenerator
+from src.ml.prediction_cache import PredictionCache, row_keys
+from src.core.models import SmellType
+from test_model import write_training_corpus
+
+
+class TestPredictionCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = PredictionCache(max_entries=2)
+        self.cache.bind('model-a')
+
+    def test_lookup_needs_every_smell_type(self):
+        self.cache.store(b'k' * 16, {SmellType.LONG_METHOD: 0.7})
+
+        self.assertEqual(self.cache.lookup(b'k' * 16, [SmellType.LONG_METHOD]), {SmellType.LONG_METHOD: 0.7})
+        self.assertIsNone(self.cache.lookup(b'k' * 16, [SmellType.LONG_METHOD, SmellType.LARGE_CLASS]))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        self.cache.store(b'a' * 16, {SmellType.LONG_METHOD: 0.1})
+        self.cache.store(b'b' * 16, {SmellType.LONG_METHOD: 0.2})
+        self.cache.lookup(b'a' * 16, [SmellType.LONG_METHOD])
+        self.cache.store(b'c' * 16, {SmellType.LONG_METHOD: 0.3})
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.lookup(b'b' * 16, [SmellType.LONG_METHOD]))
+
+    def test_round_trip_ignores_other_models(self):
+        key = b'\x01' * 15 + b'\x00'
+        self.cache.store(key, {SmellType.LONG_METHOD: 0.25})
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.cache.save(cache_dir)
+
+            same = PredictionCache()
+            same.bind('model-a')
+            same.load(cache_dir)
+            other = PredictionCache()
+            other.bind('model-b')
+            other.load(cache_dir)
+
+        self.assertEqual(same.lookup(key, [SmellType.LONG_METHOD]), {SmellType.LONG_METHOD: 0.25})
+        self.assertEqual(len(other), 0)
+
+    def test_row_keys_match_identical_rows(self):
+        keys = row_keys(np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]]))
+
+        self.assertEqual(keys[0], keys[1])
+        self.assertNotEqual(keys[0], keys[2])
+
+
+class TestCachedScoring(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.file_paths = write_training_corpus(cls.temp_dir)
+        cls.training_data = TrainingDataGenerator().generate_training_data(cls.file_paths)
+
+    @classmethod
+    def tearDownClass(cls):
+        import shutil
+        shutil.rmtree(cls.temp_dir)
+
+    def test_cached_scores_match_and_are_reused(self):
+        predictor = SmellPredictor(model_type='sgd')
+        predictor.train(self.training_data)
+        features = predictor.feature_extractor.extract_features_batch(self.file_paths)
+        expected = predictor.score_features(features)
+
+        predictor.prediction_cache = PredictionCache()
+        first = predictor.score_features(features)
+        second = predictor.score_features(features)
+
+        distinct = len(set(row_keys(features)))
+        self.assertEqual((predictor.prediction_cache.hits, predictor.prediction_cache.misses), (distinct, distinct))
+        for smell_type, scores in expected.items():
+            self.assertTrue(np.array_equal(first[smell_type], scores))
+            self.assertTrue(np.array_equal(second[smell_type], scores))
+
+        predictor.update(self.training_data[:4])
+        updated = predictor.score_features(features)
+        self.assertEqual(predictor.prediction_cache.misses, 2 * distinct)
+        self.assertFalse(np.array_equal(updated[SmellType.LONG_METHOD], expected[SmellType.LONG_METHOD]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import tempfile
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.ml.search import SEARCH_SPACES, candidates_for_budget, halving_cost, min_resources, search_model
+from src.ml.model import SmellPredictor, TrainingDataGenerator
+from src.core.models import SmellType
+from test_model import write_training_corpus
+
+
+class TestBudget(unittest.TestCase):
+    def setUp(self):
+        self.y = np.array([0, 1] * 300)
+
+    def test_cost_grows_with_candidates(self):
+        costs = [halving_cost(n_candidates, (0.0, 0.001), self.y, 3) for n_candidates in (3, 9, 27, 81)]
+
+        self.assertEqual(costs, sorted(costs))
+        # Halving keeps each candidate cheaper than a full cross-validation
+        self.assertLess(costs[-1], 81 * 3 * 0.001 * len(self.y))
+
+    def test_fixed_fit_time_makes_subsamples_cost_more(self):
+        linear = halving_cost(27, (0.0, 0.001), self.y, 3)
+        fixed = halving_cost(27, (0.1, 0.0005), self.y, 3)
+
+        self.assertGreater(fixed, linear)
+
+    def test_candidates_fit_the_budget(self):
+        small = candidates_for_budget(1.0, (0.01, 0.0001), self.y, 3)
+        large = candidates_for_budget(10.0, (0.01, 0.0001), self.y, 3)
+
+        self.assertLess(small, large)
+        # The three finalists are refitted on every sample after the search
+        refits = 3 * (0.01 + 0.0001 * len(self.y))
+        self.assertLessEqual(halving_cost(large, (0.01, 0.0001), self.y, 3) + refits, 10.0)
+        self.assertEqual(candidates_for_budget(0.0, (0.01, 0.0001), self.y, 3), 0)
+
+    def test_processes_share_search_fits_but_not_refits(self):
+        serial = candidates_for_budget(2.0, (0.01, 0.0001), self.y, 3)
+        parallel = candidates_for_budget(2.0, (0.01, 0.0001), self.y, 3, n_jobs=4)
+
+        self.assertLess(serial, parallel)
+        # Refits alone outgrow this budget, however many processes search
+        self.assertEqual(candidates_for_budget(0.1, (0.0, 0.0001), self.y, 3, n_jobs=64), 0)
+
+    def test_first_iteration_sees_the_rarer_class_in_every_fold(self):
+        y = np.array([1] * 30 + [0] * 570)
+
+        self.assertGreaterEqual(min_resources(243, y, 3) * 30 / len(y), 2 * 3)
+
+
+class TestSearchModel(unittest.TestCase):
+    def test_returns_fitted_model_from_search_space(self):
+        rng = np.random.default_rng(0)
+        X = rng.random((300, 5))
+        y = (X[:, 0] > 0.5).astype(int)
+
+        model, report = search_model(RandomForestClassifier(n_estimators=10, random_state=0), 'random_forest',
+                                     X[:200], y[:200], X[200:], cv=3, budget_seconds=2.0)
+
+        self.assertGreater((model.predict(X[200:]) == y[200:]).mean(), 0.9)
+        for name, value in report['params'].items():
+            self.assertIn(name, SEARCH_SPACES['random_forest'])
+            self.assertEqual(model.get_params()[name], value)
+        self.assertGreaterEqual(report['candidates'], 2)
+
+    def test_search_stays_within_budget(self):
+        rng = np.random.default_rng(0)
+        X = rng.random((3000, 20))
+        y = (X[:, 0] + 0.3 * rng.random(3000) > 0.6).astype(int)
+        model = RandomForestClassifier(random_state=0)
+
+        for budget_seconds in (1.0, 4.0):
+            start = time.perf_counter()
+            _, report = search_model(model, 'random_forest', X[:2400], y[:2400], X[2400:], cv=3,
+                                     budget_seconds=budget_seconds)
+            elapsed = time.perf_counter() - start
+
+            # Only the probe on a ninth of the rows, one full fit and its latency
+            # timing may run past the budget; together they take about a second
+            self.assertLess(elapsed, budget_seconds + 2.0)
+            self.assertAlmostEqual(report['search_seconds'], elapsed, delta=0.1)
+
+
+class TestTrainWithSearch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.file_paths = write_training_corpus(cls.temp_dir)
+        cls.training_data = TrainingDataGenerator().generate_training_data(cls.file_paths)
+
+        cls.predictor = SmellPredictor(model_type='logistic_regression')
+        cls.results = cls.predictor.train(cls.training_data, search_budget=2.0)
+
+    @classmethod
+    def tearDownClass(cls):
+        import shutil
+        shutil.rmtree(cls.temp_dir)
+
+    def test_hyperparameters_recorded_per_smell(self):
+        search = self.results[SmellType.LONG_METHOD.value]['search']
+
+        self.assertEqual(self.predictor.hyperparameters[SmellType.LONG_METHOD], search['params'])
+
+    def test_hyperparameters_reused_after_loading(self):
+        model_dir = f"{self.temp_dir}/searched_models"
+        self.predictor.save_model(model_dir)
+
+        loaded = SmellPredictor()
+        loaded.load_model(model_dir)
+        self.assertEqual(loaded.hyperparameters, self.predictor.hyperparameters)
+
+        retrained = SmellPredictor(model_type='logistic_regression')
+        retrained.hyperparameters = {SmellType.LONG_METHOD: {'logisticregression__C': 0.5}}
+        retrained.train(self.training_data)
+        self.assertEqual(retrained.models[SmellType.LONG_METHOD].C, 0.5)
+
+    def test_multi_label_rejects_search(self):
+        with self.assertRaises(ValueError):
+            SmellPredictor(multi_label=True).train(self.training_data, search_budget=1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
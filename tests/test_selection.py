@@ -0,0 +1,101 @@
+import unittest
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.ml.feature_extractor import FeatureExtractor, FEATURE_PASSES
+from src.ml.selection import feature_costs, select_features, subset_cost
+from src.ml.model import SmellPredictor, TrainingDataGenerator
+from src.core.models import SmellType
+from test_model import write_training_corpus
+
+
+class TestSelectFeatures(unittest.TestCase):
+    def setUp(self):
+        self.feature_names = FeatureExtractor().feature_names
+        self.pass_costs = {name: 0.001 for name in FEATURE_PASSES}
+        self.pass_costs['lexical'] = 0.01
+
+        rng = np.random.default_rng(0)
+        X = rng.random((200, len(self.feature_names)))
+        y = (X[:, self.feature_names.index('lines_of_code')] > 0.5).astype(int)
+        self.split = X[:150], y[:150], X[150:], y[150:]
+
+    def create_model(self):
+        return RandomForestClassifier(n_estimators=10, random_state=0)
+
+    def test_keeps_informative_cheap_features(self):
+        subset = select_features(self.create_model, *self.split, self.feature_names, self.pass_costs, 0.02)
+
+        self.assertIn('lines_of_code', subset)
+        self.assertFalse(set(subset) & set(FEATURE_PASSES['lexical']))
+        self.assertLess(subset_cost(subset, self.pass_costs), subset_cost(self.feature_names, self.pass_costs))
+
+    def test_required_passes_are_kept(self):
+        subset = select_features(self.create_model, *self.split, self.feature_names, self.pass_costs, 0.02,
+                                 required_passes=('lexical',))
+
+        self.assertTrue(set(subset) & set(FEATURE_PASSES['lexical']))
+        self.assertIn('lines_of_code', subset)
+
+    def test_costs_count_each_pass_once(self):
+        self.assertEqual(subset_cost(['lines_of_code', 'max_line_length'], self.pass_costs), 0.001)
+        self.assertEqual(feature_costs(self.pass_costs)['comparison_count'], 0.01)
+
+
+class TestTrainWithFeatureSelection(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.file_paths = write_training_corpus(cls.temp_dir)
+        cls.training_data = TrainingDataGenerator().generate_training_data(cls.file_paths)
+
+        cls.predictor = SmellPredictor()
+        cls.results = cls.predictor.train(cls.training_data, max_feature_loss=0.0)
+
+    @classmethod
+    def tearDownClass(cls):
+        import shutil
+        shutil.rmtree(cls.temp_dir)
+
+    def test_subsets_recorded_per_smell(self):
+        subset = self.results[SmellType.LONG_METHOD.value]['selected_features']
+
+        self.assertEqual(self.predictor.feature_subsets[SmellType.LONG_METHOD], subset)
+        self.assertEqual(self.predictor.models[SmellType.LONG_METHOD].n_features_in_, len(subset))
+        self.assertEqual(set(self.predictor.feature_costs), set(self.predictor.feature_extractor.feature_names))
+
+    def test_selection_never_sees_held_out_rows(self):
+        calls = []
+
+        def recording_select(create_model, X_fit, y_fit, X_val, y_val, feature_names, *args, **kwargs):
+            calls.append((X_fit.shape[0], X_val.shape[0]))
+            return feature_names
+
+        with patch('src.ml.model.select_features', recording_select):
+            results = SmellPredictor().train(self.training_data, max_feature_loss=0.0)
+
+        self.assertTrue(calls)
+        training_samples = [result['training_samples'] for result in results.values()]
+        self.assertEqual([fit + validation for fit, validation in calls], training_samples)
+
+    def test_loaded_extractor_computes_only_used_passes(self):
+        model_dir = f"{self.temp_dir}/selected_models"
+        self.predictor.save_model(model_dir)
+
+        loaded = SmellPredictor()
+        loaded.load_model(model_dir)
+        used = {name for subset in loaded.feature_subsets.values() for name in subset}
+        expected = [name for name, features in FEATURE_PASSES.items() if used & set(features)]
+
+        self.assertEqual(list(loaded.feature_extractor.active_passes), expected)
+        features = loaded.feature_extractor.extract_features_batch(self.file_paths)
+        full = self.predictor.feature_extractor.extract_features_batch(self.file_paths)
+        for smell_type, scores in loaded.score_features(features).items():
+            self.assertTrue(np.array_equal(scores, self.predictor.score_features(full)[smell_type]))
+
+
+if __name__ == '__main__':
+    unittest.main()
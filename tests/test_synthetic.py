@@ -0,0 +1,59 @@
+import unittest
+import tempfile
+
+import numpy as np
+
+from src.ml.synthetic import PLANTED_SMELLS, SyntheticGenerator
+from src.ml.feature_extractor import FeatureExtractor
+from src.ml.model import SmellPredictor, TrainingDataGenerator
+from src.core.models import SmellType
+
+
+class TestSyntheticGenerator(unittest.TestCase):
+    def test_labels_match_detector_on_written_source(self):
+        with tempfile.TemporaryDirectory() as directory:
+            generator = SyntheticGenerator(noise=0.5, seed=0)
+            file_paths = generator.write_corpus(directory, 40)
+            samples = list(SyntheticGenerator(noise=0.5, seed=0).iter_samples(40))
+            labelled = TrainingDataGenerator().generate_training_data(file_paths)
+
+            for sample, (_, smells) in zip(samples, labelled):
+                compile(sample.source, '<synthetic>', 'exec')
+                self.assertEqual(sorted(sample.smell_types, key=lambda smell_type: smell_type.value),
+                                 sorted({smell.smell_type for smell in smells}, key=lambda smell_type: smell_type.value))
+
+    def test_smell_rate_controls_planted_smells(self):
+        clean = SyntheticGenerator(smell_rate=0.0, noise=0.0, seed=0)
+        smelly = SyntheticGenerator(smell_rate=1.0, intensity=0.0, seed=0)
+
+        for _ in range(20):
+            self.assertEqual(clean.sample().smell_types, [])
+            self.assertTrue(set(PLANTED_SMELLS) <= set(smelly.sample().smell_types))
+
+    def test_label_noise_flips_labels(self):
+        sample = SyntheticGenerator(smell_rate=0.0, noise=0.0, label_noise=1.0, seed=0).sample()
+
+        self.assertEqual(sample.smell_types, list(SmellType))
+
+    def test_chunks_match_serial_and_parallel(self):
+        extractor = FeatureExtractor()
+        serial = list(SyntheticGenerator(seed=1).iter_chunks(extractor, 25, 10))
+        parallel = list(SyntheticGenerator(seed=1).iter_chunks(extractor, 25, 10, n_jobs=2))
+
+        self.assertEqual([len(X) for X, _ in serial], [10, 10, 5])
+        for (X, Y), (X_parallel, Y_parallel) in zip(serial, parallel):
+            np.testing.assert_array_equal(X, X_parallel)
+            np.testing.assert_array_equal(Y, Y_parallel)
+
+    def test_trains_on_generated_samples_alone(self):
+        predictor = SmellPredictor(model_type='sgd')
+        results = predictor.train_out_of_core([], chunk_size=100, synthetic=SyntheticGenerator(seed=2),
+                                              synthetic_samples=300)
+
+        self.assertIn(SmellType.LONG_METHOD.value, results)
+        self.assertEqual(results[SmellType.LONG_METHOD.value]['training_samples']
+                         + results[SmellType.LONG_METHOD.value]['test_samples'], 300)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import tempfile
+import os
+import functools
+import gc
+from unittest.mock import patch
+
+from cli import _analyze_in_worker, _attach_prediction_cache
+from src.detectors.smell_detector import SmellDetector
+from src.ml.localization import predict_localized
+from src.ml.model import SmellPredictor, TrainingDataGenerator
+from src.ml.workers import SharedModelPool, fork_available
+from src.core.models import SmellType
+from test_model import write_training_corpus
+
+
+@unittest.skipUnless(fork_available(), "worker processes need fork")
+class TestSharedModelPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.file_paths = write_training_corpus(cls.temp_dir)
+        predictor = SmellPredictor()
+        predictor.train(TrainingDataGenerator().generate_training_data(cls.file_paths))
+        cls.model_dir = os.path.join(cls.temp_dir, 'models')
+        predictor.save_model(cls.model_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        import shutil
+        shutil.rmtree(cls.temp_dir)
+
+    def test_results_in_order(self):
+        with SharedModelPool(lambda value: value * value, 2) as pool:
+            self.assertEqual(list(pool.imap(range(10), chunksize=3)), [value * value for value in range(10)])
+
+    def test_failed_pool_creation_unfreezes(self):
+        frozen = gc.get_freeze_count()
+
+        with patch('multiprocessing.context.ForkContext.Pool', side_effect=OSError("no more processes")):
+            with self.assertRaises(OSError):
+                SharedModelPool(lambda value: value, 2)
+
+        self.assertEqual(gc.get_freeze_count(), frozen)
+
+    def test_workers_use_models_loaded_by_parent(self):
+        predictor = SmellPredictor()
+        predictor.load_model(self.model_dir)
+        predictor.load_all_models()
+        self.assertTrue(predictor.models.is_loaded(SmellType.LONG_METHOD))
+
+        def predict(file_path):
+            loaded = predictor.models.is_loaded(SmellType.LONG_METHOD)
+            smells = predict_localized(predictor, file_path)
+            return loaded, [(smell.smell_type, smell.line_start, smell.confidence) for smell in smells]
+
+        with SharedModelPool(predict, 2) as pool:
+            results = list(pool.imap(self.file_paths))
+
+        self.assertTrue(all(loaded for loaded, _ in results))
+        self.assertEqual([smells for _, smells in results], [predict(file_path)[1] for file_path in self.file_paths])
+
+    def test_worker_scores_reach_parent_cache(self):
+        predictor = SmellPredictor()
+        predictor.load_model(self.model_dir)
+        predictor.load_all_models()
+        _attach_prediction_cache(predictor, None)
+        cache = predictor.prediction_cache
+        cache.track_stored = True
+
+        task = functools.partial(_analyze_in_worker, detector=SmellDetector(), predictor=predictor, ml_cascade=None)
+        with SharedModelPool(task, 2) as pool:
+            for *_, cached, error in pool.imap(self.file_paths):
+                self.assertIsNone(error)
+                cache.merge(*cached)
+
+        self.assertGreater(len(cache), 0)
+        rows = sum(len(predictor.feature_extractor.extract_unit_features(file_path)[0]) for file_path in self.file_paths)
+        self.assertEqual(cache.hits + cache.misses, rows)
+        cache.hits = cache.misses = 0
+        for file_path in self.file_paths:
+            predict_localized(predictor, file_path)
+        self.assertEqual(cache.misses, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()